@@ -0,0 +1,85 @@
+"""Micro-benchmark for the log message helper.
+
+Compares the helper against formatting with inspect.stack(), as it used to,
+with debug logging both disabled and enabled. The number of calls timed is
+picked for each so that a run takes about 0.2s, as inspect.stack() is
+hundreds of times slower than the helper.
+
+Run from the root of the repository:
+
+    python benchmarks/bench_logger.py --output results.json
+"""
+
+# region #-- imports --#
+import argparse
+import inspect
+import logging
+import pathlib
+import timeit
+from typing import Any, Callable
+
+from common import COMPONENT_PATH, load_module, write_results
+
+# endregion
+
+REPEAT: int = 5
+
+_LOGGER = logging.getLogger("bench_logger")
+_LOGGER.addHandler(logging.NullHandler())
+_LOGGER.propagate = False
+
+
+def _inspect_format(message: str) -> str:
+    """Format a message the way the helper used to."""
+    caller: str = inspect.stack()[1].function
+    return f"{caller} (unique_id) --> {message}"
+
+
+def _run_inspect() -> None:
+    """Log with the message always formatted using inspect.stack()."""
+    _LOGGER.debug(_inspect_format("entered, user_input: %s"), None)
+
+
+def _time_per_call(func: Callable[[], None]) -> dict[str, Any]:
+    """Time the function, in us per call, over the best of REPEAT runs."""
+    timer: timeit.Timer = timeit.Timer(func)
+    calls, _ = timer.autorange()
+    seconds: float = min(timer.repeat(number=calls, repeat=REPEAT))
+    return {"calls": calls, "us_per_call": seconds / calls * 1e6}
+
+
+def main() -> None:
+    """Run the benchmark and write the time per call."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--output",
+        help="file to write the JSON to, stdout if not given",
+        type=pathlib.Path,
+    )
+    args: argparse.Namespace = parser.parse_args()
+
+    # loaded directly, the package needs Home Assistant to import
+    log = load_module("logger", COMPONENT_PATH / "logger.py").Logger(
+        _LOGGER, unique_id="unique_id"
+    )
+
+    def _run_helper() -> None:
+        """Log with the helper."""
+        log.debug("entered, user_input: %s", None)
+
+    results: list[dict[str, Any]] = []
+    for level in (logging.INFO, logging.DEBUG):
+        _LOGGER.setLevel(level)
+        for name, func in (("inspect.stack", _run_inspect), ("Logger", _run_helper)):
+            results.append(
+                {
+                    "debug": level == logging.DEBUG,
+                    "implementation": name,
+                    **_time_per_call(func),
+                }
+            )
+    write_results({"logger": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
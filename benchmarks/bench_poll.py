@@ -0,0 +1,423 @@
+"""Benchmarks for the poll path, discovery and setup, against a simulated bus.
+
+For each HAT model and acquisition profile, in continuous and triggered mode,
+this reports:
+
+* driver - transactions and wall time for each snapshot read by the driver
+* gather_details - transactions and wall time for each UPS.gather_details
+* discovery - wall time to probe the discovery buses, as the config flow does
+* setup - async_setup_entry time to the first sensor state, then the wall
+time and the longest the event loop was blocked for each coordinator refresh
+
+The driver benchmarks only need smbus2. The others need Home Assistant, and
+setup also needs pytest-homeassistant-custom-component for a test instance,
+they are recorded as skipped when these are not installed.
+
+Run from the root of the repository:
+
+    python benchmarks/bench_poll.py --output results.json
+
+Each run records the commit and versions it ran against, so the JSON from two
+releases can be compared directly.
+"""
+
+# region #-- imports --#
+import argparse
+import asyncio
+import itertools
+import pathlib
+import time
+from typing import Any, Awaitable, Callable, Iterator
+from unittest import mock
+
+from common import import_component, import_driver, summarise, write_results
+
+# endregion
+
+HATS: dict[str, int] = {"a": 0x42, "d": 0x43}  # HAT type to default address
+HEARTBEAT: float = 0.0005  # seconds between checks of the event loop
+I2C_BUS: int = 1
+SETUP_TIMEOUT: float = 30
+
+ina219 = import_driver("ina219")
+profiles = import_driver("profiles")
+simulator = import_driver("simulator")
+
+READ_PLANS: dict[str, tuple[int, ...]] = {
+    "base": tuple(
+        register
+        for register in ina219.DATA_REGISTERS
+        if register in (ina219.REG_BUSVOLTAGE, ina219.Registers.CURRENT.value)
+    ),
+    "full": ina219.DATA_REGISTERS,
+}
+SCENARIOS: dict[str, Any] = {
+    "a": simulator.steady(8.2, 500),
+    "d": simulator.steady(3.9, -800),
+}
+
+
+def _simulated_bus(
+    conversion_scale: float, combined: bool = True
+) -> "simulator.SimulatedI2C":
+    """Get a bus with every HAT model on it, plus an empty bus 0."""
+    sim = simulator.SimulatedI2C(conversion_scale=conversion_scale, combined=combined)
+    sim.add_bus(0)
+    for hat, address in HATS.items():
+        sim.add_device(
+            I2C_BUS,
+            address,
+            simulator.SimulatedINA219(ina219.HAT_PROFILES[hat], SCENARIOS[hat]),
+        )
+    return sim
+
+
+def _timed(func: Callable[..., Any], *args: Any) -> tuple[float, Any]:
+    """Run the function, returning how long it took and its result."""
+    start: float = time.perf_counter()
+    result: Any = func(*args)
+    return time.perf_counter() - start, result
+
+
+async def _loop_blocking(
+    func: Callable[[], Awaitable[Any]],
+) -> tuple[float, float]:
+    """Run the coroutine function and measure how it blocks the event loop.
+
+    A heartbeat wakes every HEARTBEAT seconds and the furthest it wakes up
+    past when it should have is the longest the loop was blocked for.
+
+    :return: the longest the loop was blocked and the wall time, in seconds
+    """
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    running: bool = True
+    worst: float = 0
+
+    async def _heartbeat() -> None:
+        """Record how late each wake up is."""
+        nonlocal worst
+        while running:
+            expected: float = loop.time() + HEARTBEAT
+            await asyncio.sleep(HEARTBEAT)
+            worst = max(worst, loop.time() - expected)
+
+    heartbeat: asyncio.Task = loop.create_task(_heartbeat())
+    await asyncio.sleep(0)
+    start: float = time.perf_counter()
+    await func()
+    duration = time.perf_counter() - start
+    running = False
+    await heartbeat
+    return worst, duration
+
+
+def bench_driver(
+    hat: str,
+    profile: str,
+    triggered: bool,
+    read_plan: str,
+    iterations: int,
+    conversion_scale: float,
+    combined: bool,
+) -> dict[str, Any]:
+    """Benchmark reading snapshots with the driver alone."""
+    sim = _simulated_bus(conversion_scale, combined)
+    acquisition = profiles.ACQUISITION_PROFILES[profile]
+    device = ina219.INA219(
+        HATS[hat],
+        I2C_BUS,
+        triggered=triggered,
+        bus_adc_resolution=acquisition.bus_adc_resolution,
+        shunt_adc_resolution=acquisition.shunt_adc_resolution,
+        hat=ina219.HAT_PROFILES[hat],
+        bus_factory=sim.bus_factory,
+    )
+    device.calibrate()
+    registers: tuple[int, ...] = READ_PLANS[read_plan]
+    transactions: int = device.transactions
+    messages: int = sim.transactions
+    durations: list[float] = [
+        _timed(device.read_snapshot, registers)[0] for _ in range(iterations)
+    ]
+    device.close()
+    return {
+        "bus_messages_per_poll": (sim.transactions - messages) / iterations,
+        "transactions_per_poll": (device.transactions - transactions) / iterations,
+        "wall_ms": summarise(durations),
+    }
+
+
+async def bench_gather_details(
+    hat: str,
+    profile: str,
+    triggered: bool,
+    read_plan: str,
+    iterations: int,
+    conversion_scale: float,
+) -> dict[str, Any]:
+    """Benchmark UPS.gather_details on a device I/O worker."""
+    component = import_component()
+    device_io = import_component(".device_io")
+    sim = _simulated_bus(conversion_scale)
+    ups = component.UPS(
+        i2c_bus=I2C_BUS,
+        i2c_address=HATS[hat],
+        is_model_d=hat == "d",
+        triggered=triggered,
+        profile=profiles.ACQUISITION_PROFILES[profile],
+        bus_factory=sim.bus_factory,
+    )
+    ups.read_plan = READ_PLANS[read_plan]
+    worker = device_io.DeviceIO(I2C_BUS)
+    try:
+        await worker.async_run(ups.gather_details)  # connect and calibrate
+        durations: list[float] = []
+        transactions: int = 0
+        for _ in range(iterations):
+            duration, reading = await worker.async_run(_timed, ups.gather_details)
+            durations.append(duration)
+            transactions += reading.transactions
+        await worker.async_run(ups.close)
+    finally:
+        worker.shutdown()
+    return {
+        "transactions_per_poll": transactions / iterations,
+        "wall_ms": summarise(durations),
+    }
+
+
+async def bench_discovery(iterations: int, conversion_scale: float) -> dict[str, Any]:
+    """Benchmark probing the discovery buses in parallel, as the flow does."""
+    config_flow = import_component(".config_flow")
+    device_io = import_component(".device_io")
+    sim = _simulated_bus(conversion_scale)
+    workers: dict[int, Any] = {
+        i2c_bus: device_io.DeviceIO(i2c_bus) for i2c_bus in config_flow.DISCOVERY_BUSES
+    }
+    durations: list[float] = []
+    found: int = 0
+    try:
+        for _ in range(iterations):
+            start: float = time.perf_counter()
+            results = await asyncio.gather(
+                *(
+                    worker.async_run(config_flow._probe_bus, i2c_bus, sim.bus_factory)
+                    for i2c_bus, worker in workers.items()
+                )
+            )
+            durations.append(time.perf_counter() - start)
+            found = sum(len(result or ()) for result in results)
+    finally:
+        for worker in workers.values():
+            worker.shutdown()
+    return {
+        "buses": list(workers),
+        "found": found,
+        "wall_ms": summarise(durations),
+    }
+
+
+async def bench_setup(
+    hat: str,
+    profile: str,
+    triggered: bool,
+    iterations: int,
+    conversion_scale: float,
+) -> dict[str, Any]:
+    """Benchmark async_setup_entry and coordinator refreshes in a test instance."""
+    # pylint: disable=import-outside-toplevel
+    from homeassistant import loader
+    from homeassistant.const import EVENT_STATE_CHANGED
+    from homeassistant.core import Event, callback
+    from pytest_homeassistant_custom_component.common import (
+        MockConfigEntry,
+        async_test_home_assistant,
+    )
+
+    const = import_component(".const")
+    sim = _simulated_bus(conversion_scale)
+    async with async_test_home_assistant() as hass:
+        hass.data.pop(loader.DATA_CUSTOM_COMPONENTS, None)  # find this repo's
+        first_state: asyncio.Future = hass.loop.create_future()
+
+        @callback
+        def _state_changed(event: Event) -> None:
+            """Record when the first sensor has a state."""
+            if not first_state.done() and event.data["entity_id"].startswith(
+                "sensor."
+            ):
+                first_state.set_result(time.perf_counter())
+
+        hass.bus.async_listen(EVENT_STATE_CHANGED, _state_changed)
+        entry = MockConfigEntry(
+            domain=const.DOMAIN,
+            title=f"bench {hat}",
+            options={
+                const.CONF_ACQUISITION_PROFILE: profile,
+                const.CONF_CONVERSION_TRIGGERED: triggered,
+                const.CONF_HAT_ADDRESS: hex(HATS[hat]),
+                const.CONF_HAT_BUS: I2C_BUS,
+                const.CONF_HAT_TYPE: hat,
+                const.CONF_UPDATE_INTERVAL: 3600,  # keep scheduled polls away
+                const.CONF_UPDATE_INTERVAL_FAST: 3600,
+            },
+            unique_id=f"{I2C_BUS}::{hex(HATS[hat])}",
+        )
+        entry.add_to_hass(hass)
+
+        with mock.patch("smbus2.SMBus", sim.bus_factory):
+            start: float = time.perf_counter()
+            if not await hass.config_entries.async_setup(entry.entry_id):
+                raise RuntimeError("async_setup_entry failed")
+            first: float = await asyncio.wait_for(first_state, SETUP_TIMEOUT)
+            setup_duration: float = time.perf_counter() - start
+
+            coordinator = hass.data[const.DOMAIN][entry.entry_id][
+                const.CONF_COORDINATOR
+            ]
+            blocking: list[float] = []
+            durations: list[float] = []
+            for _ in range(iterations):
+                worst, duration = await _loop_blocking(coordinator.async_refresh)
+                blocking.append(worst)
+                durations.append(duration)
+
+            await hass.config_entries.async_unload(entry.entry_id)
+            await hass.async_block_till_done()
+
+    return {
+        "refresh_loop_blocking_ms": summarise(blocking),
+        "refresh_wall_ms": summarise(durations),
+        "setup_ms": setup_duration * 1000,
+        "time_to_first_state_ms": (first - start) * 1000,
+    }
+
+
+def _matrix(
+    hats: list[str], acquisition_profiles: list[str]
+) -> Iterator[tuple[str, str, bool]]:
+    """Get each combination of HAT, profile and conversion mode."""
+    return itertools.product(hats, acquisition_profiles, (False, True))
+
+
+async def _async_run_component(
+    args: argparse.Namespace, results: dict[str, Any]
+) -> None:
+    """Run the benchmarks that need Home Assistant."""
+    if import_component() is None:
+        for name in ("discovery", "gather_details", "setup"):
+            results["skipped"][name] = "homeassistant is not installed"
+        return
+
+    for hat, profile, triggered in _matrix(args.hats, args.profiles):
+        for read_plan in READ_PLANS:
+            results["gather_details"].append(
+                {
+                    "hat": hat,
+                    "profile": profile,
+                    "read_plan": read_plan,
+                    "triggered": triggered,
+                    **await bench_gather_details(
+                        hat,
+                        profile,
+                        triggered,
+                        read_plan,
+                        args.iterations,
+                        args.conversion_scale,
+                    ),
+                }
+            )
+
+    results["discovery"] = await bench_discovery(
+        args.iterations, args.conversion_scale
+    )
+
+    try:
+        import pytest_homeassistant_custom_component  # noqa: F401 pylint: disable=import-outside-toplevel,unused-import
+    except ImportError:
+        results["skipped"]["setup"] = (
+            "pytest-homeassistant-custom-component is not installed"
+        )
+        return
+    for hat, profile, triggered in _matrix(args.hats, args.profiles):
+        results["setup"].append(
+            {
+                "hat": hat,
+                "profile": profile,
+                "triggered": triggered,
+                **await bench_setup(
+                    hat, profile, triggered, args.iterations, args.conversion_scale
+                ),
+            }
+        )
+
+
+def main() -> None:
+    """Run the benchmarks and write the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--conversion-scale",
+        default=1.0,
+        help="multiple of the real conversion times to simulate",
+        type=float,
+    )
+    parser.add_argument("--hats", choices=list(HATS), default=list(HATS), nargs="+")
+    parser.add_argument("--iterations", default=50, type=int)
+    parser.add_argument(
+        "--output",
+        help="file to write the JSON to, stdout if not given",
+        type=pathlib.Path,
+    )
+    parser.add_argument(
+        "--profiles",
+        choices=list(profiles.ACQUISITION_PROFILES),
+        default=list(profiles.ACQUISITION_PROFILES),
+        nargs="+",
+    )
+    parser.add_argument(
+        "--separate-reads",
+        action="store_true",
+        help="simulate an adapter without combined transactions",
+    )
+    args = parser.parse_args()
+
+    results: dict[str, Any] = {
+        "config": {
+            "combined": not args.separate_reads,
+            "conversion_scale": args.conversion_scale,
+            "iterations": args.iterations,
+        },
+        "discovery": None,
+        "driver": [],
+        "gather_details": [],
+        "setup": [],
+        "skipped": {},
+    }
+
+    for hat, profile, triggered in _matrix(args.hats, args.profiles):
+        for read_plan in READ_PLANS:
+            results["driver"].append(
+                {
+                    "hat": hat,
+                    "profile": profile,
+                    "read_plan": read_plan,
+                    "triggered": triggered,
+                    **bench_driver(
+                        hat,
+                        profile,
+                        triggered,
+                        read_plan,
+                        args.iterations,
+                        args.conversion_scale,
+                        not args.separate_reads,
+                    ),
+                }
+            )
+
+    asyncio.run(_async_run_component(args, results))
+
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Helpers shared by the benchmarks."""
+
+# region #-- imports --#
+import importlib
+import importlib.metadata
+import importlib.util
+import json
+import pathlib
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import UTC, datetime
+from types import ModuleType
+from typing import Any, Sequence
+
+# endregion
+
+REPO_ROOT: pathlib.Path = pathlib.Path(__file__).parents[1]
+COMPONENT_PATH: pathlib.Path = REPO_ROOT / "custom_components" / "rpi_waveshare_ups"
+PACKAGE: str = "custom_components.rpi_waveshare_ups"
+
+
+def load_module(name: str, path: pathlib.Path) -> ModuleType:
+    """Load a single file as a module, without importing its package."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def import_component(module: str = "") -> ModuleType | None:
+    """Import a module of the integration.
+
+    :param module: relative to the integration, e.g. ".config_flow"
+    :return: None if Home Assistant is not installed
+    """
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    try:
+        return importlib.import_module(f"{PACKAGE}{module}")
+    except ModuleNotFoundError as err:
+        if err.name is not None and err.name.split(".")[0] == "homeassistant":
+            return None
+        raise
+
+
+def import_driver(module: str) -> ModuleType:
+    """Import a module of the INA219 driver, which works without Home Assistant.
+
+    The copy in the integration is used when it can be imported so that the
+    classes are the same ones the integration uses.
+    """
+    if (imported := import_component(f".ina219.{module}")) is not None:
+        return imported
+    if str(COMPONENT_PATH) not in sys.path:
+        sys.path.insert(0, str(COMPONENT_PATH))
+    return importlib.import_module(f"ina219.{module}")
+
+
+def summarise(durations: Sequence[float]) -> dict[str, float | int]:
+    """Summarise durations, in seconds, as ms."""
+    ordered: list[float] = sorted(duration * 1000 for duration in durations)
+    return {
+        "max": ordered[-1],
+        "mean": statistics.fmean(ordered),
+        "min": ordered[0],
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "samples": len(ordered),
+    }
+
+
+def _version(distribution: str) -> str | None:
+    """Get the installed version of a distribution."""
+    try:
+        return importlib.metadata.version(distribution)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def _git_commit() -> str | None:
+    """Get the commit being benchmarked."""
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True,
+            check=True,
+            cwd=REPO_ROOT,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(
+    results: dict[str, Any], output: pathlib.Path | None = None
+) -> None:
+    """Write the results as JSON, with what they were run against.
+
+    :param results: the results of the benchmark
+    :param output: the file to write to, stdout if not given
+    """
+    document: dict[str, Any] = {
+        "meta": {
+            "commit": _git_commit(),
+            "homeassistant": _version("homeassistant"),
+            "machine": platform.machine(),
+            "python": platform.python_version(),
+            "smbus2": _version("smbus2"),
+            "timestamp": datetime.now(UTC).isoformat(),
+        },
+        **results,
+    }
+    text: str = json.dumps(document, indent=2, sort_keys=True)
+    if output is None:
+        print(text)  # noqa: T201
+    else:
+        output.write_text(f"{text}\n", encoding="utf-8")
@@ -1,35 +1,102 @@
 """RPi Waveshare UPS Integration."""
 
 # region #-- imports --#
+import contextlib
+import functools
 import logging
-from datetime import timedelta
+import pathlib
+import shutil
+import time
+from typing import Any, Callable
 
+import smbus2 as smbus
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
 )
 
 from .const import (
+    CONF_ACQUISITION_PROFILE,
+    CONF_BATTERY_CAPACITY,
+    CONF_BUS_MANAGER,
+    CONF_CAPTURE,
+    CONF_CAPTURE_WRITER,
+    CONF_CONVERSION_TRIGGERED,
     CONF_COORDINATOR,
+    CONF_DEADBANDS,
+    CONF_ENERGY_STORE,
+    CONF_HISTORY,
     CONF_HAT_ADDRESS,
     CONF_HAT_BUS,
     CONF_HAT_TYPE,
+    CONF_LONG_TERM_STATISTICS,
+    CONF_MIN_CHARGING,
+    CONF_SAMPLE_RATE,
+    CONF_SAMPLER,
+    CONF_UNSUBSCRIBE,
     CONF_UPDATE_INTERVAL,
+    CONF_UPDATE_INTERVAL_FAST,
+    CONF_UPS,
+    DEF_ACQUISITION_PROFILE,
+    DEF_BATTERY_CAPACITY,
+    DEF_CAPTURE,
+    DEF_CONVERSION_TRIGGERED,
+    DEF_HISTORY,
+    DEF_LONG_TERM_STATISTICS,
+    DEF_MIN_CHARGING,
+    DEF_SAMPLE_BUFFER_SECONDS,
+    DEF_SAMPLE_RATE,
     DEF_UPDATE_INTERVAL,
+    DEF_UPDATE_INTERVAL_FAST,
     DOMAIN,
     PLATFORMS,
+    STORAGE_VERSION,
 )
-from .ina219.INA219_AB import INA219_AB
-from .ina219.INA219_D import INA219_D
+from .bus_manager import BusManager, async_acquire_bus, async_release_bus
+from .coordinator import UPSDataUpdateCoordinator
+from .deadband import Deadband
+from .device_io import DeviceIO, DeviceIOShutdown, ensure_worker_thread
+from .energy import EnergyIntegrator
+from .history import History
+from .hourly import HourlyAggregator
+from .ina219.capture import CaptureWriter
+from .ina219.ina219 import DATA_REGISTERS, HAT_PROFILES, INA219, Registers
+from .ina219.profiles import ACQUISITION_PROFILES, AcquisitionProfile
 from .logger import Logger
+from .long_term import LongTermStatistics
+from .reading import Reading
+from .runtime import RuntimeEstimator
+from .sampler import Sampler
+from .services import async_setup_services
+from .soc import BATTERY_PACKS, SocEstimator
+from .stats import DeviceStats
 
 # endregion
 
 _LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+REG_BUSVOLTAGE: int = Registers.BUSVOLTAGE.value
+REG_CURRENT: int = Registers.CURRENT.value
+REG_POWER: int = Registers.POWER.value
+REG_SHUNTVOLTAGE: int = Registers.SHUNTVOLTAGE.value
+
+# read for each background sample, the power is worked out from them
+SAMPLE_REGISTERS: tuple[int, ...] = (REG_BUSVOLTAGE, REG_CURRENT)
+
+
+@functools.lru_cache(maxsize=32)
+def _read_name(registers: tuple[int, ...]) -> str:
+    """Name a read of the given registers for the stats."""
+    return "+".join(Registers(register).name for register in registers)
+
 
 class UPS:
     """Represenation of the UPS device."""
@@ -42,56 +109,245 @@ class UPS:
         """Exit magic method."""
         self._close()
 
-    def __init__(self, i2c_bus: int, i2c_address: int, is_model_d: bool) -> None:
+    def __init__(
+        self,
+        i2c_bus: int,
+        i2c_address: int,
+        is_model_d: bool,
+        triggered: bool = False,
+        profile: AcquisitionProfile = ACQUISITION_PROFILES[DEF_ACQUISITION_PROFILE],
+        battery_capacity: float = DEF_BATTERY_CAPACITY,
+        min_charging: float = DEF_MIN_CHARGING,
+        bus_factory: Callable[[int], smbus.SMBus] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
         """Initialise."""
-        _LOGGER.debug("init with is_model_d: %s", is_model_d)
+        _LOGGER.debug(
+            "init with is_model_d: %s, triggered: %s, profile: %s",
+            is_model_d,
+            triggered,
+            profile,
+        )
+        self._bus_factory: Callable[[int], smbus.SMBus] | None = bus_factory
+        self._clock: Callable[[], float] = clock
+        self._i2c_address: int = i2c_address
+        self._i2c_bus: int = i2c_bus
         self._is_model_d = is_model_d
-        self._current: float | None = None
-        self._ina219: INA219_D | INA219_AB = INA219_D(addr=i2c_address, i2c_bus=i2c_bus) if is_model_d else INA219_AB(addr=i2c_address, i2c_bus=i2c_bus)
-        self._load_voltage: float | None = None
-        self._power: float | None = None
-        self._shunt_voltage: float | None = None
-        self.gather_details()
+        self._min_charging: float = min_charging
+        self._profile: AcquisitionProfile = profile
+        self._triggered: bool = triggered
+        self._connections: int = 0
+        self._ina219: INA219 | None = None
+        self._seq: int = 0
+        self.energy: EnergyIntegrator = EnergyIntegrator()
+        # called on the worker with every reading from a poll
+        self.reading_listeners: list[Callable[[Reading], None]] = []
+        self.read_plan: tuple[int, ...] = DATA_REGISTERS
+        # called on the worker with the timestamp and values of every sample
+        self.sample_listeners: list[Callable[[float, tuple[float, ...]], None]] = []
+        self.reading: Reading | None = None
+        self.soc: SocEstimator = SocEstimator(
+            BATTERY_PACKS["d" if is_model_d else "a"], battery_capacity
+        )
+        self.runtime: RuntimeEstimator = RuntimeEstimator(battery_capacity)
+        self.stats: DeviceStats = DeviceStats()
 
     def _close(self) -> None:
         """Close the bus connection."""
-        self._ina219.bus.close()
-
-    def gather_details(self) -> None:
-        """Retrieve the required details for the UPS."""
-        self._current = -self._ina219.get_current_ma() if self._is_model_d else self._ina219.get_current_ma()
-        self._load_voltage = self._ina219.get_bus_voltage_v()
-        self._power = self._ina219.get_power_w()
-        self._shunt_voltage = self._ina219.get_shunt_voltage_mv() / 1000
-
-    @property
-    def battery_percentage(self) -> float:
-        """Get the battery percentage."""
-        ret: float = ((self._load_voltage - 3) / 1.2 * 100) if self._is_model_d else ((self._load_voltage - 6) / 2.4 * 100)
-        ret = min(ret, 100)
-        ret = max(ret, 0)
-
-        return ret
+        if self._ina219 is not None:
+            with contextlib.suppress(OSError):
+                self._ina219.close()
+            self._ina219 = None
+
+    def _connect(self) -> None:
+        """Open the bus connection and calibrate the device."""
+        _LOGGER.debug(
+            "connecting to 0x%02x on bus %d", self._i2c_address, self._i2c_bus
+        )
+        self._ina219 = INA219(
+            addr=self._i2c_address,
+            i2c_bus=self._i2c_bus,
+            triggered=self._triggered,
+            bus_adc_resolution=self._profile.bus_adc_resolution,
+            shunt_adc_resolution=self._profile.shunt_adc_resolution,
+            hat=HAT_PROFILES["d" if self._is_model_d else "a"],
+            bus_factory=self._bus_factory,
+        )
+        self._ina219.on_read = self._record_read
+        self._connections += 1
+        if self._connections > 1:
+            self.stats.increment("reconnects")
+
+    def _read(self, registers: tuple[int, ...]) -> tuple[list[int], int]:
+        """Read the raw registers from the device.
+
+        :param registers: the registers to read
+        :return: the values and the number of bus transactions used
+        """
+        if self._ina219 is None:
+            self._connect()
+            transactions: int = 0
+            recalibrations: int = 0
+        else:
+            transactions = self._ina219.transactions
+            recalibrations = self._ina219.recalibrations
+
+        raw: list[int] = self._ina219.read_snapshot(registers)
+        if self._ina219.recalibrations != recalibrations:
+            self.stats.increment("recalibrations")
+        if self._ina219.overflow:
+            self.stats.increment("overflows")
+            _LOGGER.warning("the INA219 reported a math overflow, values may be wrong")
+
+        return raw, self._ina219.transactions - transactions
+
+    def _record_bus_error(self, err: OSError) -> None:
+        """Count an error talking to the device."""
+        self.stats.increment("bus_errors")
+        if isinstance(err, TimeoutError):
+            self.stats.increment("conversion_timeouts")
+
+    def _record_read(self, registers: tuple[int, ...], duration: float) -> None:
+        """Record how long a read from the device took."""
+        self.stats.add_read(_read_name(tuple(registers)), duration * 1000)
+
+    def close(self) -> None:
+        """Close the session with the device."""
+        ensure_worker_thread()
+        self._close()
 
-    @property
-    def current(self) -> float:
-        """Get the current in mA."""
-        return self._current
+    def gather_details(self) -> Reading:
+        """Take a reading from the UPS.
+
+        The bus is kept open between calls.  If the bus reports an error the
+        connection is re-established, and the device re-calibrated, once
+        before giving up.
+
+        Every successful reading is integrated into the energy totals and the
+        state of charge and runtime estimates, and everything derived from it
+        is worked out once here.
+
+        This blocks so must be submitted to the device I/O worker.
+        """
+        ensure_worker_thread()
+        registers: tuple[int, ...] = self.read_plan
+        try:
+            raw, transactions = self._read(registers)
+        except OSError as err:
+            _LOGGER.debug("bus error, reconnecting: %s", err)
+            self._record_bus_error(err)
+            self.stats.increment("retries")
+            self._close()
+            try:
+                raw, transactions = self._read(registers)
+            except OSError as retry_err:
+                self._record_bus_error(retry_err)
+                self._close()
+                raise
+
+        timestamp: float = self._clock()
+        values: dict[int, int] = dict(zip(registers, raw))
+        raw_bus_voltage: int = values[REG_BUSVOLTAGE]
+        raw_current: int = values[REG_CURRENT]
+        raw_power: int | None = values.get(REG_POWER)
+        raw_shunt_voltage: int | None = values.get(REG_SHUNTVOLTAGE)
+
+        current: float = self._ina219.convert_current_ma(raw_current)
+        load_voltage: float = self._ina219.convert_bus_voltage_v(raw_bus_voltage)
+        power: float = (
+            self._ina219.convert_power_w(raw_power)
+            if raw_power is not None
+            else abs(current) * load_voltage / 1000
+        )
+        shunt_voltage: float | None = (
+            self._ina219.convert_shunt_voltage_mv(raw_shunt_voltage) / 1000
+            if raw_shunt_voltage is not None
+            else None
+        )
+        is_charging: bool = current >= self._min_charging
+
+        self.energy.add(timestamp, current, power)
+        soc: float = self.soc.update(timestamp, load_voltage, current)
+        self.runtime.add(timestamp, current)
+        totals: dict[str, float] = self.energy.as_dict()
+
+        self._seq += 1
+        self.reading = Reading(
+            seq=self._seq,
+            timestamp=timestamp,
+            raw_bus_voltage=raw_bus_voltage,
+            raw_current=raw_current,
+            raw_power=raw_power,
+            raw_shunt_voltage=raw_shunt_voltage,
+            current=current,
+            load_voltage=load_voltage,
+            power=power,
+            shunt_voltage=shunt_voltage,
+            battery_percentage=soc,
+            is_charging=is_charging,
+            psu_voltage=(
+                load_voltage + shunt_voltage if shunt_voltage is not None else None
+            ),
+            time_to_empty=(
+                None if is_charging else self.runtime.time_to_empty(soc)
+            ),
+            time_to_full=self.runtime.time_to_full(soc) if is_charging else None,
+            charge_in_mah=totals["charge_in_mah"],
+            charge_out_mah=totals["charge_out_mah"],
+            energy_in_wh=totals["energy_in_wh"],
+            energy_out_wh=totals["energy_out_wh"],
+            overflow=self._ina219.overflow,
+            transactions=transactions,
+        )
+        for listener in self.reading_listeners:
+            listener(self.reading)
+        return self.reading
+
+    def read_sample(self) -> tuple[float, tuple[float, float, float]]:
+        """Take a quick reading for the background sampler.
+
+        Only the bus voltage and current are read, and nothing is integrated
+        into the totals or estimates. If the bus reports an error the
+        connection is closed, so the next read reconnects, rather than retried.
+
+        This blocks so must be submitted to the device I/O worker.
+
+        :return: the timestamp, and the current, load voltage and power
+        """
+        ensure_worker_thread()
+        try:
+            (raw_bus_voltage, raw_current), _ = self._read(SAMPLE_REGISTERS)
+        except OSError as err:
+            self._record_bus_error(err)
+            self._close()
+            raise
+
+        timestamp: float = self._clock()
+        current: float = self._ina219.convert_current_ma(raw_current)
+        load_voltage: float = self._ina219.convert_bus_voltage_v(raw_bus_voltage)
+        values: tuple[float, float, float] = (
+            current,
+            load_voltage,
+            abs(current) * load_voltage / 1000,
+        )
+        for listener in self.sample_listeners:
+            listener(timestamp, values)
+        return timestamp, values
 
     @property
-    def load_voltage(self) -> float:
-        """Get the load voltage (voltage on V-)."""
-        return self._load_voltage
+    def i2c_bus(self) -> int:
+        """Get the bus the device is on."""
+        return self._i2c_bus
 
     @property
-    def power(self) -> float:
-        """Get the power in W."""
-        return self._power
+    def min_charging(self) -> float:
+        """Get the lowest current considered to be charging."""
+        return self._min_charging
 
     @property
-    def shunt_voltage(self) -> float:
-        """Get the shunt voltage (voltage between V+ and V- across the shunt)."""
-        return self._shunt_voltage
+    def profile(self) -> AcquisitionProfile:
+        """Get the acquisition profile used for the ADCs."""
+        return self._profile
 
 
 class UPSEntity(CoordinatorEntity):
@@ -103,6 +359,51 @@ class UPSEntity(CoordinatorEntity):
         """Initialise."""
         super().__init__(coordinator)
         self._config_entry = config_entry
+        self._deadband: Deadband = Deadband()
+        self._last_written: tuple[Any, bool, float] | None = None
+
+    def _set_deadband(self, deadband: Deadband) -> None:
+        """Set the deadband, applying any overrides from the options."""
+        self._deadband = deadband.with_overrides(
+            self._config_entry.options.get(CONF_DEADBANDS, {}).get(
+                self.entity_description.translation_key
+            )
+        )
+
+    @property
+    def _state_value(self) -> Any:
+        """Return the value that the deadband is applied to."""
+        raise NotImplementedError
+
+    async def async_added_to_hass(self) -> None:
+        """Register the registers the entity needs with the coordinator."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_consumer(self.entity_description.registers)
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Only write the state if it has moved past the deadband."""
+        value: Any = self._state_value
+        available: bool = self.available
+        now: float = time.monotonic()
+        if (
+            self._last_written is None
+            or available != self._last_written[1]
+            or self._deadband.moved(self._last_written[0], value)
+            or (
+                self._deadband.max_silence is not None
+                and now - self._last_written[2] >= self._deadband.max_silence
+            )
+        ):
+            self._last_written = (value, available, now)
+            self.coordinator.state_writes[self.entity_description.translation_key] += 1
+            self.async_write_ha_state()
+        else:
+            self.coordinator.suppressed_writes[
+                self.entity_description.translation_key
+            ] += 1
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -128,54 +429,240 @@ async def _async_update_listener(
     await hass.config_entries.async_reload(config_entry.entry_id)
 
 
+def _remove_files(paths: list[pathlib.Path]) -> None:
+    """Delete the files and directories kept for an entry."""
+    for path in paths:
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+
+
+def _close(entry_data: dict[str, Any]) -> None:
+    """Close the bus and the files for an entry, on the worker."""
+    entry_data[CONF_UPS].close()
+    if (capture_writer := entry_data.get(CONF_CAPTURE_WRITER)) is not None:
+        capture_writer.close()
+    if (history := entry_data.get(CONF_HISTORY)) is not None:
+        history.close()
+
+
+async def _async_abort_setup(hass: HomeAssistant, entry_data: dict[str, Any]) -> None:
+    """Undo the setup of an entry, once it has acquired the bus."""
+    for unsubscribe in entry_data.pop(CONF_UNSUBSCRIBE, []):
+        unsubscribe()
+    if (sampler := entry_data.get(CONF_SAMPLER)) is not None:
+        sampler.stop()
+    bus_manager: BusManager = entry_data[CONF_BUS_MANAGER]
+    try:
+        await bus_manager.device_io.async_run(_close, entry_data)
+    except DeviceIOShutdown:  # Home Assistant is stopping
+        _LOGGER.debug("the worker has stopped, leaving bus %d", bus_manager.i2c_bus)
+    finally:
+        async_release_bus(hass, bus_manager)
+
+
+async def async_setup(hass: HomeAssistant, _: ConfigType) -> bool:
+    """Set up the services, which are shared by all of the entries."""
+    async_setup_services(hass)
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Initialise the ConfigEntry."""
-    log_formatter = Logger(unique_id=config_entry.unique_id)
-    _LOGGER.debug(log_formatter.format("entered"))
+    # region #-- set the unique id for entries created without one --#
+    if config_entry.unique_id is None:
+        unique_id: str = (
+            f"{config_entry.options.get(CONF_HAT_BUS)}"
+            f"::{config_entry.options.get(CONF_HAT_ADDRESS)}"
+        )
+        if (
+            hass.config_entries.async_entry_for_domain_unique_id(DOMAIN, unique_id)
+            is None
+        ):
+            hass.config_entries.async_update_entry(config_entry, unique_id=unique_id)
+    # endregion
+
+    log: Logger = Logger(_LOGGER, unique_id=config_entry.unique_id)
+    log.debug("entered")
 
     # region #-- initialise memory storage --#
-    hass.data.setdefault(DOMAIN, {})
+    entry_data: dict[str, Any] = hass.data.setdefault(DOMAIN, {}).setdefault(
+        config_entry.entry_id, {}
+    )
     # endregion
 
     # region #-- setup the coordinator --#
-    async def _async_data_coordinator_update() -> UPS:
-        with UPS(
-            i2c_bus=config_entry.options.get(CONF_HAT_BUS),
-            i2c_address=int(config_entry.options.get(CONF_HAT_ADDRESS), 0),
-            is_model_d=(config_entry.options.get(CONF_HAT_TYPE, 'A').upper() == 'D'),
-        ) as ups_data:
-            pass
-
-        return ups_data
-
-    coordinator: DataUpdateCoordinator = DataUpdateCoordinator(
-        hass,
-        _LOGGER,
-        name=DOMAIN,
-        update_method=_async_data_coordinator_update,
-        update_interval=timedelta(
-            seconds=config_entry.options.get(CONF_UPDATE_INTERVAL, DEF_UPDATE_INTERVAL)
+    capture_writer: CaptureWriter | None = None
+    if config_entry.options.get(CONF_CAPTURE, DEF_CAPTURE):
+        capture_writer = CaptureWriter(
+            pathlib.Path(hass.config.path(DOMAIN, f"{config_entry.entry_id}.capture"))
+        )
+        entry_data[CONF_CAPTURE_WRITER] = capture_writer
+
+    ups: UPS = UPS(
+        i2c_bus=config_entry.options.get(CONF_HAT_BUS),
+        i2c_address=int(config_entry.options.get(CONF_HAT_ADDRESS), 0),
+        is_model_d=(config_entry.options.get(CONF_HAT_TYPE, 'A').upper() == 'D'),
+        triggered=config_entry.options.get(
+            CONF_CONVERSION_TRIGGERED, DEF_CONVERSION_TRIGGERED
+        ),
+        battery_capacity=config_entry.options.get(
+            CONF_BATTERY_CAPACITY, DEF_BATTERY_CAPACITY
+        ),
+        min_charging=config_entry.options.get(CONF_MIN_CHARGING, DEF_MIN_CHARGING),
+        profile=ACQUISITION_PROFILES.get(
+            config_entry.options.get(
+                CONF_ACQUISITION_PROFILE, DEF_ACQUISITION_PROFILE
+            ),
+            ACQUISITION_PROFILES[DEF_ACQUISITION_PROFILE],
+        ),
+        bus_factory=(
+            capture_writer.bus_factory if capture_writer is not None else None
         ),
     )
-    hass.data[DOMAIN][CONF_COORDINATOR] = coordinator
-    await coordinator.async_config_entry_first_refresh()
-    # endregion
+    entry_data[CONF_UPS] = ups
 
-    # region #-- setup the platforms --#
-    _LOGGER.debug(log_formatter.format("setting up platforms: %s"), PLATFORMS)
-    await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
-    # endregion
+    energy_store: Store = Store(
+        hass, STORAGE_VERSION, f"{DOMAIN}.{config_entry.entry_id}.energy"
+    )
+    ups.energy.restore(await energy_store.async_load())
+    entry_data[CONF_ENERGY_STORE] = energy_store
+    bus_manager: BusManager = async_acquire_bus(hass, ups.i2c_bus)
+    entry_data[CONF_BUS_MANAGER] = bus_manager
+    device_io: DeviceIO = bus_manager.device_io
+
+    # anything failing from here on, including Home Assistant cancelling the
+    # setup, must give the bus back, as unloading isn't run for a failed setup
+    try:
+        history: History | None = None
+        if config_entry.options.get(CONF_HISTORY, DEF_HISTORY):
+            history = History(
+                pathlib.Path(
+                    hass.config.path(DOMAIN, f"{config_entry.entry_id}.history")
+                )
+            )
+            await device_io.async_run(history.open)
+            ups.reading_listeners.append(history.add)
+            ups.sample_listeners.append(history.add_values)
+            entry_data[CONF_HISTORY] = history
+
+        long_term: LongTermStatistics | None = None
+        if config_entry.options.get(
+            CONF_LONG_TERM_STATISTICS, DEF_LONG_TERM_STATISTICS
+        ):
+            if "recorder" in hass.config.components:
+                aggregator: HourlyAggregator = HourlyAggregator()
+                long_term = LongTermStatistics(hass, config_entry, aggregator)
+                await long_term.async_load()
+                ups.reading_listeners.append(aggregator.add)
+                entry_data[CONF_LONG_TERM_STATISTICS] = long_term
+            else:
+                log.warning("the recorder isn't loaded, not importing statistics")
+
+        sampler: Sampler | None = None
+        if sample_rate := config_entry.options.get(
+            CONF_SAMPLE_RATE, DEF_SAMPLE_RATE
+        ):
+            max_sample_rate: float = 1 / ups.profile.conversion_time
+            if sample_rate > max_sample_rate:
+                log.debug(
+                    "limiting sample rate to %.1fHz for the acquisition profile",
+                    max_sample_rate,
+                )
+                sample_rate = max_sample_rate
+            sampler = Sampler(ups, sample_rate, DEF_SAMPLE_BUFFER_SECONDS)
+            entry_data[CONF_SAMPLER] = sampler
+
+        update_interval: float = max(
+            config_entry.options.get(CONF_UPDATE_INTERVAL, DEF_UPDATE_INTERVAL),
+            ups.profile.min_poll_interval,
+        )
+        coordinator: UPSDataUpdateCoordinator = UPSDataUpdateCoordinator(
+            hass,
+            ups=ups,
+            name=config_entry.title,
+            device_io=device_io,
+            energy_store=energy_store,
+            sampler=sampler,
+            update_interval=update_interval,
+            update_interval_fast=max(
+                config_entry.options.get(
+                    CONF_UPDATE_INTERVAL_FAST, DEF_UPDATE_INTERVAL_FAST
+                ),
+                ups.profile.min_poll_interval,
+            ),
+        )
+        entry_data[CONF_COORDINATOR] = coordinator
+        await coordinator.async_config_entry_first_refresh()
+
+        # removed at the start of unloading, before anything is closed
+        entry_data[CONF_UNSUBSCRIBE] = [
+            bus_manager.async_add_coordinator(coordinator)
+        ]
+        if long_term is not None:
+            entry_data[CONF_UNSUBSCRIBE].append(
+                coordinator.async_add_listener(long_term.async_import)
+            )
+        if sampler is not None:
+            sampler.start(device_io)
+        # endregion
+
+        # region #-- setup the platforms --#
+        log.debug("setting up platforms: %s", PLATFORMS)
+        await hass.config_entries.async_forward_entry_setups(
+            config_entry, PLATFORMS
+        )
+        # endregion
+    except BaseException:
+        await _async_abort_setup(hass, entry_data)
+        hass.data[DOMAIN].pop(config_entry.entry_id)
+        raise
 
     config_entry.async_on_unload(
         config_entry.add_update_listener(_async_update_listener)
     )
 
-    _LOGGER.debug(log_formatter.format("exited"))
+    log.debug("exited")
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Unload entry."""
+    """Unload entry.
+
+    Polling and sampling are stopped first, as the callbacks registered with
+    async_on_unload aren't run until this returns, so nothing reopens the bus
+    or the files once they are closed.
+    """
+    entry_data: dict[str, Any] = hass.data[DOMAIN][entry.entry_id]
+    for unsubscribe in entry_data.pop(CONF_UNSUBSCRIBE, []):
+        unsubscribe()
+    sampler: Sampler | None = entry_data.get(CONF_SAMPLER)
+    if sampler is not None:
+        sampler.stop()
+    await entry_data[CONF_COORDINATOR].async_shutdown()
+
     if unloaded := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data.pop(DOMAIN)
+        hass.data[DOMAIN].pop(entry.entry_id)
+        ups: UPS = entry_data[CONF_UPS]
+        bus_manager: BusManager = entry_data[CONF_BUS_MANAGER]
+        try:
+            await bus_manager.device_io.async_run(_close, entry_data)
+        except DeviceIOShutdown:  # Home Assistant is stopping
+            _LOGGER.debug("the worker has stopped, leaving bus %d", ups.i2c_bus)
+        await entry_data[CONF_ENERGY_STORE].async_save(ups.energy.as_dict())
+        async_release_bus(hass, bus_manager)
     return unloaded
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the files kept for the entry once it has been removed."""
+    path: pathlib.Path = pathlib.Path(hass.config.path(DOMAIN))
+    await hass.async_add_executor_job(
+        _remove_files,
+        [
+            path / f"{entry.entry_id}.capture",
+            path / f"{entry.entry_id}.capture.old",
+            path / f"{entry.entry_id}.history",
+        ],
+    )
@@ -0,0 +1,215 @@
+"""Statistics over a window of readings, computed with NumPy."""
+
+# region #-- imports --#
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Hashable, Sequence
+
+import numpy as np
+
+from .history import History
+
+if TYPE_CHECKING:
+    from .sampler import Sampler
+
+# endregion
+
+CACHE_SIZE: int = 32
+POWER_STATES: tuple[str, ...] = ("all", "charging", "discharging")
+SOURCE_HISTORY: str = "history"
+SOURCE_SAMPLES: str = "samples"
+
+
+class ResultCache:
+    """Least recently used cache of statistics for identical windows."""
+
+    def __init__(self, size: int = CACHE_SIZE) -> None:
+        """Initialise."""
+        self._results: OrderedDict[Hashable, dict[str, Any]] = OrderedDict()
+        self._size: int = size
+
+    def get(self, key: Hashable) -> dict[str, Any] | None:
+        """Get a cached result, marking it as recently used."""
+        if (result := self._results.get(key)) is not None:
+            self._results.move_to_end(key)
+        return result
+
+    def put(self, key: Hashable, result: dict[str, Any]) -> None:
+        """Cache a result, dropping the least recently used if full."""
+        self._results[key] = result
+        self._results.move_to_end(key)
+        if len(self._results) > self._size:
+            self._results.popitem(last=False)
+
+
+def _dtype(fields: Sequence[str]) -> np.dtype:
+    """Get the array type matching the records of a history tier."""
+    return np.dtype(
+        [
+            (
+                name,
+                "<f8" if name == "timestamp" else "<u4" if name == "count" else "<f4",
+            )
+            for name in fields
+        ]
+    )
+
+
+def _percentiles(
+    values: np.ndarray, weights: np.ndarray | None, percentiles: Sequence[float]
+) -> np.ndarray:
+    """Get the percentiles, weighting each value if needed."""
+    if weights is None:
+        return np.percentile(values, percentiles)
+    order: np.ndarray = np.argsort(values)
+    cumulative: np.ndarray = np.cumsum(weights[order])
+    idx: np.ndarray = np.searchsorted(
+        cumulative, np.asarray(percentiles) / 100 * cumulative[-1]
+    )
+    return values[order][np.minimum(idx, len(values) - 1)]
+
+
+def _summarise(
+    values: np.ndarray,
+    weights: np.ndarray | None,
+    low: np.ndarray,
+    high: np.ndarray,
+    percentiles: Sequence[float],
+    bins: int,
+) -> dict[str, Any]:
+    """Get the statistics for the values.
+
+    :param values: the values, or the mean of each bucket
+    :param weights: the number of readings in each bucket, None for readings
+    :param low: the lowest reading for each value
+    :param high: the highest reading for each value
+    """
+    mean: float = float(np.average(values, weights=weights))
+    counts, edges = np.histogram(values, bins=bins, weights=weights)
+    return {
+        "count": int(weights.sum()) if weights is not None else int(values.size),
+        "histogram": {
+            "counts": np.rint(counts).astype(int).tolist(),
+            "edges": edges.tolist(),
+        },
+        "max": float(high.max()),
+        "mean": mean,
+        "min": float(low.min()),
+        "percentiles": {
+            f"p{percentile:g}": float(value)
+            for percentile, value in zip(
+                percentiles, _percentiles(values, weights, percentiles)
+            )
+        },
+        "std": float(np.sqrt(np.average((values - mean) ** 2, weights=weights))),
+    }
+
+
+def _empty(percentiles: Sequence[float]) -> dict[str, Any]:
+    """Get the statistics for a window with nothing in it."""
+    return {
+        "count": 0,
+        "histogram": {"counts": [], "edges": []},
+        "max": None,
+        "mean": None,
+        "min": None,
+        "percentiles": {f"p{percentile:g}": None for percentile in percentiles},
+        "std": None,
+    }
+
+
+def window_statistics(
+    history: History | None,
+    sampler: "Sampler | None",
+    series: str,
+    start: float,
+    end: float,
+    percentiles: Sequence[float],
+    bins: int,
+    power_state: str = "all",
+    min_charging: float = 0,
+) -> dict[str, Any]:
+    """Get the statistics for a series over a window.
+
+    The background samples are used if they go back far enough, being in
+    memory, otherwise the history, which picks the finest tier holding the
+    window. Statistics from an aggregate tier of the history are marked as
+    approximate. They are over the bucket means, weighted by the number of
+    readings in each, apart from the min and max which are exact, and the
+    buckets at either end can include readings from outside the window. This
+    reads from disk and can be a lot of work so must not be run on the event
+    loop.
+
+    :param series: one of SERIES
+    :param start: seconds since the epoch
+    :param end: seconds since the epoch
+    :param percentiles: the percentiles to get, 0 to 100
+    :param bins: the number of equal width bins for the histogram
+    :param power_state: only include readings whilst charging or discharging
+    :param min_charging: the lowest current, in mA, that is charging
+    :raises ValueError: if there are no samples or history to use
+    """
+    # samples have monotonic timestamps
+    offset: float = time.time() - time.monotonic()
+    samples: tuple[Any, dict[str, Any]] | None = (
+        sampler.samples() if sampler is not None else None
+    )
+    weights: np.ndarray | None = None
+    if samples is not None and (
+        history is None or (len(samples[0]) and samples[0][0] + offset <= start)
+    ):
+        source: str = SOURCE_SAMPLES
+        tier: str | None = None
+        resolution: float = 0
+        timestamps: np.ndarray = np.frombuffer(samples[0], dtype=np.float64) + offset
+        mask: np.ndarray = (timestamps >= start) & (timestamps < end)
+        values: np.ndarray = np.frombuffer(samples[1][series], dtype=np.float32)
+        current: np.ndarray = np.frombuffer(samples[1]["current"], dtype=np.float32)
+        low = high = values
+    elif history is not None:
+        source = SOURCE_HISTORY
+        tier, data = history.query_bytes(start, end)
+        config = history.config(tier)
+        resolution = config.resolution
+        records: np.ndarray = np.frombuffer(data, dtype=_dtype(config.fields))
+        timestamps = records["timestamp"]
+        mask = np.ones(len(records), dtype=bool)
+        if resolution:
+            values = records[f"{series}_mean"]
+            current = records["current_mean"]
+            weights = records["count"].astype(np.float64)
+            low, high = records[f"{series}_min"], records[f"{series}_max"]
+        else:
+            values = records[series]
+            current = records["current"]
+            low = high = values
+    else:
+        raise ValueError("Neither background sampling nor history is on")
+
+    if power_state == "charging":
+        mask &= current >= min_charging
+    elif power_state == "discharging":
+        mask &= current < min_charging
+
+    result: dict[str, Any] = {
+        "approximate": bool(resolution),
+        # for an aggregate tier, the start of the first bucket and the end of
+        # the last, clamped to the window
+        "first": max(float(timestamps[mask][0]), start) if mask.any() else None,
+        "last": (
+            min(float(timestamps[mask][-1]) + resolution, end) if mask.any() else None
+        ),
+        "resolution": resolution,
+        "source": source,
+        "tier": tier,
+    }
+    if not mask.any():
+        return result | _empty(percentiles)
+    return result | _summarise(
+        values[mask].astype(np.float64),
+        weights[mask] if weights is not None else None,
+        low[mask],
+        high[mask],
+        percentiles,
+        bins,
+    )
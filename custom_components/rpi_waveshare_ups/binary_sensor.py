@@ -14,8 +14,11 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from . import UPS, UPSEntity
-from .const import CONF_COORDINATOR, CONF_MIN_CHARGING, DEF_MIN_CHARGING, DOMAIN
+from . import UPSEntity
+from .const import CONF_COORDINATOR, DOMAIN
+from .deadband import Deadband
+from .ina219.ina219 import Registers
+from .reading import Reading
 
 # endregion
 
@@ -24,7 +27,7 @@ from .const import CONF_COORDINATOR, CONF_MIN_CHARGING, DEF_MIN_CHARGING, DOMAIN
 class UPSBinarySensorDescriptionMixin:
     """Additional attributes of the binary sensor description."""
 
-    value_fn: Callable[[UPS], bool]
+    value_fn: Callable[[Reading], bool]
 
 
 @dataclass
@@ -33,6 +36,8 @@ class UPSBinarySensorEntityDescription(
 ):
     """Describes UPS binary sensor entity."""
 
+    registers: tuple[Registers, ...] = ()
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -40,7 +45,9 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Create the binary sensor entities."""
-    coordinator: DataUpdateCoordinator = hass.data[DOMAIN][CONF_COORDINATOR]
+    coordinator: DataUpdateCoordinator = hass.data[DOMAIN][config_entry.entry_id][
+        CONF_COORDINATOR
+    ]
 
     binary_sensors: list[UPSBinarySensorEntity] = [
         UPSBinarySensorEntity(
@@ -50,9 +57,9 @@ async def async_setup_entry(
                 device_class=BinarySensorDeviceClass.BATTERY_CHARGING,
                 key="battery_state",
                 name="Battery State",
+                registers=(Registers.CURRENT,),
                 translation_key="battery_state",
-                value_fn=lambda u: u.current
-                >= config_entry.options.get(CONF_MIN_CHARGING, DEF_MIN_CHARGING),
+                value_fn=lambda r: r.is_charging,
             ),
         ),
     ]
@@ -72,11 +79,17 @@ class UPSBinarySensorEntity(UPSEntity, BinarySensorEntity):
         """Initialise."""
         super().__init__(config_entry=config_entry, coordinator=coordinator)
         self.entity_description = description
+        self._set_deadband(Deadband())
         self._attr_has_entity_name = True
         self._attr_unique_id = (
             f"{config_entry.entry_id}::binary_sensor::{self.entity_description.key}"
         )
 
+    @property
+    def _state_value(self) -> bool:
+        """Return the value that the deadband is applied to."""
+        return self.is_on
+
     @property
     def is_on(self) -> bool:
         """Return binary sensor state."""
@@ -0,0 +1,154 @@
+"""Share an I2C bus between the devices on it."""
+
+# region #-- imports --#
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import CONF_BUS_MANAGERS, DOMAIN
+from .device_io import DeviceIO
+
+if TYPE_CHECKING:
+    from .coordinator import UPSDataUpdateCoordinator
+
+# endregion
+
+_LOGGER = logging.getLogger(__name__)
+
+BATCH_WINDOW: float = 1  # seconds, polls due this close together share a wake-up
+
+
+class BusManager:
+    """Manage an I2C bus shared by one or more devices.
+
+    All transactions for the bus go through a single device I/O worker. The
+    coordinators for the devices are polled by the manager, rather than each
+    keeping its own timer, so that devices due at about the same time are
+    read in a single wake-up.
+    """
+
+    def __init__(self, hass: HomeAssistant, i2c_bus: int) -> None:
+        """Initialise."""
+        self._coordinators: list[UPSDataUpdateCoordinator] = []
+        self._hass: HomeAssistant = hass
+        self._polling: bool = False
+        self._unsub_wake: CALLBACK_TYPE | None = None
+        self.device_io: DeviceIO = DeviceIO(i2c_bus)
+        self.i2c_bus: int = i2c_bus
+        self.users: int = 0
+
+    @callback
+    def _async_schedule(self) -> None:
+        """Schedule the next wake-up for when the first device is due."""
+        if self._unsub_wake is not None:
+            self._unsub_wake()
+            self._unsub_wake = None
+        if self._polling or not self._coordinators:
+            return
+
+        delay: float = min(
+            coordinator.next_poll for coordinator in self._coordinators
+        ) - time.monotonic()
+        self._unsub_wake = async_call_later(self._hass, max(delay, 0), self._async_wake)
+
+    async def _async_wake(self, _: datetime) -> None:
+        """Poll all of the devices that are due."""
+        self._unsub_wake = None
+        self._polling = True
+        try:
+            cutoff: float = time.monotonic() + BATCH_WINDOW
+            due: list[UPSDataUpdateCoordinator] = [
+                coordinator
+                for coordinator in self._coordinators
+                if coordinator.next_poll <= cutoff
+            ]
+            _LOGGER.debug("polling %d device(s) on bus %d", len(due), self.i2c_bus)
+            await asyncio.gather(*(coordinator.async_refresh() for coordinator in due))
+            now: float = time.monotonic()
+            for coordinator in due:
+                if coordinator.next_poll <= now:  # the refresh failed
+                    coordinator.next_poll = now + coordinator.poll_interval
+        finally:
+            self._polling = False
+            self._async_schedule()
+
+    @callback
+    def async_add_coordinator(
+        self, coordinator: "UPSDataUpdateCoordinator"
+    ) -> CALLBACK_TYPE:
+        """Start polling the coordinator.
+
+        :return: a function that stops polling the coordinator
+        """
+        self._coordinators.append(coordinator)
+        remove_listener: CALLBACK_TYPE = coordinator.async_add_listener(
+            self._async_schedule
+        )
+        self._async_schedule()
+
+        @callback
+        def _async_remove() -> None:
+            """Stop polling the coordinator."""
+            remove_listener()
+            self._coordinators.remove(coordinator)
+            self._async_schedule()
+
+        return _async_remove
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop polling and stop the worker."""
+        _LOGGER.debug("stopping bus manager for bus %d", self.i2c_bus)
+        if self._unsub_wake is not None:
+            self._unsub_wake()
+            self._unsub_wake = None
+        self.device_io.shutdown()
+
+
+@callback
+def async_acquire_bus(hass: HomeAssistant, i2c_bus: int) -> BusManager:
+    """Get the manager for the given bus, creating it if needed.
+
+    Each call must be paired with a call to async_release_bus.
+    """
+    domain_data: dict = hass.data.setdefault(DOMAIN, {})
+    if CONF_BUS_MANAGERS not in domain_data:
+        domain_data[CONF_BUS_MANAGERS] = {}
+
+        @callback
+        def _async_shutdown(_: Event) -> None:
+            """Stop all the managers when Home Assistant stops."""
+            for bus_manager in domain_data.pop(CONF_BUS_MANAGERS, {}).values():
+                bus_manager.async_shutdown()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_shutdown)
+
+    bus_managers: dict[int, BusManager] = domain_data[CONF_BUS_MANAGERS]
+    if i2c_bus not in bus_managers:
+        _LOGGER.debug("starting bus manager for bus %d", i2c_bus)
+        bus_managers[i2c_bus] = BusManager(hass, i2c_bus)
+
+    bus_manager: BusManager = bus_managers[i2c_bus]
+    bus_manager.users += 1
+    return bus_manager
+
+
+@callback
+def async_release_bus(hass: HomeAssistant, bus_manager: BusManager) -> None:
+    """Release the manager, stopping it if nothing else is using the bus."""
+    bus_manager.users -= 1
+    if bus_manager.users > 0:
+        return
+
+    bus_managers: dict[int, BusManager] = hass.data.get(DOMAIN, {}).get(
+        CONF_BUS_MANAGERS, {}
+    )
+    if bus_managers.get(bus_manager.i2c_bus) is bus_manager:
+        bus_managers.pop(bus_manager.i2c_bus)
+    bus_manager.async_shutdown()
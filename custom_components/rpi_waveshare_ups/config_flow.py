@@ -3,29 +3,57 @@
 # region #-- imports --#
 import asyncio
 import logging
-from typing import Any
+import time
+from typing import Any, Callable
 
 import smbus2 as smbus
 import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry, ConfigFlow, OptionsFlow
-from homeassistant.const import UnitOfElectricCurrent, UnitOfTime
+from homeassistant.const import (
+    UnitOfElectricCurrent,
+    UnitOfFrequency,
+    UnitOfTime,
+)
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers import selector
 
+from .bus_manager import BusManager, async_acquire_bus, async_release_bus
 from .const import (
+    CONF_ACQUISITION_PROFILE,
+    CONF_BATTERY_CAPACITY,
+    CONF_CAPTURE,
+    CONF_CONVERSION_TRIGGERED,
+    CONF_DEADBANDS,
+    CONF_DISCOVERY_CACHE,
     CONF_FLOW_NAME,
     CONF_HAT_ADDRESS,
     CONF_HAT_BUS,
     CONF_HAT_TYPE,
+    CONF_HISTORY,
+    CONF_LONG_TERM_STATISTICS,
     CONF_MIN_CHARGING,
+    CONF_SAMPLE_RATE,
     CONF_TITLE_PLACEHOLDERS,
     CONF_UPDATE_INTERVAL,
+    CONF_UPDATE_INTERVAL_FAST,
+    DEF_ACQUISITION_PROFILE,
+    DEF_BATTERY_CAPACITY,
+    DEF_CAPTURE,
+    DEF_CONVERSION_TRIGGERED,
     DEF_HAT_TYPE,
+    DEF_HISTORY,
+    DEF_LONG_TERM_STATISTICS,
     DEF_MIN_CHARGING,
+    DEF_SAMPLE_RATE,
     DEF_UPDATE_INTERVAL,
+    DEF_UPDATE_INTERVAL_FAST,
     DOMAIN,
 )
+from .deadband import DEADBANDS_SCHEMA
+from .device_io import ensure_worker_thread
+from .ina219.fingerprint import Fingerprint, fingerprint
+from .ina219.profiles import ACQUISITION_PROFILES
 from .logger import Logger
 
 # endregion
@@ -37,6 +65,63 @@ STEP_INIT: str = "init"
 STEP_SELECT: str = "select"
 STEP_USER: str = "user"
 
+DISCOVERY_BUSES: tuple[int, ...] = (1, 0)
+DISCOVERY_CACHE_TTL: float = 300  # seconds to reuse the results of a scan for
+HAT_TYPE_LABELS: dict[str, str] = {"a": "A/B", "d": "D"}
+INA219_ADDRESSES: range = range(0x40, 0x50)  # set by the A0 and A1 pins
+
+
+def _probe_bus(
+    i2c_bus_no: int, bus_factory: Callable[[int], smbus.SMBus] | None = None
+) -> list[Fingerprint] | None:
+    """Find and fingerprint the devices in the INA219 range on the given bus.
+
+    This blocks so must be submitted to the device I/O worker for the bus.
+    Each address is probed with a receive byte, which only reads from the
+    current register pointer, falling back to a quick write if the adapter
+    does not support it. Nothing is ever written to a device register.
+
+    :param i2c_bus_no: the number of the bus to scan
+    :param bus_factory: opens the bus, defaults to smbus2.SMBus
+    :return: the devices that responded, None if the bus does not exist
+    """
+    ensure_worker_thread()
+    found: list[Fingerprint] = []
+    try:
+        with (bus_factory or smbus.SMBus)(i2c_bus_no) as bus:
+            probe: Callable[[int], Any] = (
+                bus.read_byte
+                if bus.funcs & smbus.I2cFunc.SMBUS_READ_BYTE
+                else bus.write_quick
+            )
+            for device_addr in INA219_ADDRESSES:
+                try:
+                    probe(device_addr)
+                except OSError:
+                    continue
+                found.append(fingerprint(bus, i2c_bus_no, device_addr))
+    except FileNotFoundError:
+        return None
+
+    return found
+
+
+def _candidate_value(candidate: Fingerprint) -> str:
+    """Get the selector value for a discovered device, its bus and address."""
+    return f"{candidate.i2c_bus}::{hex(candidate.address)}"
+
+
+def _candidate_label(candidate: Fingerprint) -> str:
+    """Describe a discovered device for the address selector."""
+    location: str = f"{hex(candidate.address)} on bus {candidate.i2c_bus}"
+    if not candidate.is_ina219:
+        return f"{location} - unknown device"
+
+    label: str = f"{location} - INA219, {candidate.bus_voltage:.2f}V"
+    if candidate.hat_type is not None:
+        label += f" (HAT {HAT_TYPE_LABELS[candidate.hat_type]})"
+    return label
+
 
 async def _async_build_schema_with_user_input(
     step: str,
@@ -65,6 +150,19 @@ async def _async_build_schema_with_user_input(
                         unit_of_measurement=UnitOfTime.SECONDS,
                     )
                 ),
+                vol.Required(
+                    CONF_UPDATE_INTERVAL_FAST,
+                    default=user_input.get(
+                        CONF_UPDATE_INTERVAL_FAST, DEF_UPDATE_INTERVAL_FAST
+                    ),
+                ): selector.NumberSelector(
+                    config=selector.NumberSelectorConfig(
+                        min=2,
+                        mode=selector.NumberSelectorMode.BOX,
+                        step=1,
+                        unit_of_measurement=UnitOfTime.SECONDS,
+                    )
+                ),
                 vol.Required(
                     CONF_MIN_CHARGING,
                     default=user_input.get(CONF_MIN_CHARGING, DEF_MIN_CHARGING),
@@ -76,10 +174,72 @@ async def _async_build_schema_with_user_input(
                         unit_of_measurement=UnitOfElectricCurrent.MILLIAMPERE,
                     )
                 ),
+                vol.Required(
+                    CONF_CONVERSION_TRIGGERED,
+                    default=user_input.get(
+                        CONF_CONVERSION_TRIGGERED, DEF_CONVERSION_TRIGGERED
+                    ),
+                ): selector.BooleanSelector(),
+                vol.Required(
+                    CONF_BATTERY_CAPACITY,
+                    default=user_input.get(
+                        CONF_BATTERY_CAPACITY, DEF_BATTERY_CAPACITY
+                    ),
+                ): selector.NumberSelector(
+                    config=selector.NumberSelectorConfig(
+                        min=100,
+                        mode=selector.NumberSelectorMode.BOX,
+                        step=1,
+                        unit_of_measurement="mAh",
+                    )
+                ),
+                vol.Required(
+                    CONF_SAMPLE_RATE,
+                    default=user_input.get(CONF_SAMPLE_RATE, DEF_SAMPLE_RATE),
+                ): selector.NumberSelector(
+                    config=selector.NumberSelectorConfig(
+                        max=100,
+                        min=0,
+                        mode=selector.NumberSelectorMode.BOX,
+                        step=1,
+                        unit_of_measurement=UnitOfFrequency.HERTZ,
+                    )
+                ),
+                vol.Optional(
+                    CONF_DEADBANDS,
+                    default=user_input.get(CONF_DEADBANDS, {}),
+                ): selector.ObjectSelector(),
+                vol.Required(
+                    CONF_ACQUISITION_PROFILE,
+                    default=user_input.get(
+                        CONF_ACQUISITION_PROFILE, DEF_ACQUISITION_PROFILE
+                    ),
+                ): selector.SelectSelector(
+                    config=selector.SelectSelectorConfig(
+                        mode=selector.SelectSelectorMode.DROPDOWN,
+                        multiple=False,
+                        options=list(ACQUISITION_PROFILES),
+                        translation_key="acquisition_profile",
+                    )
+                ),
+                vol.Required(
+                    CONF_HISTORY,
+                    default=user_input.get(CONF_HISTORY, DEF_HISTORY),
+                ): selector.BooleanSelector(),
+                vol.Required(
+                    CONF_LONG_TERM_STATISTICS,
+                    default=user_input.get(
+                        CONF_LONG_TERM_STATISTICS, DEF_LONG_TERM_STATISTICS
+                    ),
+                ): selector.BooleanSelector(),
+                vol.Required(
+                    CONF_CAPTURE,
+                    default=user_input.get(CONF_CAPTURE, DEF_CAPTURE),
+                ): selector.BooleanSelector(),
             }
         )
     elif step == STEP_SELECT:
-        addresses: list[str] = list(map(hex, kwargs.get("addresses", [])))
+        candidates: list[Fingerprint] = kwargs.get("candidates", [])
         schema = vol.Schema(
             {
                 vol.Required(
@@ -90,17 +250,27 @@ async def _async_build_schema_with_user_input(
                 ): selector.TextSelector(),
                 vol.Required(
                     CONF_HAT_ADDRESS,
-                    default=user_input.get(CONF_HAT_ADDRESS, addresses[0]),
+                    default=user_input.get(
+                        CONF_HAT_ADDRESS, _candidate_value(candidates[0])
+                    ),
                 ): selector.SelectSelector(
                     config=selector.SelectSelectorConfig(
                         mode=selector.SelectSelectorMode.DROPDOWN,
                         multiple=False,
-                        options=addresses,
+                        options=[
+                            selector.SelectOptionDict(
+                                value=_candidate_value(candidate),
+                                label=_candidate_label(candidate),
+                            )
+                            for candidate in candidates
+                        ],
                     )
                 ),
                 vol.Required(
                     CONF_HAT_TYPE,
-                    default=user_input.get(CONF_HAT_TYPE, DEF_HAT_TYPE),
+                    default=user_input.get(
+                        CONF_HAT_TYPE, candidates[0].hat_type or DEF_HAT_TYPE
+                    ),
                 ): selector.SelectSelector(
                     config=selector.SelectSelectorConfig(
                         mode=selector.SelectSelectorMode.DROPDOWN,
@@ -138,45 +308,79 @@ class RpiWaveshareUpsConfigFlow(ConfigFlow, domain=DOMAIN):
 
     def __init__(self) -> None:
         """Initialise."""
-        self._addresses: dict[str, int] = {}
+        self._candidates: list[Fingerprint] = []
         self._data: dict = {}
         self._errors: dict[str, str] = {}
-        self._logger: Logger = Logger()
+        self._logger: Logger = Logger(_LOGGER)
         self._no_buses: bool = False
         self._options: dict = {}
 
-    def _detect_i2c_addresses(self) -> None:
-        """Detect which addresses are available on i2c."""
-        _LOGGER.debug(self._logger.format("entered"))
+    async def _async_detect(self) -> None:
+        """Detect the devices attached to i2c.
 
-        i2c_buses: list[int] = [1, 0]
-        errors_buses: int = 0
-        for i2c_bus_no in i2c_buses:
-            try:
-                with smbus.SMBus(bus=i2c_bus_no) as bus:
-                    for device_addr in range(3, 128):
-                        try:
-                            bus.write_byte(device_addr, 0)
-                            self._addresses[device_addr] = i2c_bus_no
-                        except OSError:
-                            pass
-            except FileNotFoundError:
-                errors_buses += 1
+        The buses are scanned in parallel, each on its own device I/O worker,
+        and the results are cached for a while so that the flow can be opened
+        again without another scan.
+        """
+        self._logger.debug("entered")
 
-        if errors_buses == len(i2c_buses):
-            self._no_buses = True
+        async def _async_probe(i2c_bus_no: int) -> list[Fingerprint] | None:
+            """Probe a bus on its device I/O worker."""
+            bus_manager: BusManager = async_acquire_bus(self.hass, i2c_bus_no)
+            try:
+                return await bus_manager.device_io.async_run(_probe_bus, i2c_bus_no)
+            finally:
+                async_release_bus(self.hass, bus_manager)
 
-        _LOGGER.debug(self._logger.format("exited"))
+        results: list[list[Fingerprint] | None] = await asyncio.gather(
+            *(_async_probe(i2c_bus_no) for i2c_bus_no in DISCOVERY_BUSES)
+        )
+        self._no_buses = all(found is None for found in results)
+        self._set_candidates(
+            [candidate for found in results for candidate in found or []]
+        )
+        self.hass.data.setdefault(DOMAIN, {})[CONF_DISCOVERY_CACHE] = (
+            time.monotonic(),
+            self._candidates,
+            self._no_buses,
+        )
+        self._logger.debug("exited, found: %s", self._candidates)
 
     async def _async_task_detect(self) -> None:
-        """Detect the devices attached to i2c."""
-        _LOGGER.debug(self._logger.format("entered"))
-        self._detect_i2c_addresses()
-        await asyncio.sleep(0.5)
+        """Run the detection and move the flow on when it has finished."""
+        await self._async_detect()
         self.hass.async_create_task(
             self.hass.config_entries.flow.async_configure(flow_id=self.flow_id)
         )
-        _LOGGER.debug(self._logger.format("exited"))
+
+    def _load_cached_detection(self) -> bool:
+        """Use the results of a recent scan if there are any.
+
+        :return: True if the cached results were used
+        """
+        cached: tuple[float, list[Fingerprint], bool] | None = self.hass.data.get(
+            DOMAIN, {}
+        ).get(CONF_DISCOVERY_CACHE)
+        if cached is None or time.monotonic() - cached[0] > DISCOVERY_CACHE_TTL:
+            return False
+
+        _, candidates, self._no_buses = cached
+        self._set_candidates(candidates)
+        return True
+
+    def _set_candidates(self, candidates: list[Fingerprint]) -> None:
+        """Rank the discovered devices, most likely to be a HAT first.
+
+        Devices are keyed by their bus and address, so HATs at the same
+        address on different buses can each be picked.
+        """
+        by_location: dict[tuple[int, int], Fingerprint] = {
+            (candidate.i2c_bus, candidate.address): candidate
+            for candidate in candidates
+        }
+        self._candidates = sorted(
+            by_location.values(), key=lambda c: (-c.score, c.address, c.i2c_bus)
+        )
 
     @staticmethod
     @callback
@@ -188,14 +392,18 @@ class RpiWaveshareUpsConfigFlow(ConfigFlow, domain=DOMAIN):
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Handle final step."""
-        _LOGGER.debug(self._logger.format("entered, user_input: %s"), user_input)
+        self._logger.debug("entered, user_input: %s", user_input)
 
         self.context[CONF_TITLE_PLACEHOLDERS] = {  # set the name of the flow
             CONF_FLOW_NAME: self._options.pop(CONF_FLOW_NAME)
         }
-        self._options[CONF_HAT_BUS] = self._addresses.get(
-            int(self._options.get(CONF_HAT_ADDRESS), 0)
+        i2c_bus, address = self._options[CONF_HAT_ADDRESS].split("::")
+        self._options[CONF_HAT_BUS] = int(i2c_bus)
+        self._options[CONF_HAT_ADDRESS] = address
+        await self.async_set_unique_id(
+            f"{self._options[CONF_HAT_BUS]}::{self._options[CONF_HAT_ADDRESS]}"
         )
+        self._abort_if_unique_id_configured()
 
         return self.async_create_entry(
             title=self.context.get(CONF_TITLE_PLACEHOLDERS, {}).get(CONF_FLOW_NAME),
@@ -207,21 +415,21 @@ class RpiWaveshareUpsConfigFlow(ConfigFlow, domain=DOMAIN):
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Handle device selection."""
-        _LOGGER.debug(self._logger.format("entered, user_input: %s"), user_input)
+        self._logger.debug("entered, user_input: %s", user_input)
 
         if user_input is not None:
             self._options.update(user_input)
             return await self.async_step_final()
 
         if self._no_buses:
-            _LOGGER.debug(self._logger.format("i2c doesn't seem to be enabled"))
+            self._logger.debug("i2c doesn't seem to be enabled")
             return self.async_abort(
                 reason="no_comms",
                 description_placeholders={"error_msg": " Check if I2C is enabled."},
             )
 
-        if len(self._addresses) == 0:
-            _LOGGER.debug(self._logger.format("no i2c devices found"))
+        if len(self._candidates) == 0:
+            self._logger.debug("no i2c devices found")
             return self.async_abort(
                 reason="no_comms",
                 description_placeholders={"error_msg": ""},
@@ -230,7 +438,7 @@ class RpiWaveshareUpsConfigFlow(ConfigFlow, domain=DOMAIN):
         return self.async_show_form(
             step_id=STEP_SELECT,
             data_schema=await _async_build_schema_with_user_input(
-                STEP_SELECT, self._options, addresses=self._addresses
+                STEP_SELECT, self._options, candidates=self._candidates
             ),
             errors=self._errors,
             last_step=True,
@@ -240,16 +448,14 @@ class RpiWaveshareUpsConfigFlow(ConfigFlow, domain=DOMAIN):
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Handle a flow initiated by the user."""
-        _LOGGER.debug(self._logger.format("entered, user_input: %s"), user_input)
+        self._logger.debug("entered, user_input: %s", user_input)
 
-        existing_entries: list[ConfigEntry] = self.hass.config_entries.async_entries(
-            domain=DOMAIN
-        )
-        if len(existing_entries) > 0:
-            return self.async_abort(reason="already_configured")
+        if not self.task_detect and self._load_cached_detection():
+            self._logger.debug("using cached detection results")
+            return await self.async_step_select()
 
         if not self.task_detect:
-            _LOGGER.debug(self._logger.format("creating detection task"))
+            self._logger.debug("creating detection task")
             self.task_detect = self.hass.async_create_task(
                 target=self._async_task_detect()
             )
@@ -257,9 +463,9 @@ class RpiWaveshareUpsConfigFlow(ConfigFlow, domain=DOMAIN):
                 step_id="user", progress_action="task_detect"
             )
 
-        _LOGGER.debug(self._logger.format("running detection task"))
+        self._logger.debug("running detection task")
         await self.task_detect
-        _LOGGER.debug(self._logger.format("returned from detection task"))
+        self._logger.debug("returned from detection task")
 
         return self.async_show_progress_done(next_step_id=STEP_SELECT)
 
@@ -278,8 +484,17 @@ class RpiWaveshareUpsConfigFlowOptions(OptionsFlow):
     ) -> FlowResult:
         """First step in the options flow."""
         if user_input is not None:
+            self._errors = {}
             self._options.update(user_input)
-            return self.async_create_entry(title="", data=self._options)
+            try:
+                self._options[CONF_DEADBANDS] = DEADBANDS_SCHEMA(
+                    self._options.get(CONF_DEADBANDS) or {}
+                )
+            except vol.Invalid as err:
+                _LOGGER.debug("invalid deadbands: %s", err)
+                self._errors[CONF_DEADBANDS] = "invalid_deadbands"
+            else:
+                return self.async_create_entry(title="", data=self._options)
 
         return self.async_show_form(
             step_id=STEP_INIT,
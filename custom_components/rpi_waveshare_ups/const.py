@@ -6,19 +6,62 @@ from homeassistant.const import Platform
 # endregion
 
 
+ATTR_BINS: str = "bins"
+ATTR_DEVICE_ID: str = "device_id"
+ATTR_DURATION: str = "duration"
+ATTR_END: str = "end"
+ATTR_PERCENTILES: str = "percentiles"
+ATTR_POWER_STATE: str = "power_state"
+ATTR_SERIES: str = "series"
+ATTR_START: str = "start"
+
+CONF_ACQUISITION_PROFILE: str = "acquisition_profile"
+CONF_BATTERY_CAPACITY: str = "battery_capacity"
+CONF_BUS_MANAGER: str = "bus_manager"
+CONF_BUS_MANAGERS: str = "bus_managers"
+CONF_CAPTURE: str = "capture"
+CONF_CAPTURE_WRITER: str = "capture_writer"
+CONF_CONVERSION_TRIGGERED: str = "conversion_triggered"
 CONF_COORDINATOR: str = "coordinator"
+CONF_DEADBANDS: str = "deadbands"
+CONF_DISCOVERY_CACHE: str = "discovery_cache"
+CONF_ENERGY_STORE: str = "energy_store"
 CONF_FLOW_NAME: str = "name"
 CONF_HAT_ADDRESS: str = "hat_address"
 CONF_HAT_BUS: str = "hat_bus"
 CONF_HAT_TYPE: str = "hat_type"
+CONF_HISTORY: str = "history"
+CONF_LONG_TERM_STATISTICS: str = "long_term_statistics"
 CONF_MIN_CHARGING: str = "min_charging"
+CONF_SAMPLE_RATE: str = "sample_rate"
+CONF_SAMPLER: str = "sampler"
+CONF_STATISTICS_CACHE: str = "statistics_cache"
 CONF_TITLE_PLACEHOLDERS: str = "title_placeholders"
+CONF_UNSUBSCRIBE: str = "unsubscribe"
 CONF_UPDATE_INTERVAL: str = "update_interval"
+CONF_UPDATE_INTERVAL_FAST: str = "update_interval_fast"
+CONF_UPS: str = "ups"
 
+DEF_ACQUISITION_PROFILE: str = "balanced"
+DEF_BINS: int = 10
+DEF_BATTERY_CAPACITY: int = 2600
+DEF_CAPTURE: bool = False
+DEF_CONVERSION_TRIGGERED: bool = False
 DEF_HAT_TYPE: str = "a"
+DEF_HISTORY: bool = False
+DEF_LONG_TERM_STATISTICS: bool = False
 DEF_MIN_CHARGING: float = -100
+DEF_PERCENTILES: list[float] = [5, 50, 95]
+DEF_SAMPLE_BUFFER_SECONDS: int = 300
+DEF_SAMPLE_RATE: int = 0
 DEF_UPDATE_INTERVAL: int = 10
+DEF_UPDATE_INTERVAL_FAST: int = 2
 
 DOMAIN: str = "rpi_waveshare_ups"
 
 PLATFORMS: list[str] = [Platform.BINARY_SENSOR, Platform.SENSOR]
+
+SERVICE_GET_STATISTICS: str = "get_statistics"
+
+STORAGE_SAVE_DELAY: int = 60
+STORAGE_VERSION: int = 1
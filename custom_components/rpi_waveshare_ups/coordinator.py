@@ -0,0 +1,207 @@
+"""Data update coordinator for the UPS."""
+
+# region #-- imports --#
+import dataclasses
+import logging
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Iterable
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .const import DOMAIN, STORAGE_SAVE_DELAY
+from .device_io import DeviceIO
+from .ina219.ina219 import DATA_REGISTERS, Registers
+from .reading import Reading
+from .sampler import IntervalStats, Sampler
+from .stats import DeviceStats
+
+if TYPE_CHECKING:
+    from . import UPS
+
+# endregion
+
+_LOGGER = logging.getLogger(__name__)
+
+ADAPTIVE_BACKOFF_POLLS: int = 5  # polls full on mains before slowing down again
+FULL_BATTERY_PERCENTAGE: float = 99
+FULL_CHARGE_CURRENT: float = 50  # mA, charging below this counts as full
+PSU_VOLTAGE_DROP: float = 0.2  # V drop between polls treated as losing mains
+
+# always read, the state of charge, runtime and power state depend on them
+BASE_REGISTERS: frozenset[Registers] = frozenset(
+    (Registers.BUSVOLTAGE, Registers.CURRENT)
+)
+
+
+class UPSDataUpdateCoordinator(DataUpdateCoordinator):
+    """Poll the UPS, adapting the interval to the power state.
+
+    Polling is slow whilst the Pi is on mains with the battery full and
+    switches to fast as soon as the battery starts discharging, or charging,
+    or the PSU voltage drops. It only slows down again once the battery has
+    been seen full on mains for several polls in a row.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        ups: "UPS",
+        name: str,
+        device_io: DeviceIO,
+        energy_store: Store,
+        sampler: Sampler | None,
+        update_interval: float,
+        update_interval_fast: float,
+    ) -> None:
+        """Initialise.
+
+        Polls are scheduled by the bus manager, rather than by the coordinator
+        itself, using next_poll and poll_interval.
+
+        :param name: the title of the config entry
+        :param update_interval: seconds between polls whilst on mains
+        :param update_interval_fast: seconds between polls whilst on battery
+        """
+        super().__init__(hass, _LOGGER, name=f"{DOMAIN} ({name})")
+        self._backoff_polls: int = 0
+        self._consumers: Counter[Registers] | None = None
+        self._device_io: DeviceIO = device_io
+        self._energy_store: Store = energy_store
+        self._fast: bool = False
+        self._last_psu_voltage: float | None = None
+        self._sampler: Sampler | None = sampler
+        self._update_interval_fast: float = min(update_interval_fast, update_interval)
+        self._update_interval_slow: float = update_interval
+        self._ups: UPS = ups
+        self.next_poll: float = time.monotonic() + update_interval
+        self.poll_interval: float = update_interval
+        self.state_writes: Counter[str] = Counter()
+        self.suppressed_writes: Counter[str] = Counter()
+
+        if sampler is not None:
+            sampler.on_power_state_change = self._power_state_changed
+
+    def _adapt_interval(self, reading: Reading) -> None:
+        """Choose the update interval from the power state."""
+        psu_voltage: float = (
+            reading.psu_voltage
+            if reading.psu_voltage is not None
+            else reading.load_voltage
+        )
+        dropped: bool = (
+            self._last_psu_voltage is not None
+            and psu_voltage < self._last_psu_voltage - PSU_VOLTAGE_DROP
+        )
+        self._last_psu_voltage = psu_voltage
+
+        full: bool = reading.current < FULL_CHARGE_CURRENT or (
+            reading.battery_percentage is not None
+            and reading.battery_percentage >= FULL_BATTERY_PERCENTAGE
+        )
+        if dropped or not reading.is_charging or not full:
+            self._backoff_polls = ADAPTIVE_BACKOFF_POLLS
+        elif self._backoff_polls:
+            self._backoff_polls -= 1
+
+        if (fast := self._backoff_polls > 0) != self._fast:
+            self._fast = fast
+            self.poll_interval = (
+                self._update_interval_fast if fast else self._update_interval_slow
+            )
+            _LOGGER.debug("update interval changed to %ss", self.poll_interval)
+
+    @callback
+    def _async_update_read_plan(self) -> None:
+        """Only read the registers that something uses."""
+        registers: set[Registers] = set(BASE_REGISTERS)
+        registers.update(+self._consumers)
+        read_plan: tuple[int, ...] = tuple(
+            register for register in DATA_REGISTERS if Registers(register) in registers
+        )
+        if read_plan != self._ups.read_plan:
+            _LOGGER.debug(
+                "read plan changed to %s", [Registers(r).name for r in read_plan]
+            )
+            self._ups.read_plan = read_plan
+
+    @property
+    def stats(self) -> DeviceStats:
+        """Get the timings and error counts for the device."""
+        return self._ups.stats
+
+    @callback
+    def async_add_consumer(self, registers: Iterable[Registers]) -> CALLBACK_TYPE:
+        """Register the registers that an entity needs.
+
+        Until the first consumer is added every register is read, after that
+        only those needed by the consumers, and the polling itself, are.
+
+        :return: a function that removes the consumer
+        """
+        registers = tuple(registers)
+        if self._consumers is None:
+            self._consumers = Counter()
+        self._consumers.update(registers)
+        self._async_update_read_plan()
+
+        @callback
+        def _async_remove() -> None:
+            """Remove the consumer."""
+            self._consumers.subtract(registers)
+            self._async_update_read_plan()
+
+        return _async_remove
+
+    @callback
+    def _async_power_state_changed(self) -> None:
+        """Refresh straight away if polling slowly."""
+        if not self._fast:
+            self.hass.async_create_task(self.async_request_refresh())
+
+    def _power_state_changed(self) -> None:
+        """Handle the sampler seeing the battery start or stop charging.
+
+        This is called from the device I/O worker.
+        """
+        self.hass.loop.call_soon_threadsafe(self._async_power_state_changed)
+
+    async def _async_update_data(self) -> Reading:
+        """Get the latest reading from the UPS.
+
+        If the sampler is running the aggregates of the samples since the last
+        poll are added to the reading.
+        """
+        self._energy_store.async_delay_save(
+            self._ups.energy.as_dict, STORAGE_SAVE_DELAY
+        )
+        submitted: float = time.monotonic()
+
+        def _gather_details() -> Reading:
+            """Take the reading, recording how long the poll was queued."""
+            self._ups.stats.queued.add((time.monotonic() - submitted) * 1000)
+            return self._ups.gather_details()
+
+        try:
+            reading: Reading = await self._device_io.async_run(_gather_details)
+            self._ups.stats.poll.add((time.monotonic() - submitted) * 1000)
+            _LOGGER.debug("poll used %d bus transaction(s)", reading.transactions)
+        except OSError as err:
+            self._ups.stats.increment("poll_failures")
+            raise UpdateFailed(f"Unable to communicate with the UPS: {err}") from err
+
+        if self._sampler is not None:
+            interval_stats: dict[str, IntervalStats] | None = self._sampler.collect()
+            if interval_stats is not None:
+                reading = dataclasses.replace(reading, interval_stats=interval_stats)
+
+        self._adapt_interval(reading)
+        self.next_poll = time.monotonic() + self.poll_interval
+        _LOGGER.debug(
+            "state writes: %d, suppressed: %d",
+            self.state_writes.total(),
+            self.suppressed_writes.total(),
+        )
+        return reading
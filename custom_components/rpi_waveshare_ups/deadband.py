@@ -0,0 +1,84 @@
+"""Change suppression for entity states."""
+
+# region #-- imports --#
+import dataclasses
+import logging
+from dataclasses import dataclass
+from typing import Any
+
+import voluptuous as vol
+
+# endregion
+
+_LOGGER = logging.getLogger(__name__)
+
+DEF_MAX_SILENCE: float = 300  # seconds
+
+# the translation keys of the entities that have a deadband
+ENTITY_KEYS: tuple[str, ...] = (
+    "battery_percentage",
+    "battery_state",
+    "bus_errors",
+    "bus_queue_time",
+    "bus_reconnects",
+    "bus_retries",
+    "bus_transactions",
+    "charge_in_mah",
+    "charge_out_mah",
+    "current",
+    "energy_in_wh",
+    "energy_out_wh",
+    "load_voltage",
+    "poll_duration",
+    "power",
+    "psu_voltage",
+    "shunt_voltage",
+    "time_to_empty",
+    "time_to_full",
+)
+
+OVERRIDES_SCHEMA: vol.Schema = vol.Schema(
+    {
+        vol.Optional("absolute"): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional("max_silence"): vol.Any(
+            None, vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False))
+        ),
+        vol.Optional("relative"): vol.All(vol.Coerce(float), vol.Range(min=0)),
+    }
+)
+DEADBANDS_SCHEMA: vol.Schema = vol.Schema({vol.In(ENTITY_KEYS): OVERRIDES_SCHEMA})
+
+
+@dataclass(frozen=True)
+class Deadband:
+    """How far a value has to move before the state is written.
+
+    The state is written if the value moves by more than the absolute amount
+    and by more than the relative fraction of the last written value, or if
+    nothing has been written for max_silence seconds.
+    """
+
+    absolute: float = 0
+    max_silence: float | None = DEF_MAX_SILENCE
+    relative: float = 0
+
+    def moved(self, old: Any, new: Any) -> bool:
+        """Check if the value has moved past the deadband."""
+        if not isinstance(old, (int, float)) or not isinstance(new, (int, float)):
+            return old != new
+
+        return abs(new - old) > max(self.absolute, abs(old) * self.relative)
+
+    def with_overrides(self, overrides: dict[str, Any] | None) -> "Deadband":
+        """Get a copy with the configured overrides applied.
+
+        Overrides that aren't valid are ignored, leaving the defaults.
+        """
+        if not overrides:
+            return self
+
+        try:
+            return dataclasses.replace(self, **OVERRIDES_SCHEMA(overrides))
+        except vol.Invalid as err:
+            _LOGGER.warning("ignoring the deadband overrides %s: %s", overrides, err)
+            return self
@@ -0,0 +1,176 @@
+"""Serialised device I/O off the event loop."""
+
+# region #-- imports --#
+import asyncio
+import concurrent.futures
+import contextlib
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable
+
+from .const import DOMAIN
+
+# endregion
+
+_LOGGER = logging.getLogger(__name__)
+
+_WORKER_STATE = threading.local()
+
+
+def ensure_worker_thread() -> None:
+    """Ensure that the caller is running on a device I/O worker.
+
+    Driver calls block on ioctls so must never be made from the event loop.
+
+    :raises RuntimeError: when called from anywhere other than a worker
+    """
+    if getattr(_WORKER_STATE, "i2c_bus", None) is None:
+        raise RuntimeError("Device I/O must be submitted to the device I/O worker")
+
+
+class DeviceIOShutdown(RuntimeError):
+    """The worker has been asked to stop so can't take any more jobs."""
+
+
+class _PeriodicTask:
+    """A function run on the worker at a fixed interval."""
+
+    __slots__ = ("due", "func", "interval")
+
+    def __init__(self, interval: float, func: Callable[[], None]) -> None:
+        """Initialise."""
+        self.due: float = time.monotonic()
+        self.func: Callable[[], None] = func
+        self.interval: float = interval
+
+
+class DeviceIO:
+    """A single worker thread that serialises all transactions for a bus."""
+
+    def __init__(self, i2c_bus: int) -> None:
+        """Initialise."""
+        self._i2c_bus: int = i2c_bus
+        self._lock: threading.Lock = threading.Lock()
+        self._periodic: list[_PeriodicTask] = []
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._shutdown: bool = False
+        self._thread: threading.Thread = threading.Thread(
+            daemon=True,
+            name=f"{DOMAIN}_i2c-{i2c_bus}",
+            target=self._run,
+        )
+        self.jobs_completed: int = 0
+        self.jobs_failed: int = 0
+        self._thread.start()
+
+    def _run(self) -> None:
+        """Process the submitted jobs in order, between any periodic tasks."""
+        _WORKER_STATE.i2c_bus = self._i2c_bus
+        while True:
+            timeout: float | None = None
+            if self._periodic:
+                timeout = max(
+                    0, min(task.due for task in self._periodic) - time.monotonic()
+                )
+            try:
+                job = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                job = ()
+            if job is None:
+                break
+            if job:
+                self._run_job(*job)
+            self._run_periodic()
+
+    def _run_job(
+        self,
+        future: concurrent.futures.Future,
+        func: Callable[..., Any],
+        args: tuple,
+    ) -> None:
+        """Run a submitted job and set its result."""
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = func(*args)
+        except BaseException as err:  # pylint: disable=broad-except
+            self.jobs_failed += 1
+            future.set_exception(err)
+        else:
+            self.jobs_completed += 1
+            future.set_result(result)
+
+    def _run_periodic(self) -> None:
+        """Run the periodic tasks that are due."""
+        now: float = time.monotonic()
+        for task in self._periodic:
+            if task.due > now:
+                continue
+            try:
+                task.func()
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("periodic task failed on bus %d", self._i2c_bus)
+            task.due += task.interval
+            if task.due < now:  # overran so don't try to catch up
+                task.due = now + task.interval
+
+    def _submit(
+        self, func: Callable[..., Any], *args: Any
+    ) -> concurrent.futures.Future:
+        """Queue the function to be run on the worker.
+
+        :raises DeviceIOShutdown: if the worker has been asked to stop
+        """
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        with self._lock:
+            if self._shutdown:
+                raise DeviceIOShutdown(
+                    f"The device I/O worker for bus {self._i2c_bus} has stopped"
+                )
+            self._queue.put((future, func, args))
+        return future
+
+    def add_periodic(
+        self, interval: float, func: Callable[[], None]
+    ) -> Callable[[], None]:
+        """Run the function on the worker every interval seconds.
+
+        :param interval: seconds between each run
+        :param func: the function to run
+        :return: a function that stops the periodic task
+        """
+        task: _PeriodicTask = _PeriodicTask(interval, func)
+        self._submit(self._periodic.append, task)
+
+        def _remove() -> None:
+            """Stop the periodic task."""
+            with contextlib.suppress(DeviceIOShutdown):  # it won't run again
+                self._submit(self._periodic.remove, task)
+
+        return _remove
+
+    @property
+    def i2c_bus(self) -> int:
+        """Get the bus number this worker is for."""
+        return self._i2c_bus
+
+    async def async_run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run the given function on the worker and wait for the result.
+
+        :raises DeviceIOShutdown: if the worker has been asked to stop
+        """
+        return await asyncio.wrap_future(self._submit(func, *args))
+
+    def shutdown(self) -> None:
+        """Stop the worker once the queued jobs have completed.
+
+        Anything submitted after this raises DeviceIOShutdown, rather than
+        waiting forever on a worker that has gone.
+        """
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            self._queue.put(None)
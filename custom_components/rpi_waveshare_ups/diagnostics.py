@@ -0,0 +1,86 @@
+"""Diagnostics support."""
+
+# region #-- imports --#
+import dataclasses
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from . import UPS
+from .bus_manager import BusManager
+from .const import (
+    CONF_BUS_MANAGER,
+    CONF_CAPTURE_WRITER,
+    CONF_COORDINATOR,
+    CONF_HISTORY,
+    CONF_LONG_TERM_STATISTICS,
+    CONF_SAMPLER,
+    CONF_UPS,
+    DOMAIN,
+)
+from .coordinator import UPSDataUpdateCoordinator
+from .history import History
+from .ina219.capture import CaptureWriter
+from .ina219.ina219 import Registers
+from .long_term import LongTermStatistics
+from .reading import Reading
+from .sampler import Sampler
+
+# endregion
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, config_entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the diagnostics for the config entry."""
+    entry_data: dict[str, Any] = hass.data[DOMAIN][config_entry.entry_id]
+    bus_manager: BusManager = entry_data[CONF_BUS_MANAGER]
+    capture_writer: CaptureWriter | None = entry_data.get(CONF_CAPTURE_WRITER)
+    coordinator: UPSDataUpdateCoordinator = entry_data[CONF_COORDINATOR]
+    history: History | None = entry_data.get(CONF_HISTORY)
+    long_term: LongTermStatistics | None = entry_data.get(CONF_LONG_TERM_STATISTICS)
+    sampler: Sampler | None = entry_data.get(CONF_SAMPLER)
+    ups: UPS = entry_data[CONF_UPS]
+    reading: Reading | None = coordinator.data
+
+    return {
+        "options": dict(config_entry.options),
+        "capture": (
+            {
+                "full": capture_writer.full,
+                "path": str(capture_writer.path),
+                "records": capture_writer.records,
+            }
+            if capture_writer is not None
+            else None
+        ),
+        "device_io": {
+            "jobs_completed": bus_manager.device_io.jobs_completed,
+            "jobs_failed": bus_manager.device_io.jobs_failed,
+            "users": bus_manager.users,
+        },
+        "history": (
+            {"errors": history.errors, "tiers": history.summary()}
+            if history is not None
+            else None
+        ),
+        "long_term_statistics_imported": (
+            long_term.imported if long_term is not None else None
+        ),
+        "poll_interval": coordinator.poll_interval,
+        "read_plan": [Registers(register).name for register in ups.read_plan],
+        "reading": (
+            {
+                field.name: getattr(reading, field.name)
+                for field in dataclasses.fields(reading)
+                if field.name != "interval_stats"
+            }
+            if reading is not None
+            else None
+        ),
+        "sampler_errors": sampler.errors if sampler is not None else None,
+        "state_writes": dict(coordinator.state_writes),
+        "stats": ups.stats.as_dict(),
+        "suppressed_writes": dict(coordinator.suppressed_writes),
+    }
@@ -0,0 +1,95 @@
+"""Coulomb counting and energy accumulation."""
+
+# region #-- imports --#
+import threading
+from typing import Any
+
+# endregion
+
+MAX_INTEGRATION_GAP: float = 300  # seconds, longer gaps between samples are not integrated
+SECONDS_PER_HOUR: int = 3600
+
+TOTALS: tuple[str, ...] = (
+    "charge_in_mah",
+    "charge_out_mah",
+    "energy_in_wh",
+    "energy_out_wh",
+)
+
+
+class EnergyIntegrator:
+    """Accumulate the charge and energy into and out of the battery.
+
+    Samples are integrated using the trapezoidal rule over their monotonic
+    timestamps. A positive current is charging the battery and a negative
+    one discharging it. When the current changes direction between samples
+    the interval is split at the zero crossing so each direction only gets
+    its own share.
+    """
+
+    def __init__(self) -> None:
+        """Initialise."""
+        self._last: tuple[float, float, float] | None = None
+        self._lock: threading.Lock = threading.Lock()
+        self.charge_in_mah: float = 0
+        self.charge_out_mah: float = 0
+        self.energy_in_wh: float = 0
+        self.energy_out_wh: float = 0
+
+    def _accumulate(self, current_area: float, power_area: float) -> None:
+        """Add the areas, in mAs and Ws, to the totals for their direction."""
+        if current_area >= 0:
+            self.charge_in_mah += current_area / SECONDS_PER_HOUR
+            self.energy_in_wh += power_area / SECONDS_PER_HOUR
+        else:
+            self.charge_out_mah -= current_area / SECONDS_PER_HOUR
+            self.energy_out_wh += power_area / SECONDS_PER_HOUR
+
+    def add(self, timestamp: float, current_ma: float, power_w: float) -> None:
+        """Integrate a sample.
+
+        :param timestamp: monotonic time the sample was taken
+        :param current_ma: the current in mA, positive when charging
+        :param power_w: the power in W
+        """
+        with self._lock:
+            last: tuple[float, float, float] | None = self._last
+            self._last = (timestamp, current_ma, power_w)
+            if last is None:
+                return
+
+            last_timestamp, last_current_ma, last_power_w = last
+            elapsed: float = timestamp - last_timestamp
+            if not 0 < elapsed <= MAX_INTEGRATION_GAP:
+                return
+
+            if last_current_ma * current_ma >= 0:
+                self._accumulate(
+                    (last_current_ma + current_ma) / 2 * elapsed,
+                    (last_power_w + power_w) / 2 * elapsed,
+                )
+            else:  # split at the zero crossing where the power is also 0
+                crossing: float = (
+                    elapsed * last_current_ma / (last_current_ma - current_ma)
+                )
+                self._accumulate(
+                    last_current_ma / 2 * crossing, last_power_w / 2 * crossing
+                )
+                self._accumulate(
+                    current_ma / 2 * (elapsed - crossing),
+                    power_w / 2 * (elapsed - crossing),
+                )
+
+    def as_dict(self) -> dict[str, float]:
+        """Get the totals for storing."""
+        with self._lock:
+            return {total: getattr(self, total) for total in TOTALS}
+
+    def restore(self, data: dict[str, Any] | None) -> None:
+        """Restore the totals from storage."""
+        if not data:
+            return
+
+        with self._lock:
+            for total in TOTALS:
+                setattr(self, total, float(data.get(total, 0)))
@@ -0,0 +1,470 @@
+"""Tiered on-disk history of the readings.
+
+Each tier is a directory of segment files holding fixed size records in time
+order. A segment is created at its full size, memory mapped and filled from
+the front, with the number of records used kept in its header. The raw tier
+holds every reading. The others hold the min, max and mean of each value
+over a fixed bucket, where the last record is the bucket being filled and is
+rewritten in place until the next bucket starts. Whole segments are deleted
+from the front of a tier once they are older than its retention, or the tier
+is bigger than its budget.
+
+A query only maps in the pages holding the requested range, as segments are
+found from their start times and the records within them by binary search.
+"""
+
+# region #-- imports --#
+import bisect
+import logging
+import math
+import mmap
+import pathlib
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .reading import Reading
+
+# endregion
+
+_LOGGER = logging.getLogger(__name__)
+
+# magic, version, record size, number of records used
+SEGMENT_HEADER: struct.Struct = struct.Struct("<8sHHI")
+SEGMENT_MAGIC: bytes = b"UPSHIST\x00"
+SEGMENT_SUFFIX: str = ".seg"
+SEGMENT_VERSION: int = 1
+
+SERIES: tuple[str, ...] = ("current", "load_voltage", "power")
+AGGREGATES: tuple[str, ...] = ("min", "max", "mean")
+
+# timestamp, then each of the series
+RAW_RECORD: struct.Struct = struct.Struct(f"<d{len(SERIES)}f")
+# start of the bucket, number of readings, then the aggregates for each series
+AGGREGATE_RECORD: struct.Struct = struct.Struct(
+    f"<dI{len(SERIES) * len(AGGREGATES)}f"
+)
+TIMESTAMP: struct.Struct = struct.Struct("<d")
+
+DAY: int = 86400
+
+
+@dataclass(frozen=True)
+class TierConfig:
+    """How a tier of the history is stored."""
+
+    max_bytes: int  # the most disk the tier can use, in whole segments
+    name: str
+    resolution: float  # seconds per bucket, 0 to keep every reading
+    retention: float  # seconds to keep the records for
+    segment_records: int
+
+    @property
+    def fields(self) -> tuple[str, ...]:
+        """Get the names of the fields in each record."""
+        if not self.resolution:
+            return ("timestamp", *SERIES)
+        return (
+            "timestamp",
+            "count",
+            *(f"{name}_{aggregate}" for name in SERIES for aggregate in AGGREGATES),
+        )
+
+    @property
+    def record(self) -> struct.Struct:
+        """Get the format of the records."""
+        return AGGREGATE_RECORD if self.resolution else RAW_RECORD
+
+
+TIERS: tuple[TierConfig, ...] = (
+    TierConfig(
+        max_bytes=64 * 1024 * 1024,
+        name="raw",
+        resolution=0,
+        retention=3 * DAY,
+        segment_records=65536,
+    ),
+    TierConfig(
+        max_bytes=64 * 1024 * 1024,
+        name="1s",
+        resolution=1,
+        retention=14 * DAY,
+        segment_records=16384,
+    ),
+    TierConfig(
+        max_bytes=32 * 1024 * 1024,
+        name="1m",
+        resolution=60,
+        retention=365 * DAY,
+        segment_records=4096,
+    ),
+    TierConfig(
+        max_bytes=8 * 1024 * 1024,
+        name="1h",
+        resolution=3600,
+        retention=10 * 365 * DAY,
+        segment_records=1024,
+    ),
+)
+
+
+class _Timestamps:
+    """The timestamps in a segment as a sequence, for bisecting."""
+
+    __slots__ = ("_segment",)
+
+    def __init__(self, segment: "_Segment") -> None:
+        """Initialise."""
+        self._segment: _Segment = segment
+
+    def __getitem__(self, idx: int) -> float:
+        """Get the timestamp of a record."""
+        return TIMESTAMP.unpack_from(self._segment.map, self._segment.offset(idx))[0]
+
+    def __len__(self) -> int:
+        """Get the number of records."""
+        return self._segment.count
+
+
+class _Segment:
+    """A memory mapped segment file."""
+
+    def __init__(
+        self, path: pathlib.Path, record: struct.Struct, capacity: int
+    ) -> None:
+        """Initialise.
+
+        :param path: named for the time of its first record
+        :param record: the format of the records
+        :param capacity: the number of records when creating the segment
+        """
+        self.path: pathlib.Path = path
+        self.record: struct.Struct = record
+        self.start: float = int(path.stem) / 1000
+
+        if not path.exists():
+            with path.open("wb") as file:
+                file.write(
+                    SEGMENT_HEADER.pack(SEGMENT_MAGIC, SEGMENT_VERSION, record.size, 0)
+                )
+                file.truncate(SEGMENT_HEADER.size + record.size * capacity)
+        with path.open("r+b") as file:
+            self.map: mmap.mmap = mmap.mmap(file.fileno(), 0)
+
+        magic, version, record_size, self.count = SEGMENT_HEADER.unpack_from(self.map)
+        if (
+            magic != SEGMENT_MAGIC
+            or version != SEGMENT_VERSION
+            or record_size != record.size
+        ):
+            self.map.close()
+            raise ValueError(f"{path} is not a version {SEGMENT_VERSION} segment")
+        self.capacity: int = (len(self.map) - SEGMENT_HEADER.size) // record.size
+        self.count = min(self.count, self.capacity)
+
+    @property
+    def full(self) -> bool:
+        """Get whether the segment has room for more records."""
+        return self.count >= self.capacity
+
+    def _set_count(self, count: int) -> None:
+        """Set the number of records used."""
+        self.count = count
+        struct.pack_into("<I", self.map, SEGMENT_HEADER.size - 4, count)
+
+    def append(self, values: tuple[float, ...]) -> None:
+        """Add a record to the end."""
+        self.record.pack_into(self.map, self.offset(self.count), *values)
+        self._set_count(self.count + 1)
+
+    def close(self) -> None:
+        """Write out and unmap the segment."""
+        self.map.flush()
+        self.map.close()
+
+    def last(self) -> tuple[float, ...] | None:
+        """Get the last record."""
+        if not self.count:
+            return None
+        return self.record.unpack_from(self.map, self.offset(self.count - 1))
+
+    def offset(self, idx: int) -> int:
+        """Get the offset of a record."""
+        return SEGMENT_HEADER.size + idx * self.record.size
+
+    def replace_last(self, values: tuple[float, ...]) -> None:
+        """Overwrite the last record."""
+        self.record.pack_into(self.map, self.offset(self.count - 1), *values)
+
+    def span(self, start: float, end: float, resolution: float = 0) -> bytes:
+        """Get the packed records from start up to, but not including, end.
+
+        :param resolution: the length of the bucket each record starts, so
+        that the bucket overlapping the start is included
+        """
+        timestamps: _Timestamps = _Timestamps(self)
+        first: int = (
+            bisect.bisect_right(timestamps, start - resolution)
+            if resolution
+            else bisect.bisect_left(timestamps, start)
+        )
+        last: int = bisect.bisect_left(timestamps, end, lo=first)
+        return self.map[self.offset(first) : self.offset(last)]
+
+
+class _Tier:
+    """The segments making up a tier."""
+
+    def __init__(self, config: TierConfig, directory: pathlib.Path) -> None:
+        """Initialise."""
+        self._directory: pathlib.Path = directory
+        self._last: tuple[float, ...] | None = None
+        self.config: TierConfig = config
+        self.segments: list[_Segment] = []
+
+    def _add_segment(self, timestamp: float) -> _Segment:
+        """Start a new segment with its first record at the timestamp."""
+        segment: _Segment = _Segment(
+            self._directory / f"{math.floor(timestamp * 1000):016d}{SEGMENT_SUFFIX}",
+            self.config.record,
+            self.config.segment_records,
+        )
+        self.segments.append(segment)
+        self._enforce_retention(timestamp)
+        return segment
+
+    def _append(self, values: tuple[float, ...]) -> None:
+        """Add a record to the end of the tier."""
+        segment: _Segment | None = self.segments[-1] if self.segments else None
+        if segment is None or segment.full:
+            segment = self._add_segment(values[0])
+        segment.append(values)
+        self._last = values
+
+    def _enforce_retention(self, now: float) -> None:
+        """Delete the oldest segments that are out of retention or budget."""
+        size: int = sum(len(segment.map) for segment in self.segments)
+        while len(self.segments) > 1 and (
+            size > self.config.max_bytes
+            or self.segments[1].start < now - self.config.retention
+        ):
+            segment: _Segment = self.segments.pop(0)
+            size -= len(segment.map)
+            segment.close()
+            segment.path.unlink(missing_ok=True)
+
+    def add(self, timestamp: float, values: tuple[float, ...]) -> None:
+        """Add a reading.
+
+        Readings older than the last one recorded are dropped, as can happen
+        when the clock is set after boot on a Pi without a real time clock.
+        """
+        if not self.config.resolution:
+            if self._last is None or timestamp >= self._last[0]:
+                self._append((timestamp, *values))
+            return
+
+        bucket: float = (
+            math.floor(timestamp / self.config.resolution) * self.config.resolution
+        )
+        last: tuple[float, ...] | None = self._last
+        if last is not None and bucket < last[0]:
+            return
+        if last is None or bucket > last[0]:
+            self._append(
+                (
+                    bucket,
+                    1,
+                    *(aggregate for value in values for aggregate in (value,) * 3),
+                )
+            )
+            return
+
+        count: int = last[1] + 1
+        merged: list[float] = [bucket, count]
+        for idx, value in enumerate(values):
+            low, high, mean = last[2 + idx * 3 : 5 + idx * 3]
+            merged.extend(
+                (min(low, value), max(high, value), mean + (value - mean) / count)
+            )
+        self._last = tuple(merged)
+        self.segments[-1].replace_last(self._last)
+
+    def close(self) -> None:
+        """Unmap the segments."""
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
+
+    def open(self) -> None:
+        """Map the existing segments, skipping any that can't be read."""
+        self._directory.mkdir(parents=True, exist_ok=True)
+        for path in sorted(self._directory.glob(f"*{SEGMENT_SUFFIX}")):
+            try:
+                segment: _Segment = _Segment(
+                    path, self.config.record, self.config.segment_records
+                )
+            except (OSError, ValueError) as err:
+                _LOGGER.warning("ignoring history segment %s: %s", path, err)
+                continue
+            if segment.count:
+                self.segments.append(segment)
+            else:
+                segment.close()
+                path.unlink(missing_ok=True)
+        self._last = self.segments[-1].last() if self.segments else None
+
+    def query_bytes(self, start: float, end: float) -> bytes:
+        """Get the packed records overlapping start up to, but not including, end.
+
+        For an aggregate tier that includes the bucket the start falls in.
+        """
+        resolution: float = self.config.resolution
+        starts: list[float] = [segment.start for segment in self.segments]
+        return b"".join(
+            segment.span(start, end, resolution)
+            for segment in self.segments[
+                max(0, bisect.bisect_right(starts, start - resolution) - 1) : (
+                    bisect.bisect_left(starts, end)
+                )
+            ]
+        )
+
+    def summary(self) -> dict[str, Any]:
+        """Get the size and extent of the tier for diagnostics."""
+        last: tuple[float, ...] | None = self._last
+        return {
+            "bytes": sum(len(segment.map) for segment in self.segments),
+            "newest": last[0] if last is not None else None,
+            "oldest": self.segments[0].start if self.segments else None,
+            "records": sum(segment.count for segment in self.segments),
+            "segments": len(self.segments),
+        }
+
+
+class History:
+    """High resolution history of the current, load voltage and power.
+
+    Readings are added from the device I/O worker and queried from anywhere,
+    opening, adding and closing touch the disk so must not be done from the
+    event loop. Timestamps are wall clock seconds since the epoch.
+    """
+
+    def __init__(
+        self, path: pathlib.Path, tiers: tuple[TierConfig, ...] = TIERS
+    ) -> None:
+        """Initialise.
+
+        :param path: the directory to keep the tiers in
+        :param tiers: how to store each tier, from the finest to the coarsest
+        """
+        self._lock: threading.Lock = threading.Lock()
+        self._tiers: dict[str, _Tier] = {
+            config.name: _Tier(config, path / config.name) for config in tiers
+        }
+        self.errors: int = 0
+        self.path: pathlib.Path = path
+
+    def _select_tier(self, start: float) -> str:
+        """Get the finest tier holding every reading there is from the start.
+
+        That is one whose first record is no later than the start or, when
+        the history doesn't go back that far, no later than the oldest
+        reading kept in any tier. So a history younger than the window is
+        queried at full resolution, rather than falling back to the coarsest
+        tier, whilst a tier that has deleted the readings in the window isn't
+        used.
+        """
+        firsts: dict[str, float] = {
+            name: tier.segments[0].start
+            for name, tier in self._tiers.items()
+            if tier.segments
+        }
+        if not firsts:
+            return list(self._tiers)[0]
+        # the start of an aggregate is the start of its bucket, which can be
+        # up to its resolution before the oldest reading in it
+        oldest: float = min(
+            first + self._tiers[name].config.resolution
+            for name, first in firsts.items()
+        )
+        return next(
+            name for name, first in firsts.items() if first <= max(start, oldest)
+        )
+
+    def add(self, reading: "Reading") -> None:
+        """Add a reading to each tier."""
+        self.add_values(
+            reading.timestamp, tuple(getattr(reading, name) for name in SERIES)
+        )
+
+    def add_values(self, timestamp: float, values: tuple[float, ...]) -> None:
+        """Add the values of each series, taken at a monotonic time, to each tier.
+
+        Errors writing to disk are counted and logged, rather than raised, so
+        they can't be mistaken for errors reading the UPS.
+        """
+        timestamp = time.time() - time.monotonic() + timestamp
+        try:
+            with self._lock:
+                for tier in self._tiers.values():
+                    tier.add(timestamp, values)
+        except (OSError, ValueError) as err:
+            if not self.errors:
+                _LOGGER.warning("unable to add to the history: %s", err)
+            self.errors += 1
+
+    def close(self) -> None:
+        """Close the tiers."""
+        with self._lock:
+            for tier in self._tiers.values():
+                tier.close()
+
+    def open(self) -> None:
+        """Open the tiers, creating them if needed."""
+        with self._lock:
+            for tier in self._tiers.values():
+                tier.open()
+
+    def config(self, tier: str) -> TierConfig:
+        """Get how a tier is stored."""
+        return self._tiers[tier].config
+
+    def query(
+        self, start: float, end: float, tier: str | None = None
+    ) -> tuple[str, list[tuple[float, ...]]]:
+        """Get the records from start up to, but not including, end.
+
+        For an aggregate tier that includes the bucket the start falls in.
+
+        :param start: seconds since the epoch
+        :param end: seconds since the epoch
+        :param tier: the tier to query, defaults to the finest one holding
+        every reading there is from the start
+        :return: the tier queried and its records
+        """
+        tier, data = self.query_bytes(start, end, tier)
+        return tier, list(self._tiers[tier].config.record.iter_unpack(data))
+
+    def query_bytes(
+        self, start: float, end: float, tier: str | None = None
+    ) -> tuple[str, bytes]:
+        """Get the records from start up to, but not including, end, packed.
+
+        This is the cheapest way to get a lot of records, e.g. to load them
+        straight into an array.
+
+        :return: the tier queried and its records
+        """
+        with self._lock:
+            if tier is None:
+                tier = self._select_tier(start)
+            return tier, self._tiers[tier].query_bytes(start, end)
+
+    def summary(self) -> dict[str, Any]:
+        """Get the size and extent of each tier for diagnostics."""
+        with self._lock:
+            return {name: tier.summary() for name, tier in self._tiers.items()}
@@ -0,0 +1,168 @@
+"""Hourly aggregation of every reading for the long-term statistics."""
+
+# region #-- imports --#
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from .energy import MAX_INTEGRATION_GAP, SECONDS_PER_HOUR, TOTALS
+
+if TYPE_CHECKING:
+    from .reading import Reading
+
+# endregion
+
+MEASUREMENTS: tuple[str, ...] = (
+    "battery_percentage",
+    "current",
+    "load_voltage",
+    "power",
+    "psu_voltage",
+    "shunt_voltage",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class HourlyBucket:
+    """The aggregates for one hour."""
+
+    means: dict[str, tuple[float, float, float]]  # mean, min, max
+    start: float  # seconds since the epoch, on the hour
+    totals: dict[str, float]  # the last value of each total in the hour
+
+
+@dataclass(slots=True)
+class _Measurement:
+    """Running time weighted mean, min and max of a measurement."""
+
+    area: float = 0
+    duration: float = 0
+    max: float = -math.inf
+    min: float = math.inf
+
+    def add(self, value: float) -> None:
+        """Include a value in the min and max."""
+        self.max = max(self.max, value)
+        self.min = min(self.min, value)
+
+    def stats(self) -> tuple[float, float, float]:
+        """Get the mean, min and max."""
+        return (
+            self.area / self.duration if self.duration else (self.min + self.max) / 2,
+            self.min,
+            self.max,
+        )
+
+
+@dataclass(slots=True)
+class _Hour:
+    """The hour being aggregated."""
+
+    start: float
+    measurements: dict[str, _Measurement] = field(default_factory=dict)
+    totals: dict[str, float] = field(default_factory=dict)
+
+
+class HourlyAggregator:
+    """Aggregate the readings into hourly means, mins, maxes and totals.
+
+    Means are weighted by time using the trapezoidal rule, like the energy
+    totals, so the polls whilst on battery don't count for more than those
+    on mains. Readings further apart than MAX_INTEGRATION_GAP aren't
+    integrated across. An hour is complete once a reading from a later hour
+    is added, at which point it can be popped from the event loop.
+
+    Readings are added from the device I/O worker.
+    """
+
+    def __init__(self, period: int = SECONDS_PER_HOUR) -> None:
+        """Initialise."""
+        self._completed: list[HourlyBucket] = []
+        self._hour: _Hour | None = None
+        self._last: tuple[float, dict[str, float]] | None = None
+        self._lock: threading.Lock = threading.Lock()
+        self._period: int = period
+
+    def _complete(self) -> None:
+        """Move the hour being aggregated to the completed ones."""
+        hour: _Hour = self._hour
+        if hour.measurements or hour.totals:
+            self._completed.append(
+                HourlyBucket(
+                    means={
+                        name: measurement.stats()
+                        for name, measurement in hour.measurements.items()
+                    },
+                    start=hour.start,
+                    totals=hour.totals,
+                )
+            )
+
+    def _integrate(
+        self,
+        start: float,
+        end: float,
+        values: dict[str, float],
+        last_timestamp: float,
+        last_values: dict[str, float],
+        timestamp: float,
+    ) -> None:
+        """Add the area between start and end to the hour being aggregated.
+
+        The value at either end is interpolated between the last reading and
+        this one, so an interval crossing the hour is split at the hour.
+        """
+        for name, value in values.items():
+            if (last_value := last_values.get(name)) is None:
+                continue
+            slope: float = (value - last_value) / (timestamp - last_timestamp)
+            at_start: float = last_value + slope * (start - last_timestamp)
+            at_end: float = last_value + slope * (end - last_timestamp)
+            measurement: _Measurement = self._hour.measurements.setdefault(
+                name, _Measurement()
+            )
+            measurement.area += (at_start + at_end) / 2 * (end - start)
+            measurement.duration += end - start
+            measurement.add(at_start)
+
+    def add(self, reading: "Reading") -> None:
+        """Add a reading, completing the hour before it if needed."""
+        timestamp: float = time.time() - time.monotonic() + reading.timestamp
+        values: dict[str, float] = {
+            name: value
+            for name in MEASUREMENTS
+            if (value := getattr(reading, name)) is not None
+        }
+        hour_start: float = math.floor(timestamp / self._period) * self._period
+        with self._lock:
+            last: tuple[float, dict[str, float]] | None = self._last
+            if last is not None and timestamp <= last[0]:
+                return  # out of order
+            self._last = (timestamp, values)
+            if self._hour is None:
+                self._hour = _Hour(hour_start)
+
+            elapsed: float = timestamp - last[0] if last is not None else math.inf
+            integrate: bool = elapsed <= MAX_INTEGRATION_GAP
+            start: float = last[0] if last is not None else timestamp
+            while self._hour.start < hour_start:
+                end: float = self._hour.start + self._period
+                if integrate:
+                    self._integrate(start, end, values, *last, timestamp)
+                self._complete()
+                self._hour = _Hour(end if integrate else hour_start)
+                start = end
+
+            if integrate:
+                self._integrate(start, timestamp, values, *last, timestamp)
+            for name, value in values.items():
+                self._hour.measurements.setdefault(name, _Measurement()).add(value)
+            self._hour.totals = {name: getattr(reading, name) for name in TOTALS}
+
+    def pop(self) -> list[HourlyBucket]:
+        """Get the hours completed since the last pop, oldest first."""
+        with self._lock:
+            completed, self._completed = self._completed, []
+            return completed
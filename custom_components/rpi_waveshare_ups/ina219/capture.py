@@ -0,0 +1,371 @@
+"""Capture of raw register traffic and replay of it through the driver.
+
+A capture is an append-only binary file: a header followed by fixed size
+records, one for each register read, register write or bus error, stamped
+with the monotonic clock. It is recorded by wrapping the bus in a
+CapturingBus, and a Replay serves the reads back to the driver through its
+bus_factory, as fast as they are asked for.
+
+    writer = CaptureWriter(path)
+    ina219 = INA219(0x42, 1, bus_factory=writer.bus_factory)
+    ...
+    replay = Replay.from_file(path)
+    ina219 = INA219(0x42, 1, bus_factory=replay.bus_factory)
+"""
+
+# region #-- imports --#
+import ctypes
+import os
+import pathlib
+import struct
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterator, Sequence
+
+import smbus2 as smbus
+from smbus2 import i2c_msg
+
+# endregion
+
+HEADER: struct.Struct = struct.Struct("<8sHH")  # magic, version, record size
+MAGIC: bytes = b"INA219CP"
+VERSION: int = 1
+# timestamp, op, address, register, pad, value
+RECORD: struct.Struct = struct.Struct("<dBBBxH")
+
+FLUSH_BYTES: int = 64 * 1024  # buffered before being written out
+FLUSH_INTERVAL: float = 30  # seconds, the longest records are left buffered
+I2C_M_RD: int = 0x0001  # read flag of an i2c_msg, not exported by smbus2
+MAX_CAPTURE_BYTES: int = 64 * 1024 * 1024  # ~2 weeks at a 2s update interval
+NO_REGISTER: int = 0xFF  # for errors where the register isn't known
+
+OP_READ: int = 1
+OP_WRITE: int = 2
+OP_ERROR: int = 3  # the value is the errno
+
+
+class CaptureExhausted(EOFError):
+    """The replay has reached the end of the capture."""
+
+
+@dataclass(frozen=True, slots=True)
+class CaptureRecord:
+    """A register read, register write or bus error in a capture."""
+
+    address: int
+    op: int
+    register: int
+    timestamp: float
+    value: int
+
+
+def read_capture(path: pathlib.Path) -> Iterator[CaptureRecord]:
+    """Read the records from a capture.
+
+    A partly written record at the end, e.g. from a power cut, is ignored.
+
+    :raises ValueError: if the file is not a capture this can read
+    """
+    data: bytes = pathlib.Path(path).read_bytes()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is not a capture")
+    magic, version, record_size = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path} is not a version {VERSION} capture")
+
+    end: int = HEADER.size + (len(data) - HEADER.size) // RECORD.size * RECORD.size
+    for timestamp, op, address, register, value in RECORD.iter_unpack(
+        data[HEADER.size : end]
+    ):
+        yield CaptureRecord(
+            address=address,
+            op=op,
+            register=register,
+            timestamp=timestamp,
+            value=value,
+        )
+
+
+class CaptureWriter:
+    """Append records to a capture.
+
+    The file is only opened on the first record, so that it happens on the
+    thread doing the bus I/O. Records are buffered and written out once
+    FLUSH_BYTES have built up, FLUSH_INTERVAL has passed, or on close, so
+    the poll doesn't make a write for each transaction. Recording stops once
+    the file reaches max_bytes.
+    """
+
+    def __init__(
+        self,
+        path: pathlib.Path,
+        max_bytes: int = MAX_CAPTURE_BYTES,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialise.
+
+        :param path: the capture to append to, created if needed
+        :param max_bytes: the size at which to stop recording
+        :param clock: the monotonic clock to stamp the records with
+        """
+        self._clock: Callable[[], float] = clock
+        self._file = None
+        self._flushed: float = 0
+        self._max_bytes: int = max_bytes
+        self.full: bool = False
+        self.path: pathlib.Path = pathlib.Path(path)
+        self.records: int = 0
+
+    def _open(self) -> None:
+        """Open the capture for appending, writing the header if it is new.
+
+        A file that isn't a capture this can append to is moved aside.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists() and self.path.stat().st_size:
+            with self.path.open("rb") as existing:
+                header: bytes = existing.read(HEADER.size)
+            if header != HEADER.pack(MAGIC, VERSION, RECORD.size):
+                os.replace(self.path, self.path.with_name(f"{self.path.name}.old"))
+        self._file = self.path.open("ab", buffering=FLUSH_BYTES)
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        self._flushed = self._clock()
+
+    def bus_factory(self, i2c_bus: int) -> "CapturingBus":
+        """Open the bus with everything on it captured."""
+        return CapturingBus(smbus.SMBus(i2c_bus), self)
+
+    def close(self) -> None:
+        """Close the capture."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def flush(self) -> None:
+        """Write out the buffered records."""
+        if self._file is not None:
+            self._file.flush()
+            self._flushed = self._clock()
+
+    def record(self, op: int, address: int, register: int, value: int) -> None:
+        """Append a record."""
+        if self.full:
+            return
+        if self._file is None:
+            self._open()
+        if self._file.tell() + RECORD.size > self._max_bytes:
+            self.full = True
+            return
+        timestamp: float = self._clock()
+        self._file.write(RECORD.pack(timestamp, op, address, register, value & 0xFFFF))
+        self.records += 1
+        if timestamp - self._flushed >= FLUSH_INTERVAL:
+            self.flush()
+
+
+class CapturingBus:
+    """Wrap a bus so that the register traffic on it is captured."""
+
+    def __init__(self, bus: smbus.SMBus, writer: CaptureWriter) -> None:
+        """Initialise."""
+        self._bus: smbus.SMBus = bus
+        self._pointers: dict[int, int] = {}
+        self._writer: CaptureWriter = writer
+
+    def __enter__(self) -> "CapturingBus":
+        """Enter magic method."""
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        """Exit magic method."""
+        self.close()
+
+    def __getattr__(self, name: str):
+        """Pass anything that doesn't touch a register to the bus."""
+        return getattr(self._bus, name)
+
+    def _record_error(self, address: int, register: int, err: OSError) -> None:
+        """Record a failed transaction."""
+        self._writer.record(OP_ERROR, address, register, err.errno or 0)
+
+    def close(self) -> None:
+        """Close the bus."""
+        self._writer.flush()
+        self._bus.close()
+
+    def i2c_rdwr(self, *msgs: i2c_msg) -> None:
+        """Run a combined transaction, capturing each register read or write."""
+        try:
+            self._bus.i2c_rdwr(*msgs)
+        except OSError as err:
+            first: bytes = next(
+                (bytes(msg) for msg in msgs if not msg.flags & I2C_M_RD), b""
+            )
+            self._record_error(
+                msgs[0].addr if msgs else 0, first[0] if first else NO_REGISTER, err
+            )
+            raise
+
+        for msg in msgs:
+            data: bytes = bytes(msg)
+            if msg.flags & I2C_M_RD:
+                self._writer.record(
+                    OP_READ,
+                    msg.addr,
+                    self._pointers.get(msg.addr, 0),
+                    int.from_bytes(data[:2], "big"),
+                )
+            elif data:
+                self._pointers[msg.addr] = data[0]
+                if len(data) >= 3:
+                    self._writer.record(
+                        OP_WRITE, msg.addr, data[0], int.from_bytes(data[1:3], "big")
+                    )
+
+    def read_i2c_block_data(
+        self, i2c_addr: int, register: int, length: int
+    ) -> list[int]:
+        """Read a register, capturing it."""
+        try:
+            data: list[int] = self._bus.read_i2c_block_data(i2c_addr, register, length)
+        except OSError as err:
+            self._record_error(i2c_addr, register, err)
+            raise
+        self._pointers[i2c_addr] = register
+        self._writer.record(
+            OP_READ, i2c_addr, register, int.from_bytes(bytes(data[:2]), "big")
+        )
+        return data
+
+    def write_i2c_block_data(
+        self, i2c_addr: int, register: int, data: Sequence[int]
+    ) -> None:
+        """Write a register, capturing it."""
+        try:
+            self._bus.write_i2c_block_data(i2c_addr, register, data)
+        except OSError as err:
+            self._record_error(i2c_addr, register, err)
+            raise
+        self._pointers[i2c_addr] = register
+        self._writer.record(
+            OP_WRITE, i2c_addr, register, int.from_bytes(bytes(data[:2]), "big")
+        )
+
+
+class Replay:
+    """Serve the reads in a capture back to the driver.
+
+    Each read of a register gets the next captured read of that register
+    from the same address, skipping over anything in between. So the driver
+    does not need to read exactly what was captured, e.g. a capture taken in
+    triggered mode can be replayed in continuous mode, which doesn't sleep
+    waiting for conversions. A captured error is raised by the next read
+    from its address. Writes are accepted and ignored.
+
+    The clock is the timestamp of the last record served, for anything that
+    needs to see time pass as it did when the capture was taken.
+    """
+
+    def __init__(self, records: Sequence[CaptureRecord]) -> None:
+        """Initialise."""
+        self._position: int = 0
+        self._records: Sequence[CaptureRecord] = records
+        self.now: float = records[0].timestamp if records else 0
+
+    @classmethod
+    def from_file(cls, path: pathlib.Path) -> "Replay":
+        """Load a capture to replay."""
+        return cls(list(read_capture(path)))
+
+    @property
+    def addresses(self) -> list[int]:
+        """Get the addresses in the capture, in the order they first appear."""
+        return list(dict.fromkeys(record.address for record in self._records))
+
+    def bus_factory(self, _: int) -> "ReplayBus":
+        """Open a bus that serves from the capture."""
+        return ReplayBus(self)
+
+    def clock(self) -> float:
+        """Get the time the capture is up to."""
+        return self.now
+
+    def next_read(self, address: int, register: int) -> int:
+        """Get the next captured read of the register.
+
+        :raises OSError: if an error was captured before the read
+        :raises CaptureExhausted: at the end of the capture
+        """
+        while self._position < len(self._records):
+            record: CaptureRecord = self._records[self._position]
+            self._position += 1
+            if record.address != address:
+                continue
+            self.now = record.timestamp
+            if record.op == OP_ERROR:
+                raise OSError(record.value, "Replayed bus error")
+            if record.op == OP_READ and record.register == register:
+                return record.value
+        raise CaptureExhausted("End of the capture")
+
+
+class ReplayBus:
+    """A bus serving the reads from a replay, standing in for smbus2.SMBus."""
+
+    funcs: smbus.I2cFunc = (
+        smbus.I2cFunc.I2C
+        | smbus.I2cFunc.SMBUS_QUICK
+        | smbus.I2cFunc.SMBUS_READ_BYTE
+        | smbus.I2cFunc.SMBUS_READ_I2C_BLOCK
+        | smbus.I2cFunc.SMBUS_WRITE_I2C_BLOCK
+    )
+
+    def __init__(self, replay: Replay) -> None:
+        """Initialise."""
+        self._pointers: dict[int, int] = {}
+        self._replay: Replay = replay
+
+    def __enter__(self) -> "ReplayBus":
+        """Enter magic method."""
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        """Exit magic method."""
+        self.close()
+
+    def close(self) -> None:
+        """Close the bus."""
+
+    def i2c_rdwr(self, *msgs: i2c_msg) -> None:
+        """Run a combined transaction."""
+        for msg in msgs:
+            if msg.flags & I2C_M_RD:
+                data: bytes = self._replay.next_read(
+                    msg.addr, self._pointers.get(msg.addr, 0)
+                ).to_bytes(2, "big")[: msg.len]
+                ctypes.memmove(msg.buf, data, len(data))
+            elif msg.len:
+                self._pointers[msg.addr] = bytes(msg)[0]
+
+    def read_byte(self, i2c_addr: int) -> int:
+        """Receive a byte from the current register."""
+        return self._replay.next_read(i2c_addr, self._pointers.get(i2c_addr, 0)) >> 8
+
+    def read_i2c_block_data(
+        self, i2c_addr: int, register: int, length: int
+    ) -> list[int]:
+        """Read a register."""
+        self._pointers[i2c_addr] = register
+        return list(
+            self._replay.next_read(i2c_addr, register).to_bytes(2, "big")[:length]
+        )
+
+    def write_i2c_block_data(
+        self, i2c_addr: int, register: int, _: Sequence[int]
+    ) -> None:
+        """Write a register, which is ignored."""
+        self._pointers[i2c_addr] = register
+
+    def write_quick(self, i2c_addr: int) -> None:
+        """Address the device without sending any data."""
@@ -0,0 +1,94 @@
+"""Identify an INA219, and the HAT it is on, from its registers."""
+
+# region #-- imports --#
+from dataclasses import dataclass
+
+import smbus2 as smbus
+
+from .ina219 import Registers
+
+# endregion
+
+CONFIG_RESET: int = 0x399F  # CONFIG register value after power on or reset
+CONFIG_RESERVED: int = 0xC000  # RST and the unused bit always read back as 0
+BUS_VOLTAGE_RESERVED: int = 0x0004  # unused bit of the BUSVOLTAGE register
+CALIBRATION_RESERVED: int = 0x0001  # the LSB of CALIBRATION always reads as 0
+
+# pack voltage ranges, in V, that identify the HAT type
+PACK_VOLTAGES: dict[str, tuple[float, float]] = {
+    "a": (6.0, 8.6),  # 2S, used on the A and B HATs
+    "d": (2.8, 4.4),  # 1S
+}
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    """What was learnt about the device at an address."""
+
+    address: int
+    i2c_bus: int
+    bus_voltage: float | None = None
+    hat_type: str | None = None
+    is_ina219: bool = False
+    is_reset: bool = False
+
+    @property
+    def score(self) -> int:
+        """Get how likely the device is to be the INA219 on a UPS HAT."""
+        return (
+            2 * self.is_ina219
+            + (self.hat_type is not None)
+            + self.is_reset
+        )
+
+
+def _read_register(bus: smbus.SMBus, address: int, register: int) -> int:
+    """Read a 16 bit register."""
+    data: list[int] = bus.read_i2c_block_data(address, register, 2)
+    return (data[0] << 8) | data[1]
+
+
+def fingerprint(bus: smbus.SMBus, i2c_bus: int, address: int) -> Fingerprint:
+    """Fingerprint the device at the given address.
+
+    The CONFIG, BUSVOLTAGE and CALIBRATION registers are read, which only sets
+    the register pointer on the device, and the bits that always read back as
+    0 on an INA219 are checked. If it looks like an INA219 the bus voltage is
+    used to work out the battery pack, and so the HAT, that it is on.
+
+    :param bus: the open bus
+    :param i2c_bus: the number of the bus
+    :param address: the address of the device
+    """
+    try:
+        config: int = _read_register(bus, address, Registers.CONFIG.value)
+        bus_voltage_raw: int = _read_register(
+            bus, address, Registers.BUSVOLTAGE.value
+        )
+        calibration: int = _read_register(bus, address, Registers.CALIBRATION.value)
+    except OSError:
+        return Fingerprint(address=address, i2c_bus=i2c_bus)
+
+    if (
+        config & CONFIG_RESERVED
+        or bus_voltage_raw & BUS_VOLTAGE_RESERVED
+        or calibration & CALIBRATION_RESERVED
+    ):
+        return Fingerprint(address=address, i2c_bus=i2c_bus)
+
+    bus_voltage: float = (bus_voltage_raw >> 3) * 0.004
+    return Fingerprint(
+        address=address,
+        i2c_bus=i2c_bus,
+        bus_voltage=bus_voltage,
+        hat_type=next(
+            (
+                hat_type
+                for hat_type, (v_min, v_max) in PACK_VOLTAGES.items()
+                if v_min <= bus_voltage <= v_max
+            ),
+            None,
+        ),
+        is_ina219=True,
+        is_reset=config == CONFIG_RESET,
+    )
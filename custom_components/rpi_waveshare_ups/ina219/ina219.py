@@ -0,0 +1,385 @@
+# pylint: disable=invalid-name
+"""Library interacting with the INA219 device."""
+
+# Originally provided here:
+# https://github.com/waveshare/UPS-Power-Module/blob/master/ups_display/ina219.py
+# and from the demo code in below link:
+# https://www.waveshare.com/wiki/UPS_HAT_(D)
+
+# region #-- imports --#
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, Sequence
+
+import smbus2 as smbus
+from smbus2 import i2c_msg
+
+# endregion
+
+
+class Registers(Enum):
+    """Register addresses."""
+
+    CONFIG = 0x00  # Config Register (R/W)
+    SHUNTVOLTAGE = 0x01  # SHUNT VOLTAGE REGISTER (R)
+    BUSVOLTAGE = 0x02  # BUS VOLTAGE REGISTER (R)
+    POWER = 0x03  # POWER REGISTER (R)
+    CURRENT = 0x04  # CURRENT REGISTER (R)
+    CALIBRATION = 0x05  # CALIBRATION REGISTER (R/W)
+
+
+class BusVoltageRange(Enum):
+    """Constants for ``bus_voltage_range``."""
+
+    RANGE_16V = 0x00  # set bus voltage range to 16V
+    RANGE_32V = 0x01  # set bus voltage range to 32V (default)
+
+
+class Gain(Enum):
+    """Constants for ``gain``."""
+
+    DIV_1_40MV = 0x00  # shunt prog. gain set to  1, 40 mV range
+    DIV_2_80MV = 0x01  # shunt prog. gain set to /2, 80 mV range
+    DIV_4_160MV = 0x02  # shunt prog. gain set to /4, 160 mV range
+    DIV_8_320MV = 0x03  # shunt prog. gain set to /8, 320 mV range
+
+
+class ADCResolution(Enum):
+    """Constants for ``bus_adc_resolution`` or ``shunt_adc_resolution``."""
+
+    ADCRES_9BIT_1S = 0x00  # 9bit,   1 sample,     84us
+    ADCRES_10BIT_1S = 0x01  # 10bit,   1 sample,    148us
+    ADCRES_11BIT_1S = 0x02  # 11 bit,  1 sample,    276us
+    ADCRES_12BIT_1S = 0x03  # 12 bit,  1 sample,    532us
+    ADCRES_12BIT_2S = 0x09  # 12 bit,  2 samples,  1.06ms
+    ADCRES_12BIT_4S = 0x0A  # 12 bit,  4 samples,  2.13ms
+    ADCRES_12BIT_8S = 0x0B  # 12bit,   8 samples,  4.26ms
+    ADCRES_12BIT_16S = 0x0C  # 12bit,  16 samples,  8.51ms
+    ADCRES_12BIT_32S = 0x0D  # 12bit,  32 samples, 17.02ms
+    ADCRES_12BIT_64S = 0x0E  # 12bit,  64 samples, 34.05ms
+    ADCRES_12BIT_128S = 0x0F  # 12bit, 128 samples, 68.10ms
+
+
+class Mode(Enum):
+    """Constants for ``mode``."""
+
+    POWERDOW = 0x00  # power down
+    SVOLT_TRIGGERED = 0x01  # shunt voltage triggered
+    BVOLT_TRIGGERED = 0x02  # bus voltage triggered
+    SANDBVOLT_TRIGGERED = 0x03  # shunt and bus voltage triggered
+    ADCOFF = 0x04  # ADC off
+    SVOLT_CONTINUOUS = 0x05  # shunt voltage continuous
+    BVOLT_CONTINUOUS = 0x06  # bus voltage continuous
+    SANDBVOLT_CONTINUOUS = 0x07  # shunt and bus voltage continuous
+
+
+# conversion time in seconds for each ADC resolution
+CONVERSION_TIMES: dict[ADCResolution, float] = {
+    ADCResolution.ADCRES_9BIT_1S: 0.000084,
+    ADCResolution.ADCRES_10BIT_1S: 0.000148,
+    ADCResolution.ADCRES_11BIT_1S: 0.000276,
+    ADCResolution.ADCRES_12BIT_1S: 0.000532,
+    ADCResolution.ADCRES_12BIT_2S: 0.00106,
+    ADCResolution.ADCRES_12BIT_4S: 0.00213,
+    ADCResolution.ADCRES_12BIT_8S: 0.00426,
+    ADCResolution.ADCRES_12BIT_16S: 0.00851,
+    ADCResolution.ADCRES_12BIT_32S: 0.01702,
+    ADCResolution.ADCRES_12BIT_64S: 0.03405,
+    ADCResolution.ADCRES_12BIT_128S: 0.0681,
+}
+
+BUS_VOLTAGE_CNVR: int = 0x02  # Conversion Ready bit of the BUSVOLTAGE register
+BUS_VOLTAGE_LSB: float = 0.004  # V per bit, after shifting out the flags
+BUS_VOLTAGE_OVF: int = 0x01  # Math Overflow bit of the BUSVOLTAGE register
+SHUNT_VOLTAGE_LSB: float = 0.01  # mV per bit
+
+CONVERSION_POLL_INTERVAL: float = 0.001  # seconds between checks of CNVR
+CONVERSION_TIMEOUT_FACTOR: float = 4  # multiple of the conversion time to wait
+
+# plain ints for the registers used on the hot path
+REG_BUSVOLTAGE: int = Registers.BUSVOLTAGE.value
+REG_CALIBRATION: int = Registers.CALIBRATION.value
+REG_CONFIG: int = Registers.CONFIG.value
+
+# registers holding measurements, the default for a snapshot
+DATA_REGISTERS: tuple[int, ...] = (
+    Registers.SHUNTVOLTAGE.value,
+    Registers.BUSVOLTAGE.value,
+    Registers.POWER.value,
+    Registers.CURRENT.value,
+)
+
+
+@dataclass(frozen=True)
+class HatProfile:
+    """How the INA219 is wired up and should be configured on a HAT.
+
+    The calibration follows the datasheet: choose a current LSB between
+    max expected current / 32767 and / 4096, then
+    Cal = trunc(0.04096 / (Current_LSB * RSHUNT)) and
+    Power_LSB = 20 * Current_LSB.
+    """
+
+    bus_voltage_range: BusVoltageRange
+    current_lsb: float  # A per bit
+    gain: Gain
+    shunt_ohms: float
+    calibration: int | None = None  # overrides the calculated value
+    current_sign: int = 1  # -1 if the shunt is wired so charging reads negative
+
+    @property
+    def calibration_value(self) -> int:
+        """Get the value for the CALIBRATION register."""
+        if self.calibration is not None:
+            return self.calibration
+        return int(0.04096 / (self.current_lsb * self.shunt_ohms))
+
+    @property
+    def power_lsb(self) -> float:
+        """Get the W per bit of the POWER register."""
+        return 20 * self.current_lsb
+
+
+# 32V and 2A on a 0.1 ohm shunt, gain 8 (320mV), overflows at 3.2A
+HAT_AB: HatProfile = HatProfile(
+    bus_voltage_range=BusVoltageRange.RANGE_32V,
+    current_lsb=0.0001,
+    gain=Gain.DIV_8_320MV,
+    shunt_ohms=0.1,
+)
+# 16V and 5A on a 0.01 ohm shunt, gain 2 (80mV), overflows at 8A
+HAT_D: HatProfile = HatProfile(
+    bus_voltage_range=BusVoltageRange.RANGE_16V,
+    calibration=26868,  # from the Waveshare demo code
+    current_lsb=0.0001524,
+    current_sign=-1,
+    gain=Gain.DIV_2_80MV,
+    shunt_ohms=0.01,
+)
+
+HAT_PROFILES: dict[str, HatProfile] = {  # keyed on the HAT type
+    "a": HAT_AB,
+    "b": HAT_AB,
+    "d": HAT_D,
+}
+
+
+def _to_bytes(value: int) -> list[int]:
+    """Split a register value into the bytes to write, MSB first."""
+    return [(value >> 8) & 0xFF, value & 0xFF]
+
+
+def _signed(value: int) -> int:
+    """Interpret a raw register value as a two's complement number."""
+    return value - 0x10000 if value & 0x8000 else value
+
+
+class INA219:
+    """Interact with INA219.
+
+    Everything that depends on the HAT profile, the calibration, the packed
+    configuration words and the scale factors, is worked out once when the
+    driver is created so that reads only need a multiply to decode.
+    """
+
+    hat: HatProfile = HAT_AB
+
+    def __init__(
+        self,
+        addr: int,
+        i2c_bus: int,
+        triggered: bool = False,
+        bus_adc_resolution: ADCResolution = ADCResolution.ADCRES_12BIT_32S,
+        shunt_adc_resolution: ADCResolution = ADCResolution.ADCRES_12BIT_32S,
+        hat: HatProfile | None = None,
+        bus_factory: Callable[[int], smbus.SMBus] | None = None,
+    ) -> None:
+        """Initialise.
+
+        :param addr: the address of the device on the bus
+        :param i2c_bus: the number of the bus
+        :param triggered: convert on demand for each snapshot and power down
+        between them rather than converting continuously
+        :param bus_adc_resolution: resolution and averaging for the bus ADC
+        :param shunt_adc_resolution: resolution and averaging for the shunt ADC
+        :param hat: the profile for the HAT, defaults to the one for the class
+        :param bus_factory: opens the bus, defaults to smbus2.SMBus, can be
+        swapped for the simulator
+        """
+        if hat is not None:
+            self.hat = hat
+
+        self.addr: int = addr
+        # called with the registers and the seconds taken for each read
+        self.on_read: Callable[[Sequence[int], float], None] | None = None
+        self.overflow: bool = False
+        self.recalibrations: int = 0
+        self.transactions: int = 0
+
+        self._cal_value: int = self.hat.calibration_value
+        self._config: int = (
+            self.hat.bus_voltage_range.value << 13
+            | self.hat.gain.value << 11
+            | bus_adc_resolution.value << 7
+            | shunt_adc_resolution.value << 3
+        )
+        # in shunt and bus mode the shunt is converted followed by the bus
+        self._conversion_time: float = (
+            CONVERSION_TIMES[bus_adc_resolution]
+            + CONVERSION_TIMES[shunt_adc_resolution]
+        )
+        self._conversion_timeout: float = (
+            self._conversion_time * CONVERSION_TIMEOUT_FACTOR
+        )
+        self._current_scale: float = self.hat.current_lsb * 1000 * self.hat.current_sign
+        self._power_scale: float = self.hat.power_lsb
+        self._triggered: bool = triggered
+
+        self._cal_bytes: list[int] = _to_bytes(self._cal_value)
+        self._config_bytes: list[int] = _to_bytes(
+            self._config
+            | (Mode.POWERDOW.value if triggered else Mode.SANDBVOLT_CONTINUOUS.value)
+        )
+        self._trigger_bytes: list[int] = _to_bytes(
+            self._config | Mode.SANDBVOLT_TRIGGERED.value
+        )
+        self._powerdown_bytes: list[int] = _to_bytes(
+            self._config | Mode.POWERDOW.value
+        )
+
+        self.bus: smbus.SMBus = (bus_factory or smbus.SMBus)(i2c_bus)
+        try:
+            self._combined: bool = bool(self.bus.funcs & smbus.I2cFunc.I2C)
+            self.calibrate()
+        except OSError:
+            self.bus.close()
+            raise
+
+    def _convert(self) -> None:
+        """Trigger a conversion and wait for it to complete.
+
+        :raises TimeoutError: if the conversion does not complete in time
+        """
+        self._write_bytes(REG_CONFIG, self._trigger_bytes)
+        deadline: float = time.monotonic() + self._conversion_timeout
+        time.sleep(self._conversion_time)
+        while not self.read(REG_BUSVOLTAGE) & BUS_VOLTAGE_CNVR:
+            if time.monotonic() > deadline:
+                raise TimeoutError("Timed out waiting for the conversion")
+            time.sleep(CONVERSION_POLL_INTERVAL)
+
+    def _write_bytes(self, address: int, data: list[int]) -> None:
+        """Write the bytes of a register value to i2c."""
+        self.bus.write_i2c_block_data(self.addr, address, data)
+        self.transactions += 1
+
+    def calibrate(self) -> None:
+        """Write the calibration and configuration to the device."""
+        self._write_bytes(REG_CALIBRATION, self._cal_bytes)
+        self._write_bytes(REG_CONFIG, self._config_bytes)
+
+    def close(self) -> None:
+        """Close the bus connection."""
+        self.bus.close()
+
+    def read(self, address: int) -> int:
+        """Read block data from i2c."""
+        if self.on_read is None:
+            data: list[int] = self.bus.read_i2c_block_data(self.addr, address, 2)
+        else:
+            start: float = time.perf_counter()
+            data = self.bus.read_i2c_block_data(self.addr, address, 2)
+            self.on_read((address,), time.perf_counter() - start)
+        self.transactions += 1
+        return (data[0] << 8) | data[1]
+
+    def read_many(self, addresses: Sequence[int]) -> list[int]:
+        """Read multiple registers.
+
+        If the adapter supports plain I2C messages the registers are read in a
+        single combined transaction, otherwise each one is read in turn.
+        """
+        if not self._combined:
+            return [self.read(address) for address in addresses]
+
+        msgs: list[i2c_msg] = []
+        for address in addresses:
+            msgs.append(i2c_msg.write(self.addr, [address]))
+            msgs.append(i2c_msg.read(self.addr, 2))
+        if self.on_read is None:
+            self.bus.i2c_rdwr(*msgs)
+        else:
+            start: float = time.perf_counter()
+            self.bus.i2c_rdwr(*msgs)
+            self.on_read(addresses, time.perf_counter() - start)
+        self.transactions += 1
+        return [int.from_bytes(bytes(msg), "big") for msg in msgs[1::2]]
+
+    def read_snapshot(self, registers: Sequence[int] = DATA_REGISTERS) -> list[int]:
+        """Read the given raw registers.
+
+        The CALIBRATION register is read alongside them and only if the chip
+        has lost it (i.e. it has reset) is the device calibrated again.
+
+        In triggered mode a conversion is started, and waited for, before the
+        registers are read and the device is powered down afterwards.
+
+        :param registers: the registers to read
+        :return: the values, in the same order as the registers
+        """
+        if self._triggered:
+            self._convert()
+        values: list[int] = self.read_many((*registers, REG_CALIBRATION))
+        if values.pop() != self._cal_value:
+            self.recalibrations += 1
+            self.calibrate()
+            if self._triggered:
+                self._convert()
+            values = self.read_many(registers)
+        if self._triggered:
+            self._write_bytes(REG_CONFIG, self._powerdown_bytes)
+
+        if REG_BUSVOLTAGE in registers:
+            self.overflow = bool(
+                values[registers.index(REG_BUSVOLTAGE)] & BUS_VOLTAGE_OVF
+            )
+        return values
+
+    def write(self, address: int, data: int) -> None:
+        """Write block data to i2c."""
+        self._write_bytes(address, _to_bytes(data))
+
+    def convert_bus_voltage_v(self, value: int) -> float:
+        """Convert a raw BUSVOLTAGE register value to V."""
+        return (value >> 3) * BUS_VOLTAGE_LSB
+
+    def convert_current_ma(self, value: int) -> float:
+        """Convert a raw CURRENT register value to mA, positive when charging."""
+        return _signed(value) * self._current_scale
+
+    def convert_power_w(self, value: int) -> float:
+        """Convert a raw POWER register value to W."""
+        return _signed(value) * self._power_scale
+
+    def convert_shunt_voltage_mv(self, value: int) -> float:
+        """Convert a raw SHUNTVOLTAGE register value to mV."""
+        return _signed(value) * SHUNT_VOLTAGE_LSB
+
+    def get_shunt_voltage_mv(self) -> float:
+        """Get the voltage between V+ and V- across the shunt."""
+        return self.convert_shunt_voltage_mv(
+            self.read(Registers.SHUNTVOLTAGE.value)
+        )
+
+    def get_bus_voltage_v(self) -> float:
+        """Get the voltage on V- (load side)."""
+        return self.convert_bus_voltage_v(self.read(REG_BUSVOLTAGE))
+
+    def get_current_ma(self) -> float:
+        """Get the current in mA."""
+        return self.convert_current_ma(self.read(Registers.CURRENT.value))
+
+    def get_power_w(self) -> float:
+        """Get the power in W."""
+        return self.convert_power_w(self.read(Registers.POWER.value))
@@ -0,0 +1,53 @@
+"""Acquisition profiles for the INA219 ADCs."""
+
+# region #-- imports --#
+from dataclasses import dataclass
+
+from .ina219 import CONVERSION_TIMES, CONVERSION_TIMEOUT_FACTOR, ADCResolution
+
+# endregion
+
+
+@dataclass(frozen=True)
+class AcquisitionProfile:
+    """Trade off between noise and latency for the bus and shunt ADCs."""
+
+    bus_adc_resolution: ADCResolution
+    shunt_adc_resolution: ADCResolution
+
+    @property
+    def conversion_time(self) -> float:
+        """Get the time taken, in seconds, to convert the shunt and bus."""
+        return (
+            CONVERSION_TIMES[self.bus_adc_resolution]
+            + CONVERSION_TIMES[self.shunt_adc_resolution]
+        )
+
+    @property
+    def min_poll_interval(self) -> float:
+        """Get the shortest interval, in seconds, that gives a fresh reading.
+
+        Polling any faster than this returns the previous conversion, or
+        times out waiting for a triggered one.
+        """
+        return self.conversion_time * CONVERSION_TIMEOUT_FACTOR
+
+
+PROFILE_BALANCED: str = "balanced"
+PROFILE_FAST: str = "fast"
+PROFILE_LOW_NOISE: str = "low_noise"
+
+ACQUISITION_PROFILES: dict[str, AcquisitionProfile] = {
+    PROFILE_FAST: AcquisitionProfile(  # ~1ms
+        bus_adc_resolution=ADCResolution.ADCRES_12BIT_1S,
+        shunt_adc_resolution=ADCResolution.ADCRES_12BIT_1S,
+    ),
+    PROFILE_BALANCED: AcquisitionProfile(  # ~34ms
+        bus_adc_resolution=ADCResolution.ADCRES_12BIT_32S,
+        shunt_adc_resolution=ADCResolution.ADCRES_12BIT_32S,
+    ),
+    PROFILE_LOW_NOISE: AcquisitionProfile(  # ~136ms
+        bus_adc_resolution=ADCResolution.ADCRES_12BIT_128S,
+        shunt_adc_resolution=ADCResolution.ADCRES_12BIT_128S,
+    ),
+}
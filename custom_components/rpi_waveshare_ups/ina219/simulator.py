@@ -0,0 +1,511 @@
+"""Simulated INA219 devices on a simulated i2c bus.
+
+The SimulatedBus has the parts of the smbus2.SMBus interface that the driver
+and discovery use, so it can be passed in through their bus_factory to run
+without any hardware. The devices follow the register behaviour in the
+datasheet: calibration and configuration writes, CURRENT and POWER derived
+from the calibration, the CNVR and OVF flags, conversion times and reset.
+
+    sim = SimulatedI2C()
+    sim.add_device(1, 0x42, SimulatedINA219(HAT_AB, mains_loss(60, ...)))
+    ina219 = INA219(0x42, 1, bus_factory=sim.bus_factory)
+"""
+
+# region #-- imports --#
+import ctypes
+import errno
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Sequence
+
+import smbus2 as smbus
+from smbus2 import i2c_msg
+
+from .ina219 import (
+    BUS_VOLTAGE_CNVR,
+    BUS_VOLTAGE_OVF,
+    CONVERSION_TIMES,
+    ADCResolution,
+    HatProfile,
+    Mode,
+    Registers,
+)
+
+# endregion
+
+CONFIG_RESET: int = 0x399F
+CONFIG_RST: int = 0x8000
+I2C_M_RD: int = 0x0001  # read flag of an i2c_msg, not exported by smbus2
+
+# open circuit voltage of a single Li-ion cell against state of charge, kept
+# here so the simulator has no dependencies outside the driver
+LI_ION_OCV: tuple[tuple[float, float], ...] = (
+    (0, 3.00),
+    (5, 3.30),
+    (10, 3.45),
+    (20, 3.55),
+    (30, 3.62),
+    (40, 3.68),
+    (50, 3.74),
+    (60, 3.80),
+    (70, 3.87),
+    (80, 3.95),
+    (90, 4.05),
+    (100, 4.20),
+)
+
+_CONTINUOUS_MODES: frozenset[int] = frozenset(
+    (
+        Mode.SVOLT_CONTINUOUS.value,
+        Mode.BVOLT_CONTINUOUS.value,
+        Mode.SANDBVOLT_CONTINUOUS.value,
+    )
+)
+_TRIGGERED_MODES: frozenset[int] = frozenset(
+    (
+        Mode.SVOLT_TRIGGERED.value,
+        Mode.BVOLT_TRIGGERED.value,
+        Mode.SANDBVOLT_TRIGGERED.value,
+    )
+)
+
+
+# region #-- scenarios --#
+@dataclass(frozen=True)
+class Conditions:
+    """What the INA219 is measuring at a point in time."""
+
+    bus_voltage: float  # V
+    current_ma: float  # battery current, positive when charging
+
+
+Scenario = Callable[[float], Conditions]  # seconds since the start
+
+
+def ocv(soc: float, cells: int = 1) -> float:
+    """Get the open circuit voltage of a pack at the state of charge."""
+    soc = min(max(soc, 0), 100)
+    for (soc_low, v_low), (soc_high, v_high) in zip(LI_ION_OCV, LI_ION_OCV[1:]):
+        if soc <= soc_high:
+            return cells * (
+                v_low + (soc - soc_low) * (v_high - v_low) / (soc_high - soc_low)
+            )
+    return cells * LI_ION_OCV[-1][1]
+
+
+def steady(bus_voltage: float, current_ma: float) -> Scenario:
+    """Measure the same thing all of the time."""
+    conditions: Conditions = Conditions(bus_voltage, current_ma)
+    return lambda _: conditions
+
+
+def discharge(
+    cells: int,
+    capacity_mah: float,
+    load_ma: float,
+    start_soc: float = 100,
+    internal_resistance: float = 0.1,
+) -> Scenario:
+    """Discharge the pack at a constant current along the OCV curve.
+
+    :param cells: the number of cells in series
+    :param capacity_mah: the capacity of the pack
+    :param load_ma: the current drawn from the pack
+    :param start_soc: the state of charge, in %, at the start
+    :param internal_resistance: ohms for the whole pack
+    """
+
+    def _scenario(elapsed: float) -> Conditions:
+        """Get the conditions."""
+        soc: float = start_soc - load_ma * elapsed / 3600 / capacity_mah * 100
+        return Conditions(
+            bus_voltage=ocv(soc, cells) - load_ma / 1000 * internal_resistance,
+            current_ma=-load_ma,
+        )
+
+    return _scenario
+
+
+def load_spikes(
+    base: Scenario,
+    spike_ma: float,
+    period: float,
+    duration: float,
+    internal_resistance: float = 0.1,
+) -> Scenario:
+    """Add a burst of extra load at a fixed period.
+
+    :param base: the scenario to add the spikes to
+    :param spike_ma: the extra current drawn during a spike
+    :param period: seconds between the start of each spike
+    :param duration: seconds each spike lasts for
+    :param internal_resistance: ohms for the whole pack
+    """
+
+    def _scenario(elapsed: float) -> Conditions:
+        """Get the conditions."""
+        conditions: Conditions = base(elapsed)
+        if elapsed % period >= duration:
+            return conditions
+        return Conditions(
+            bus_voltage=conditions.bus_voltage - spike_ma / 1000 * internal_resistance,
+            current_ma=conditions.current_ma - spike_ma,
+        )
+
+    return _scenario
+
+
+def mains_loss(at: float, on_mains: Scenario, on_battery: Scenario) -> Scenario:
+    """Switch from mains to battery.
+
+    :param at: seconds from the start that mains is lost
+    :param on_mains: the scenario before mains is lost
+    :param on_battery: the scenario after, started from when mains is lost
+    """
+    return lambda elapsed: (
+        on_mains(elapsed) if elapsed < at else on_battery(elapsed - at)
+    )
+
+
+def noisy(base: Scenario, current_ma: float, seed: int | None = None) -> Scenario:
+    """Add gaussian noise to the current.
+
+    :param current_ma: the standard deviation of the noise
+    """
+    rng: random.Random = random.Random(seed)
+
+    def _scenario(elapsed: float) -> Conditions:
+        """Get the conditions."""
+        conditions: Conditions = base(elapsed)
+        return Conditions(
+            bus_voltage=conditions.bus_voltage,
+            current_ma=conditions.current_ma + rng.gauss(0, current_ma),
+        )
+
+    return _scenario
+
+
+# endregion
+
+
+class ManualClock:
+    """A monotonic clock that only moves when told to."""
+
+    def __init__(self, start: float = 0) -> None:
+        """Initialise."""
+        self.now: float = start
+
+    def __call__(self) -> float:
+        """Get the time."""
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        """Move the clock on."""
+        self.now += seconds
+
+
+def _to_register(value: int) -> int:
+    """Convert a signed value to the 16 bit two's complement register value."""
+    return value & 0xFFFF
+
+
+def _adc_time(code: int) -> float:
+    """Get the conversion time for an ADC setting.
+
+    With bit 3 clear the setting is a resolution and bit 2 is ignored. With
+    it set the setting is a number of samples, where 0x08 is a single sample
+    at 12 bit, the same as 0x03.
+    """
+    if not code & 0x08:
+        code &= 0x03
+    elif code == 0x08:
+        code = ADCResolution.ADCRES_12BIT_1S.value
+    return CONVERSION_TIMES[ADCResolution(code)]
+
+
+class SimulatedINA219:
+    """A simulated INA219 measuring a scenario.
+
+    The measurement registers are latched when a conversion completes, as on
+    the real device. In continuous mode a conversion completes every
+    conversion time, in triggered mode one conversion follows each write of
+    the configuration.
+    """
+
+    def __init__(self, hat: HatProfile, scenario: Scenario) -> None:
+        """Initialise.
+
+        :param hat: how the device is wired up on the HAT
+        :param scenario: what the device is measuring
+        """
+        self._hat: HatProfile = hat
+        self._scenario: Scenario = scenario
+        self.clock: Callable[[], float] = time.monotonic
+        self.conversion_scale: float = 1  # 0 to convert instantly
+        self.start: float | None = None
+        self.reset()
+
+    def _conversion_time(self) -> float:
+        """Get how long a conversion takes with the current configuration."""
+        return (
+            _adc_time((self.config >> 7) & 0x0F) + _adc_time((self.config >> 3) & 0x0F)
+        ) * self.conversion_scale
+
+    def _latch(self, timestamp: float) -> None:
+        """Complete a conversion of the conditions at the given time."""
+        if self.start is None:
+            self.start = timestamp
+        conditions: Conditions = self._scenario(timestamp - self.start)
+
+        # the shunt is wired so that the driver's sign makes charging positive
+        shunt_v: float = (
+            conditions.current_ma / 1000 * self._hat.current_sign * self._hat.shunt_ohms
+        )
+        shunt_full_scale: int = 4000 << ((self.config >> 11) & 0x03)  # 10uV LSB
+        shunt: int = round(shunt_v / 0.00001)
+        overflow: bool = abs(shunt) > shunt_full_scale
+        shunt = max(-shunt_full_scale, min(shunt, shunt_full_scale))
+
+        bus: int = max(0, min(round(conditions.bus_voltage / 0.004), 0x1FFF))
+
+        current: int = math.trunc(shunt * self.calibration / 4096)
+        if abs(current) > 0x7FFF:
+            overflow = True
+            current = max(-0x7FFF, min(current, 0x7FFF))
+        power: int = math.trunc(abs(current) * bus / 5000)
+        if power > 0xFFFF:
+            overflow = True
+            power = 0xFFFF
+
+        self.registers[Registers.SHUNTVOLTAGE.value] = _to_register(shunt)
+        self.registers[Registers.CURRENT.value] = _to_register(current)
+        self.registers[Registers.POWER.value] = power
+        self._bus = bus
+        self._overflow = overflow
+        self._cnvr = True
+        self._last_conversion = timestamp
+
+    def _update(self) -> None:
+        """Complete any conversions that are due."""
+        now: float = self.clock()
+        mode: int = self.config & 0x07
+        if mode in _TRIGGERED_MODES and self._due is not None and now >= self._due:
+            self._latch(self._due)
+            self._due = None
+        elif mode in _CONTINUOUS_MODES:
+            conversion_time: float = self._conversion_time()
+            if (
+                self._last_conversion is None
+                or now - self._last_conversion >= conversion_time
+            ):
+                self._latch(now)
+
+    @property
+    def config(self) -> int:
+        """Get the CONFIG register."""
+        return self.registers[Registers.CONFIG.value]
+
+    @property
+    def calibration(self) -> int:
+        """Get the CALIBRATION register."""
+        return self.registers[Registers.CALIBRATION.value]
+
+    def read(self, register: int) -> int:
+        """Read a register."""
+        self._update()
+        if register == Registers.BUSVOLTAGE.value:
+            return (
+                self._bus << 3
+                | (BUS_VOLTAGE_CNVR if self._cnvr else 0)
+                | (BUS_VOLTAGE_OVF if self._overflow else 0)
+            )
+        if register == Registers.POWER.value:
+            self._cnvr = False
+        return self.registers.get(register, 0)
+
+    def reset(self) -> None:
+        """Put the registers back to their power on values."""
+        self.registers: dict[int, int] = {
+            Registers.CONFIG.value: CONFIG_RESET,
+            Registers.SHUNTVOLTAGE.value: 0,
+            Registers.POWER.value: 0,
+            Registers.CURRENT.value: 0,
+            Registers.CALIBRATION.value: 0,
+        }
+        self._bus: int = 0
+        self._cnvr: bool = False
+        self._due: float | None = None
+        self._last_conversion: float | None = None
+        self._overflow: bool = False
+
+    def write(self, register: int, value: int) -> None:
+        """Write a register, writes to read only registers are ignored."""
+        self._update()
+        if register == Registers.CONFIG.value:
+            if value & CONFIG_RST:
+                self.reset()
+                return
+            self.registers[register] = value
+            self._cnvr = False
+            self._last_conversion = None
+            self._due = (
+                self.clock() + self._conversion_time()
+                if value & 0x07 in _TRIGGERED_MODES
+                else None
+            )
+        elif register == Registers.CALIBRATION.value:
+            self.registers[register] = value & 0xFFFE
+
+
+class SimulatedBus:
+    """A simulated i2c bus, standing in for smbus2.SMBus."""
+
+    def __init__(self, sim: "SimulatedI2C", bus: int) -> None:
+        """Initialise."""
+        self._bus: int = bus
+        self._pointers: dict[int, int] = {}
+        self._sim: SimulatedI2C = sim
+        self.funcs: smbus.I2cFunc = sim.funcs
+
+    def __enter__(self) -> "SimulatedBus":
+        """Enter magic method."""
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        """Exit magic method."""
+        self.close()
+
+    def _device(self, address: int) -> SimulatedINA219:
+        """Get the device at the address, failing like the real bus would."""
+        self._sim.check_transaction(self._bus, address)
+        return self._sim.devices[self._bus][address]
+
+    def close(self) -> None:
+        """Close the bus."""
+
+    def i2c_rdwr(self, *msgs: i2c_msg) -> None:
+        """Run a combined transaction."""
+        if not self.funcs & smbus.I2cFunc.I2C:
+            raise OSError(errno.EOPNOTSUPP, "Operation not supported")
+        for msg in msgs:
+            device: SimulatedINA219 = self._device(msg.addr)
+            if msg.flags & I2C_M_RD:
+                value: int = device.read(self._pointers.get(msg.addr, 0))
+                data: bytes = value.to_bytes(2, "big")[: msg.len]
+                ctypes.memmove(msg.buf, data, len(data))
+            else:
+                self._write(msg.addr, device, bytes(msg))
+
+    def read_byte(self, i2c_addr: int) -> int:
+        """Receive a byte from the current register."""
+        device: SimulatedINA219 = self._device(i2c_addr)
+        return device.read(self._pointers.get(i2c_addr, 0)) >> 8
+
+    def read_i2c_block_data(
+        self, i2c_addr: int, register: int, length: int
+    ) -> list[int]:
+        """Read a register."""
+        device: SimulatedINA219 = self._device(i2c_addr)
+        self._pointers[i2c_addr] = register
+        return list(device.read(register).to_bytes(2, "big")[:length])
+
+    def _write(self, address: int, device: SimulatedINA219, data: bytes) -> None:
+        """Write a register pointer, and optionally a value, to a device."""
+        if not data:
+            return
+        self._pointers[address] = data[0]
+        if len(data) >= 3:
+            device.write(data[0], data[1] << 8 | data[2])
+
+    def write_byte(self, i2c_addr: int, value: int) -> None:
+        """Send a byte, which sets the register pointer."""
+        self._write(i2c_addr, self._device(i2c_addr), bytes([value]))
+
+    def write_i2c_block_data(
+        self, i2c_addr: int, register: int, data: Sequence[int]
+    ) -> None:
+        """Write a register."""
+        self._write(i2c_addr, self._device(i2c_addr), bytes([register, *data]))
+
+    def write_quick(self, i2c_addr: int) -> None:
+        """Address the device without sending any data."""
+        self._device(i2c_addr)
+
+
+class SimulatedI2C:
+    """The simulated i2c buses and the devices on them."""
+
+    def __init__(
+        self,
+        clock: Callable[[], float] = time.monotonic,
+        conversion_scale: float = 1,
+        combined: bool = True,
+        error_rate: float = 0,
+        seed: int | None = None,
+    ) -> None:
+        """Initialise.
+
+        :param clock: the monotonic clock the devices use
+        :param conversion_scale: multiple of the real conversion times to use
+        :param combined: whether the adapter supports combined transactions
+        :param error_rate: fraction of transactions that fail with EIO
+        :param seed: for the random errors
+        """
+        self._fail_next: list[int] = []
+        self._lock: threading.Lock = threading.Lock()
+        self._rng: random.Random = random.Random(seed)
+        self.clock: Callable[[], float] = clock
+        self.conversion_scale: float = conversion_scale
+        self.devices: dict[int, dict[int, SimulatedINA219]] = {}
+        self.error_rate: float = error_rate
+        self.funcs: smbus.I2cFunc = (
+            smbus.I2cFunc.SMBUS_QUICK
+            | smbus.I2cFunc.SMBUS_READ_BYTE
+            | smbus.I2cFunc.SMBUS_WRITE_BYTE
+            | smbus.I2cFunc.SMBUS_READ_I2C_BLOCK
+            | smbus.I2cFunc.SMBUS_WRITE_I2C_BLOCK
+        )
+        if combined:
+            self.funcs |= smbus.I2cFunc.I2C
+        self.nacks: set[tuple[int, int]] = set()
+        self.transactions: int = 0
+
+    def add_bus(self, bus: int) -> None:
+        """Add a bus with nothing on it."""
+        self.devices.setdefault(bus, {})
+
+    def add_device(self, bus: int, address: int, device: SimulatedINA219) -> None:
+        """Add a device to a bus, adding the bus if needed."""
+        device.clock = self.clock
+        device.conversion_scale = self.conversion_scale
+        self.devices.setdefault(bus, {})[address] = device
+
+    def bus_factory(self, bus: int) -> SimulatedBus:
+        """Open a bus, a drop in replacement for smbus2.SMBus."""
+        if bus not in self.devices:
+            raise FileNotFoundError(errno.ENOENT, f"No such file: '/dev/i2c-{bus}'")
+        return SimulatedBus(self, bus)
+
+    def check_transaction(self, bus: int, address: int) -> None:
+        """Count a transaction and fail it if it should.
+
+        :raises OSError: if the address does not acknowledge or an error has
+        been injected
+        """
+        with self._lock:
+            self.transactions += 1
+            if self._fail_next:
+                code: int = self._fail_next.pop(0)
+                raise OSError(code, "Injected bus error")
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise OSError(errno.EIO, "Input/output error")
+        if address not in self.devices[bus] or (bus, address) in self.nacks:
+            raise OSError(errno.EREMOTEIO, "Remote I/O error")
+
+    def fail_next(self, count: int = 1, code: int = errno.EIO) -> None:
+        """Make the next transactions fail."""
+        with self._lock:
+            self._fail_next.extend([code] * count)
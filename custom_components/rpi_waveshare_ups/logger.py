@@ -1,29 +1,82 @@
 """Logging."""
 
 # region #-- imports --#
-import inspect
+import logging
+import sys
+from typing import Any
 
 # endregion
 
 
 class Logger:
-    """Provide functions for managing log messages."""
+    """Provide functions for managing log messages.
 
-    def __init__(self, unique_id: str = "", prefix: str = ""):
-        """Initialise."""
-        self._unique_id: str = unique_id
+    Messages are prefixed with the calling function and the unique id of the
+    config entry. The caller is looked up with sys._getframe, which costs the
+    same however deep the stack is, and nothing is looked up or formatted
+    unless the level is enabled on the underlying logger.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger | None = None,
+        unique_id: str = "",
+        prefix: str = "",
+    ) -> None:
+        """Initialise.
+
+        :param logger: the logger to write to, needed for the log methods
+        :param unique_id: added to every message to identify the entry
+        :param prefix: added to the start of every message
+        """
+        self._logger: logging.Logger | None = logger
         self._prefix: str = prefix
+        self._unique_id: str = f" ({unique_id})" if unique_id else ""
+
+    def _format(self, message: str, frame: Any, include_lineno: bool) -> str:
+        """Format a log message for the given calling frame."""
+        caller: str = ""
+        line_no: str = ""
+        if frame is not None:
+            caller = frame.f_code.co_name
+            if include_lineno:
+                line_no = f" --> line: {frame.f_lineno}"
+        if self._prefix or caller or self._unique_id or line_no:
+            message = f" --> {message}"
+        return f"{self._prefix}{caller}{self._unique_id}{line_no}{message}"
+
+    def _log(self, level: int, message: str, args: tuple[Any, ...]) -> None:
+        """Log the message, prefixed for the caller of the public method."""
+        if self._logger is None or not self._logger.isEnabledFor(level):
+            return
+
+        self._logger.log(
+            level,
+            self._format(message, sys._getframe(2), False),
+            *args,
+            stacklevel=3,
+        )
+
+    def debug(self, message: str, *args: Any) -> None:
+        """Log a debug message."""
+        self._log(logging.DEBUG, message, args)
 
     def format(
         self, message: str, include_caller: bool = True, include_lineno: bool = False
     ) -> str:
-        """Format a log message in the correct format."""
-        caller: str = ""
-        if include_caller:
-            caller_frame: inspect.FrameInfo = inspect.stack()[1]
-            caller = caller_frame.function
-        line_no: str = f" --> line: {caller.lineno}" if include_lineno else ""
-        unique_id: str = f" ({self._unique_id})" if self._unique_id else ""
-        if any([self._prefix, caller, unique_id, line_no]):
-            message = f" --> {message}"
-        return f"{self._prefix}{caller}{unique_id}{line_no}{message}"
+        """Format a log message in the correct format.
+
+        This always does the work, prefer the log methods which only format
+        the message when the level is enabled.
+        """
+        return self._format(
+            message, sys._getframe(1) if include_caller else None, include_lineno
+        )
+
+    def info(self, message: str, *args: Any) -> None:
+        """Log an info message."""
+        self._log(logging.INFO, message, args)
+
+    def warning(self, message: str, *args: Any) -> None:
+        """Log a warning message."""
+        self._log(logging.WARNING, message, args)
@@ -0,0 +1,128 @@
+"""Import of the hourly aggregates into the recorder's long-term statistics."""
+
+# region #-- imports --#
+import logging
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import (
+    PERCENTAGE,
+    UnitOfElectricCurrent,
+    UnitOfElectricPotential,
+    UnitOfEnergy,
+    UnitOfPower,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+from homeassistant.util import slugify
+
+from .const import DOMAIN
+from .energy import TOTALS
+from .hourly import MEASUREMENTS, HourlyAggregator, HourlyBucket
+
+# endregion
+
+_LOGGER = logging.getLogger(__name__)
+
+# name and unit of each statistic
+STATISTICS: dict[str, tuple[str, str]] = {
+    "battery_percentage": ("Battery Level", PERCENTAGE),
+    "charge_in_mah": ("Charge In", "mAh"),
+    "charge_out_mah": ("Charge Out", "mAh"),
+    "current": ("Current", UnitOfElectricCurrent.MILLIAMPERE),
+    "energy_in_wh": ("Energy In", UnitOfEnergy.WATT_HOUR),
+    "energy_out_wh": ("Energy Out", UnitOfEnergy.WATT_HOUR),
+    "load_voltage": ("Load Voltage", UnitOfElectricPotential.VOLT),
+    "power": ("Power", UnitOfPower.WATT),
+    "psu_voltage": ("PSU Voltage", UnitOfElectricPotential.VOLT),
+    "shunt_voltage": ("Shunt Voltage", UnitOfElectricPotential.VOLT),
+}
+
+
+class LongTermStatistics:
+    """Import the hours completed by the aggregator as external statistics.
+
+    The totals are imported as sums that carry on from the last one in the
+    recorder, so they survive restarts and the totals being reset.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        aggregator: HourlyAggregator,
+    ) -> None:
+        """Initialise."""
+        self._aggregator: HourlyAggregator = aggregator
+        self._hass: HomeAssistant = hass
+        self._metadata: dict[str, StatisticMetaData] = {
+            name: StatisticMetaData(
+                has_mean=name in MEASUREMENTS,
+                has_sum=name in TOTALS,
+                name=f"{config_entry.title} {friendly_name}",
+                source=DOMAIN,
+                statistic_id=self.statistic_id(config_entry, name),
+                unit_of_measurement=unit,
+            )
+            for name, (friendly_name, unit) in STATISTICS.items()
+        }
+        # the start, state and sum of the last import of each total
+        self._sums: dict[str, tuple[float, float, float]] = {}
+        self.imported: int = 0
+
+    @staticmethod
+    def statistic_id(config_entry: ConfigEntry, name: str) -> str:
+        """Get the id of a statistic for the entry."""
+        return f"{DOMAIN}:{slugify(f'{config_entry.entry_id}_{name}')}"
+
+    @callback
+    def _async_import_bucket(self, bucket: HourlyBucket) -> None:
+        """Import the statistics for a completed hour."""
+        start = dt_util.utc_from_timestamp(bucket.start)
+        for name, (mean, minimum, maximum) in bucket.means.items():
+            async_add_external_statistics(
+                self._hass,
+                self._metadata[name],
+                [StatisticData(start=start, mean=mean, min=minimum, max=maximum)],
+            )
+        for name, state in bucket.totals.items():
+            last: tuple[float, float, float] | None = self._sums.get(name)
+            if last is not None and bucket.start <= last[0]:
+                continue  # already imported
+            total: float = 0
+            if last is not None:
+                total = last[2] + (state - last[1] if state >= last[1] else state)
+            self._sums[name] = (bucket.start, state, total)
+            async_add_external_statistics(
+                self._hass,
+                self._metadata[name],
+                [StatisticData(start=start, state=state, sum=total)],
+            )
+        self.imported += 1
+
+    async def async_load(self) -> None:
+        """Get the last sum of each total from the recorder."""
+        for name in TOTALS:
+            statistic_id: str = self._metadata[name]["statistic_id"]
+            last = await get_instance(self._hass).async_add_executor_job(
+                get_last_statistics, self._hass, 1, statistic_id, True, {"sum", "state"}
+            )
+            if rows := last.get(statistic_id):
+                start = rows[0]["start"]
+                self._sums[name] = (
+                    start if isinstance(start, float) else start.timestamp(),
+                    rows[0]["state"] or 0,
+                    rows[0]["sum"] or 0,
+                )
+        _LOGGER.debug("continuing the sums from %s", self._sums)
+
+    @callback
+    def async_import(self) -> None:
+        """Import any hours completed since the last import."""
+        for bucket in self._aggregator.pop():
+            self._async_import_bucket(bucket)
@@ -0,0 +1,51 @@
+"""A single reading from the UPS."""
+
+# region #-- imports --#
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .sampler import IntervalStats
+
+# endregion
+
+
+@dataclass(frozen=True, slots=True)
+class Reading:
+    """Everything known about the UPS at one point in time.
+
+    Readings are built once per poll, on the device I/O worker, with every
+    derived value already worked out so that entities only read fields.
+    They are immutable, so can be shared with the event loop without a lock,
+    and use slots to keep them small enough to hold thousands in history.
+    """
+
+    seq: int  # increases by one for each reading from the device
+    timestamp: float  # monotonic time the registers were read
+
+    # registers outside of the read plan are None
+    raw_bus_voltage: int
+    raw_current: int
+    raw_power: int | None
+    raw_shunt_voltage: int | None
+
+    current: float  # mA, positive when charging
+    load_voltage: float  # V
+    power: float  # W, from current and voltage if POWER was not read
+    shunt_voltage: float | None  # V
+
+    battery_percentage: float | None
+    is_charging: bool
+    psu_voltage: float | None  # V
+    time_to_empty: float | None  # minutes
+    time_to_full: float | None  # minutes
+
+    charge_in_mah: float
+    charge_out_mah: float
+    energy_in_wh: float
+    energy_out_wh: float
+
+    overflow: bool
+    transactions: int  # bus transactions used to take the reading
+
+    interval_stats: dict[str, "IntervalStats"] | None = None
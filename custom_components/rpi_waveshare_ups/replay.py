@@ -0,0 +1,71 @@
+"""Replay a capture through the driver and the UPS, faster than real time."""
+
+# region #-- imports --#
+import asyncio
+import pathlib
+from typing import Iterable
+
+from . import UPS
+from .const import DEF_BATTERY_CAPACITY, DEF_MIN_CHARGING
+from .device_io import DeviceIO
+from .ina219.capture import CaptureExhausted, Replay
+from .ina219.ina219 import DATA_REGISTERS
+from .reading import Reading
+
+# endregion
+
+
+def _gather_all(ups: UPS) -> list[Reading]:
+    """Take readings until the capture runs out."""
+    readings: list[Reading] = []
+    while True:
+        try:
+            readings.append(ups.gather_details())
+        except CaptureExhausted:
+            return readings
+        except OSError:
+            continue  # a captured error that the retry didn't get past
+
+
+def replay_capture(
+    path: pathlib.Path,
+    is_model_d: bool,
+    i2c_address: int | None = None,
+    battery_capacity: float = DEF_BATTERY_CAPACITY,
+    min_charging: float = DEF_MIN_CHARGING,
+    read_plan: Iterable[int] = DATA_REGISTERS,
+) -> list[Reading]:
+    """Get the readings the UPS would have produced from a capture.
+
+    The readings are taken back to back, using the capture's timestamps, so
+    the energy totals, state of charge and runtime estimates see time pass as
+    it did when the capture was taken. Run it with changes to any of those to
+    see how they would have behaved against real data.
+
+    :param path: the capture
+    :param is_model_d: whether the capture is from a D HAT
+    :param i2c_address: the device to replay, the first one captured if not
+    given
+    :param battery_capacity: the capacity of the battery pack in mAh
+    :param min_charging: the lowest current, in mA, considered to be charging
+    :param read_plan: the registers to read for each reading
+    """
+    replay: Replay = Replay.from_file(path)
+    if i2c_address is None:
+        i2c_address = replay.addresses[0]
+    ups: UPS = UPS(
+        i2c_bus=0,
+        i2c_address=i2c_address,
+        is_model_d=is_model_d,
+        battery_capacity=battery_capacity,
+        min_charging=min_charging,
+        bus_factory=replay.bus_factory,
+        clock=replay.clock,
+    )
+    ups.read_plan = tuple(read_plan)
+
+    device_io: DeviceIO = DeviceIO(0)
+    try:
+        return asyncio.run(device_io.async_run(_gather_all, ups))
+    finally:
+        device_io.shutdown()
@@ -0,0 +1,75 @@
+"""Time to empty and time to full estimation."""
+
+# region #-- imports --#
+import threading
+from collections import deque
+
+# endregion
+
+RUNTIME_WINDOW: float = 120  # seconds of samples to average the current over
+
+
+class RuntimeEstimator:
+    """Estimate how long the battery will take to empty or fill.
+
+    The current is averaged over a sliding time window. The running sum is
+    updated as samples enter and leave the window so each sample costs O(1)
+    however long the window is.
+    """
+
+    def __init__(self, capacity_mah: float, window: float = RUNTIME_WINDOW) -> None:
+        """Initialise.
+
+        :param capacity_mah: the capacity of the battery pack
+        :param window: seconds of samples to average over
+        """
+        self._capacity_mah: float = capacity_mah
+        self._lock: threading.Lock = threading.Lock()
+        self._samples: deque[tuple[float, float]] = deque()
+        self._sum: float = 0
+        self._window: float = window
+
+    def add(self, timestamp: float, current_ma: float) -> None:
+        """Add a sample to the window.
+
+        :param timestamp: monotonic time the sample was taken
+        :param current_ma: the current in mA, positive when charging
+        """
+        with self._lock:
+            self._samples.append((timestamp, current_ma))
+            self._sum += current_ma
+            cutoff: float = timestamp - self._window
+            while self._samples[0][0] < cutoff:
+                self._sum -= self._samples.popleft()[1]
+
+    @property
+    def mean_current(self) -> float | None:
+        """Get the mean current, in mA, over the window."""
+        with self._lock:
+            if not self._samples:
+                return None
+            return self._sum / len(self._samples)
+
+    def time_to_empty(self, soc: float | None) -> float | None:
+        """Get the minutes until the battery is empty at the current rate.
+
+        :param soc: the state of charge in %
+        :return: the minutes left, None if the battery is not discharging
+        """
+        mean_current: float | None = self.mean_current
+        if soc is None or mean_current is None or mean_current >= 0:
+            return None
+
+        return soc / 100 * self._capacity_mah / -mean_current * 60
+
+    def time_to_full(self, soc: float | None) -> float | None:
+        """Get the minutes until the battery is full at the current rate.
+
+        :param soc: the state of charge in %
+        :return: the minutes left, None if the battery is not charging
+        """
+        mean_current: float | None = self.mean_current
+        if soc is None or mean_current is None or mean_current <= 0:
+            return None
+
+        return (100 - soc) / 100 * self._capacity_mah / mean_current * 60
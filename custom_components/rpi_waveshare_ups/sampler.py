@@ -0,0 +1,194 @@
+"""High rate background sampling of the UPS."""
+
+# region #-- imports --#
+import logging
+import math
+import threading
+from array import array
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from . import UPS
+    from .device_io import DeviceIO
+
+# endregion
+
+_LOGGER = logging.getLogger(__name__)
+
+SAMPLED_VALUES: tuple[str, ...] = ("current", "load_voltage", "power")
+
+
+@dataclass(frozen=True)
+class IntervalStats:
+    """Aggregates for a value over an interval."""
+
+    count: int
+    max: float
+    mean: float
+    min: float
+    rms: float
+
+
+class _Aggregate:
+    """Running aggregates for a value."""
+
+    __slots__ = ("count", "max", "min", "sum", "sum_squares")
+
+    def __init__(self) -> None:
+        """Initialise."""
+        self.count: int = 0
+        self.max: float = -math.inf
+        self.min: float = math.inf
+        self.sum: float = 0
+        self.sum_squares: float = 0
+
+    def add(self, value: float) -> None:
+        """Add a value to the aggregates."""
+        self.count += 1
+        self.max = max(self.max, value)
+        self.min = min(self.min, value)
+        self.sum += value
+        self.sum_squares += value * value
+
+    def stats(self) -> IntervalStats:
+        """Get the aggregates."""
+        return IntervalStats(
+            count=self.count,
+            max=self.max,
+            mean=self.sum / self.count,
+            min=self.min,
+            rms=math.sqrt(self.sum_squares / self.count),
+        )
+
+
+class RingBuffer:
+    """Preallocated ring buffer of timestamped samples."""
+
+    def __init__(self, size: int) -> None:
+        """Initialise.
+
+        :param size: the number of samples to hold
+        """
+        self._count: int = 0
+        self._index: int = 0
+        self._size: int = size
+        self.timestamps: array = array("d", bytes(8 * size))
+        self.values: dict[str, array] = {
+            name: array("f", bytes(4 * size)) for name in SAMPLED_VALUES
+        }
+
+    def __len__(self) -> int:
+        """Get the number of samples held."""
+        return self._count
+
+    def append(self, timestamp: float, *values: float) -> None:
+        """Add a sample, overwriting the oldest if the buffer is full."""
+        idx: int = self._index
+        self.timestamps[idx] = timestamp
+        for buffer, value in zip(self.values.values(), values):
+            buffer[idx] = value
+        self._index = (idx + 1) % self._size
+        self._count = min(self._count + 1, self._size)
+
+    def ordered(self) -> tuple[array, dict[str, array]]:
+        """Get copies of the timestamps and values, oldest first."""
+        if self._count < self._size:
+            return self.timestamps[: self._count], {
+                name: values[: self._count] for name, values in self.values.items()
+            }
+        idx: int = self._index
+        return self.timestamps[idx:] + self.timestamps[:idx], {
+            name: values[idx:] + values[:idx] for name, values in self.values.items()
+        }
+
+    @property
+    def size(self) -> int:
+        """Get the number of samples that can be held."""
+        return self._size
+
+
+class Sampler:
+    """Read the UPS at a fixed rate in the background.
+
+    Samples are taken on the device I/O worker for the bus, stored in a ring
+    buffer and aggregated until the coordinator collects them.
+    """
+
+    def __init__(self, ups: "UPS", rate: float, buffer_seconds: float) -> None:
+        """Initialise.
+
+        :param ups: the UPS session to sample
+        :param rate: samples per second
+        :param buffer_seconds: how much history the ring buffer holds
+        """
+        self._aggregates: dict[str, _Aggregate] = {
+            name: _Aggregate() for name in SAMPLED_VALUES
+        }
+        self._is_charging: bool | None = None
+        self._lock: threading.Lock = threading.Lock()
+        self._stop: Callable[[], None] | None = None
+        self._ups: UPS = ups
+        self.buffer: RingBuffer = RingBuffer(max(1, int(rate * buffer_seconds)))
+        self.errors: int = 0
+        self.interval: float = 1 / rate
+        self.on_power_state_change: Callable[[], None] | None = None
+
+    def collect(self) -> dict[str, IntervalStats] | None:
+        """Get the aggregates since the last collection and start afresh.
+
+        :return: the aggregates for each value, None if nothing was sampled
+        """
+        with self._lock:
+            aggregates: dict[str, _Aggregate] = self._aggregates
+            self._aggregates = {name: _Aggregate() for name in SAMPLED_VALUES}
+
+        if not aggregates[SAMPLED_VALUES[0]].count:
+            return None
+
+        return {name: aggregate.stats() for name, aggregate in aggregates.items()}
+
+    def samples(self) -> tuple[array, dict[str, array]]:
+        """Get the buffered samples, oldest first, with monotonic timestamps."""
+        with self._lock:
+            return self.buffer.ordered()
+
+    def start(self, device_io: "DeviceIO") -> None:
+        """Start sampling on the given worker."""
+        _LOGGER.debug("sampling every %.3fs", self.interval)
+        self._stop = device_io.add_periodic(self.interval, self.sample)
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        if self._stop is not None:
+            self._stop()
+            self._stop = None
+
+    def sample(self) -> None:
+        """Take a sample.
+
+        Only the raw values are read, the totals and estimates are left to
+        the polls. If the battery starts or stops charging
+        on_power_state_change is called. This blocks so must be run on the
+        device I/O worker.
+        """
+        try:
+            timestamp, values = self._ups.read_sample()
+        except OSError as err:
+            self.errors += 1
+            _LOGGER.debug("unable to sample: %s", err)
+            return
+
+        with self._lock:
+            self.buffer.append(timestamp, *values)
+            for aggregate, value in zip(self._aggregates.values(), values):
+                aggregate.add(value)
+
+        is_charging: bool = values[0] >= self._ups.min_charging
+        if (
+            self._is_charging is not None
+            and is_charging != self._is_charging
+            and self.on_power_state_change is not None
+        ):
+            self.on_power_state_change()
+        self._is_charging = is_charging
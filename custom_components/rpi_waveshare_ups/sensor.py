@@ -2,7 +2,7 @@
 
 # region #-- imports --#
 from dataclasses import dataclass
-from typing import Callable
+from typing import Any, Callable
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -15,24 +15,44 @@ from homeassistant.const import (
     PERCENTAGE,
     UnitOfElectricCurrent,
     UnitOfElectricPotential,
+    UnitOfEnergy,
     UnitOfPower,
+    UnitOfTime,
 )
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import StateType
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from . import UPS, UPSEntity
-from .const import CONF_COORDINATOR, DOMAIN
+from . import UPSEntity
+from .const import (
+    CONF_COORDINATOR,
+    CONF_LONG_TERM_STATISTICS,
+    DEF_LONG_TERM_STATISTICS,
+    DOMAIN,
+)
+from .deadband import Deadband
+from .hourly import MEASUREMENTS
+from .ina219.ina219 import Registers
+from .reading import Reading
+from .sampler import IntervalStats
+from .stats import DeviceStats, Histogram
 
 # endregion
 
+UNIT_MILLIAMPERE_HOUR: str = "mAh"
+
 
 @dataclass
 class UPSSensorEntityDescription(SensorEntityDescription):
     """Describes UPS sensor entity."""
 
-    value_fn: Callable[[UPS], StateType] | None = None
+    counter: str | None = None  # report a counter from the device stats
+    deadband: Deadband = Deadband()
+    histogram_fn: Callable[[DeviceStats], Histogram] | None = None
+    registers: tuple[Registers, ...] = ()
+    value_fn: Callable[[Reading], StateType] | None = None
 
 
 async def async_setup_entry(
@@ -41,17 +61,21 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Create the sensor entities."""
-    coordinator: DataUpdateCoordinator = hass.data[DOMAIN][CONF_COORDINATOR]
+    coordinator: DataUpdateCoordinator = hass.data[DOMAIN][config_entry.entry_id][
+        CONF_COORDINATOR
+    ]
 
     sensors: list[UPSSensorEntity] = [
         UPSSensorEntity(
             config_entry=config_entry,
             coordinator=coordinator,
             description=UPSSensorEntityDescription(
+                deadband=Deadband(absolute=0.5),
                 device_class=SensorDeviceClass.BATTERY,
                 key="battery_percentage",
                 name="Battery Level",
                 native_unit_of_measurement=PERCENTAGE,
+                registers=(Registers.BUSVOLTAGE, Registers.CURRENT),
                 state_class=SensorStateClass.MEASUREMENT,
                 translation_key="battery_percentage",
             ),
@@ -60,10 +84,107 @@ async def async_setup_entry(
             config_entry=config_entry,
             coordinator=coordinator,
             description=UPSSensorEntityDescription(
+                counter="bus_errors",
+                entity_category=EntityCategory.DIAGNOSTIC,
+                entity_registry_enabled_default=False,
+                key="bus_errors",
+                name="Bus Errors",
+                state_class=SensorStateClass.TOTAL_INCREASING,
+                translation_key="bus_errors",
+            ),
+        ),
+        UPSSensorEntity(
+            config_entry=config_entry,
+            coordinator=coordinator,
+            description=UPSSensorEntityDescription(
+                deadband=Deadband(relative=0.2),
+                device_class=SensorDeviceClass.DURATION,
+                entity_category=EntityCategory.DIAGNOSTIC,
+                entity_registry_enabled_default=False,
+                histogram_fn=lambda s: s.queued,
+                key="bus_queue_time",
+                name="Bus Queue Time",
+                native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+                state_class=SensorStateClass.MEASUREMENT,
+                suggested_display_precision=2,
+                translation_key="bus_queue_time",
+            ),
+        ),
+        UPSSensorEntity(
+            config_entry=config_entry,
+            coordinator=coordinator,
+            description=UPSSensorEntityDescription(
+                counter="reconnects",
+                entity_category=EntityCategory.DIAGNOSTIC,
+                entity_registry_enabled_default=False,
+                key="bus_reconnects",
+                name="Bus Reconnects",
+                state_class=SensorStateClass.TOTAL_INCREASING,
+                translation_key="bus_reconnects",
+            ),
+        ),
+        UPSSensorEntity(
+            config_entry=config_entry,
+            coordinator=coordinator,
+            description=UPSSensorEntityDescription(
+                counter="retries",
+                entity_category=EntityCategory.DIAGNOSTIC,
+                entity_registry_enabled_default=False,
+                key="bus_retries",
+                name="Bus Retries",
+                state_class=SensorStateClass.TOTAL_INCREASING,
+                translation_key="bus_retries",
+            ),
+        ),
+        UPSSensorEntity(
+            config_entry=config_entry,
+            coordinator=coordinator,
+            description=UPSSensorEntityDescription(
+                entity_category=EntityCategory.DIAGNOSTIC,
+                entity_registry_enabled_default=False,
+                key="bus_transactions",
+                name="Bus Transactions",
+                state_class=SensorStateClass.MEASUREMENT,
+                translation_key="bus_transactions",
+                value_fn=lambda r: r.transactions,
+            ),
+        ),
+        UPSSensorEntity(
+            config_entry=config_entry,
+            coordinator=coordinator,
+            description=UPSSensorEntityDescription(
+                deadband=Deadband(absolute=1),
+                key="charge_in_mah",
+                name="Charge In",
+                native_unit_of_measurement=UNIT_MILLIAMPERE_HOUR,
+                registers=(Registers.CURRENT,),
+                state_class=SensorStateClass.TOTAL_INCREASING,
+                translation_key="charge_in_mah",
+            ),
+        ),
+        UPSSensorEntity(
+            config_entry=config_entry,
+            coordinator=coordinator,
+            description=UPSSensorEntityDescription(
+                deadband=Deadband(absolute=1),
+                key="charge_out_mah",
+                name="Charge Out",
+                native_unit_of_measurement=UNIT_MILLIAMPERE_HOUR,
+                registers=(Registers.CURRENT,),
+                state_class=SensorStateClass.TOTAL_INCREASING,
+                translation_key="charge_out_mah",
+            ),
+        ),
+        UPSSensorEntity(
+            config_entry=config_entry,
+            coordinator=coordinator,
+            description=UPSSensorEntityDescription(
+                deadband=Deadband(absolute=5),
                 device_class=SensorDeviceClass.CURRENT,
                 key="current",
                 name="Current",
                 native_unit_of_measurement=UnitOfElectricCurrent.MILLIAMPERE,
+                registers=(Registers.CURRENT,),
                 state_class=SensorStateClass.MEASUREMENT,
                 translation_key="current",
             ),
@@ -72,10 +193,40 @@ async def async_setup_entry(
             config_entry=config_entry,
             coordinator=coordinator,
             description=UPSSensorEntityDescription(
+                deadband=Deadband(absolute=0.01),
+                device_class=SensorDeviceClass.ENERGY,
+                key="energy_in_wh",
+                name="Energy In",
+                native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+                registers=(Registers.BUSVOLTAGE, Registers.CURRENT),
+                state_class=SensorStateClass.TOTAL_INCREASING,
+                translation_key="energy_in_wh",
+            ),
+        ),
+        UPSSensorEntity(
+            config_entry=config_entry,
+            coordinator=coordinator,
+            description=UPSSensorEntityDescription(
+                deadband=Deadband(absolute=0.01),
+                device_class=SensorDeviceClass.ENERGY,
+                key="energy_out_wh",
+                name="Energy Out",
+                native_unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+                registers=(Registers.BUSVOLTAGE, Registers.CURRENT),
+                state_class=SensorStateClass.TOTAL_INCREASING,
+                translation_key="energy_out_wh",
+            ),
+        ),
+        UPSSensorEntity(
+            config_entry=config_entry,
+            coordinator=coordinator,
+            description=UPSSensorEntityDescription(
+                deadband=Deadband(absolute=0.01),
                 device_class=SensorDeviceClass.VOLTAGE,
                 key="load_voltage",
                 name="Load Voltage",
                 native_unit_of_measurement=UnitOfElectricPotential.VOLT,
+                registers=(Registers.BUSVOLTAGE,),
                 state_class=SensorStateClass.MEASUREMENT,
                 translation_key="load_voltage",
             ),
@@ -84,10 +235,29 @@ async def async_setup_entry(
             config_entry=config_entry,
             coordinator=coordinator,
             description=UPSSensorEntityDescription(
+                deadband=Deadband(relative=0.2),
+                device_class=SensorDeviceClass.DURATION,
+                entity_category=EntityCategory.DIAGNOSTIC,
+                entity_registry_enabled_default=False,
+                histogram_fn=lambda s: s.poll,
+                key="poll_duration",
+                name="Poll Duration",
+                native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+                state_class=SensorStateClass.MEASUREMENT,
+                suggested_display_precision=2,
+                translation_key="poll_duration",
+            ),
+        ),
+        UPSSensorEntity(
+            config_entry=config_entry,
+            coordinator=coordinator,
+            description=UPSSensorEntityDescription(
+                deadband=Deadband(absolute=0.05),
                 device_class=SensorDeviceClass.POWER,
                 key="power",
                 name="Power",
                 native_unit_of_measurement=UnitOfPower.WATT,
+                registers=(Registers.POWER,),
                 state_class=SensorStateClass.MEASUREMENT,
                 translation_key="power",
             ),
@@ -96,27 +266,61 @@ async def async_setup_entry(
             config_entry=config_entry,
             coordinator=coordinator,
             description=UPSSensorEntityDescription(
+                deadband=Deadband(absolute=0.01),
                 device_class=SensorDeviceClass.VOLTAGE,
                 key="",
                 name="PSU Voltage",
                 native_unit_of_measurement=UnitOfElectricPotential.VOLT,
+                registers=(Registers.BUSVOLTAGE, Registers.SHUNTVOLTAGE),
                 state_class=SensorStateClass.MEASUREMENT,
                 translation_key="psu_voltage",
-                value_fn=lambda u: u.load_voltage + u.shunt_voltage,
+                value_fn=lambda r: r.psu_voltage,
             ),
         ),
         UPSSensorEntity(
             config_entry=config_entry,
             coordinator=coordinator,
             description=UPSSensorEntityDescription(
+                deadband=Deadband(absolute=0.0005),
                 device_class=SensorDeviceClass.VOLTAGE,
                 key="shunt_voltage",
                 name="Shunt Voltage",
                 native_unit_of_measurement=UnitOfElectricPotential.VOLT,
+                registers=(Registers.SHUNTVOLTAGE,),
                 state_class=SensorStateClass.MEASUREMENT,
                 translation_key="shunt_voltage",
             ),
         ),
+        UPSSensorEntity(
+            config_entry=config_entry,
+            coordinator=coordinator,
+            description=UPSSensorEntityDescription(
+                deadband=Deadband(absolute=1),
+                device_class=SensorDeviceClass.DURATION,
+                key="time_to_empty",
+                name="Time to Empty",
+                native_unit_of_measurement=UnitOfTime.MINUTES,
+                registers=(Registers.BUSVOLTAGE, Registers.CURRENT),
+                state_class=SensorStateClass.MEASUREMENT,
+                suggested_display_precision=0,
+                translation_key="time_to_empty",
+            ),
+        ),
+        UPSSensorEntity(
+            config_entry=config_entry,
+            coordinator=coordinator,
+            description=UPSSensorEntityDescription(
+                deadband=Deadband(absolute=1),
+                device_class=SensorDeviceClass.DURATION,
+                key="time_to_full",
+                name="Time to Full",
+                native_unit_of_measurement=UnitOfTime.MINUTES,
+                registers=(Registers.BUSVOLTAGE, Registers.CURRENT),
+                state_class=SensorStateClass.MEASUREMENT,
+                suggested_display_precision=0,
+                translation_key="time_to_full",
+            ),
+        ),
     ]
 
     async_add_entities(sensors, update_before_add=True)
@@ -134,14 +338,64 @@ class UPSSensorEntity(UPSEntity, SensorEntity):
         """Initialise."""
         super().__init__(config_entry=config_entry, coordinator=coordinator)
         self.entity_description = description
+        self._set_deadband(description.deadband)
         self._attr_has_entity_name = True
         self._attr_unique_id = (
             f"{config_entry.entry_id}::sensor::{self.entity_description.key}"
         )
+        # imported as external statistics, so the recorder needn't compile
+        # them, the totals keep theirs for the Energy dashboard
+        if (
+            config_entry.options.get(
+                CONF_LONG_TERM_STATISTICS, DEF_LONG_TERM_STATISTICS
+            )
+            and description.translation_key in MEASUREMENTS
+        ):
+            self._attr_state_class = None
+
+    @property
+    def _state_value(self) -> StateType:
+        """Return the value that the deadband is applied to."""
+        return self.native_value
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the percentiles or the aggregates from background sampling."""
+        if self.entity_description.histogram_fn is not None:
+            histogram: Histogram = self.entity_description.histogram_fn(
+                self.coordinator.stats
+            )
+            return {
+                "count": histogram.count,
+                "max": histogram.max,
+                "mean": histogram.mean,
+                "p50": histogram.percentile(50),
+                "p95": histogram.percentile(95),
+            }
+
+        interval_stats: IntervalStats | None = (
+            self.coordinator.data.interval_stats or {}
+        ).get(self.entity_description.key)
+        if interval_stats is None:
+            return None
+
+        return {
+            "interval_max": interval_stats.max,
+            "interval_mean": interval_stats.mean,
+            "interval_min": interval_stats.min,
+            "interval_rms": interval_stats.rms,
+            "interval_samples": interval_stats.count,
+        }
 
     @property
     def native_value(self) -> StateType:
         """Return the value reported by the sensor."""
+        if self.entity_description.counter is not None:
+            return self.coordinator.stats.counters[self.entity_description.counter]
+
+        if self.entity_description.histogram_fn is not None:
+            return self.entity_description.histogram_fn(self.coordinator.stats).last
+
         if isinstance(self.entity_description.value_fn, Callable):
             return self.entity_description.value_fn(self.coordinator.data)
 
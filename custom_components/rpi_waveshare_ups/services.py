@@ -0,0 +1,213 @@
+"""Services."""
+
+# region #-- imports --#
+import functools
+import math
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import (
+    UnitOfElectricCurrent,
+    UnitOfElectricPotential,
+    UnitOfPower,
+)
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import device_registry as dr
+from homeassistant.util import dt as dt_util
+
+from .analysis import POWER_STATES, ResultCache, window_statistics
+from .const import (
+    ATTR_BINS,
+    ATTR_DEVICE_ID,
+    ATTR_DURATION,
+    ATTR_END,
+    ATTR_PERCENTILES,
+    ATTR_POWER_STATE,
+    ATTR_SERIES,
+    ATTR_START,
+    CONF_HISTORY,
+    CONF_MIN_CHARGING,
+    CONF_SAMPLER,
+    CONF_STATISTICS_CACHE,
+    DEF_BINS,
+    DEF_MIN_CHARGING,
+    DEF_PERCENTILES,
+    DOMAIN,
+    SERVICE_GET_STATISTICS,
+)
+from .history import SERIES
+
+# endregion
+
+MAX_BINS: int = 1000
+# without an end, the window ends at the last whole multiple of 1/1000 of its
+# length, to at most a minute ago, so that repeated calls hit the cache
+END_QUANTUM_FRACTION: float = 0.001
+MAX_END_QUANTUM: float = 60
+# the longest a reading takes to reach the samples and history once taken
+SETTLE_TIME: float = 1
+
+UNITS: dict[str, str] = {
+    "current": UnitOfElectricCurrent.MILLIAMPERE,
+    "load_voltage": UnitOfElectricPotential.VOLT,
+    "power": UnitOfPower.WATT,
+}
+
+GET_STATISTICS_SCHEMA: vol.All = vol.All(
+    vol.Schema(
+        {
+            vol.Required(ATTR_DEVICE_ID): cv.string,
+            vol.Optional(ATTR_SERIES, default=SERIES[0]): vol.In(SERIES),
+            vol.Exclusive(ATTR_START, "window"): cv.datetime,
+            vol.Exclusive(ATTR_DURATION, "window"): cv.positive_time_period,
+            vol.Optional(ATTR_END): cv.datetime,
+            vol.Optional(ATTR_PERCENTILES, default=DEF_PERCENTILES): vol.All(
+                cv.ensure_list,
+                [vol.All(vol.Coerce(float), vol.Range(min=0, max=100))],
+            ),
+            vol.Optional(ATTR_BINS, default=DEF_BINS): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=MAX_BINS)
+            ),
+            vol.Optional(ATTR_POWER_STATE, default=POWER_STATES[0]): vol.In(
+                POWER_STATES
+            ),
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_START, ATTR_DURATION),
+)
+
+
+def _entry_for_device(
+    hass: HomeAssistant, device_id: str
+) -> tuple[ConfigEntry, dict[str, Any]]:
+    """Get the loaded config entry, and its data, for a device.
+
+    :raises HomeAssistantError: if the device isn't a loaded UPS
+    """
+    if (device := dr.async_get(hass).async_get(device_id)) is not None:
+        for entry_id in device.config_entries:
+            if (entry_data := hass.data.get(DOMAIN, {}).get(entry_id)) is not None:
+                return hass.config_entries.async_get_entry(entry_id), entry_data
+    raise HomeAssistantError(f"{device_id} is not a loaded UPS")
+
+
+def _window(data: dict[str, Any]) -> tuple[float, float]:
+    """Get the start and end, in seconds since the epoch, of the window.
+
+    :raises HomeAssistantError: if the window is empty
+    """
+    start: float | None = (
+        dt_util.as_timestamp(data[ATTR_START]) if ATTR_START in data else None
+    )
+    duration: float | None = (
+        data[ATTR_DURATION].total_seconds() if ATTR_DURATION in data else None
+    )
+    if ATTR_END in data:
+        end: float = dt_util.as_timestamp(data[ATTR_END])
+    else:
+        now: float = dt_util.utcnow().timestamp()
+        quantum: float = min(
+            MAX_END_QUANTUM,
+            max(1, (duration or now - start) * END_QUANTUM_FRACTION),
+        )
+        end = math.floor(now / quantum) * quantum
+    if start is None:
+        start = end - duration
+    if start >= end:
+        raise HomeAssistantError("The start of the window must be before the end")
+    return start, end
+
+
+def _settled(end: float, resolution: float) -> bool:
+    """Get whether nothing more can be added to a window ending at end.
+
+    For an aggregate tier the bucket holding the end is still being filled
+    until the bucket finishes.
+    """
+    if resolution:
+        end = math.ceil(end / resolution) * resolution
+    return dt_util.utcnow().timestamp() >= end + SETTLE_TIME
+
+
+def _isoformat(timestamp: float | None) -> str | None:
+    """Format seconds since the epoch for the response."""
+    if timestamp is None:
+        return None
+    return dt_util.utc_from_timestamp(timestamp).isoformat()
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services."""
+
+    async def _async_get_statistics(call: ServiceCall) -> ServiceResponse:
+        """Get statistics for a series over a window of time.
+
+        Results are cached per entry, so a repeated call for the same window
+        is answered without reading any of the history again. A window that
+        readings can still be added to, e.g. one ending in the future, isn't
+        cached.
+        """
+        config_entry, entry_data = _entry_for_device(hass, call.data[ATTR_DEVICE_ID])
+        start, end = _window(call.data)
+        series: str = call.data[ATTR_SERIES]
+        percentiles: tuple[float, ...] = tuple(call.data[ATTR_PERCENTILES])
+        key: tuple = (
+            series,
+            start,
+            end,
+            percentiles,
+            call.data[ATTR_BINS],
+            call.data[ATTR_POWER_STATE],
+        )
+        cache: ResultCache = entry_data.setdefault(
+            CONF_STATISTICS_CACHE, ResultCache()
+        )
+        if (result := cache.get(key)) is None:
+            try:
+                result = await hass.async_add_executor_job(
+                    functools.partial(
+                        window_statistics,
+                        entry_data.get(CONF_HISTORY),
+                        entry_data.get(CONF_SAMPLER),
+                        series,
+                        start,
+                        end,
+                        percentiles,
+                        call.data[ATTR_BINS],
+                        call.data[ATTR_POWER_STATE],
+                        config_entry.options.get(CONF_MIN_CHARGING, DEF_MIN_CHARGING),
+                    )
+                )
+            except ValueError as err:
+                raise HomeAssistantError(
+                    "Turn on background sampling or history to get statistics"
+                ) from err
+            if _settled(end, result["resolution"]):
+                cache.put(key, result)
+
+        return result | {
+            "end": _isoformat(end),
+            "first": _isoformat(result["first"]),
+            "last": _isoformat(result["last"]),
+            "series": series,
+            "start": _isoformat(start),
+            "unit": UNITS[series],
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_STATISTICS,
+        _async_get_statistics,
+        schema=GET_STATISTICS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
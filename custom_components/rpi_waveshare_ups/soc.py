@@ -0,0 +1,128 @@
+"""State of charge estimation."""
+
+# region #-- imports --#
+from array import array
+from dataclasses import dataclass
+
+# endregion
+
+# open circuit voltage of a single Li-ion cell against state of charge
+OCV_CURVE: tuple[tuple[float, float], ...] = (
+    (3.00, 0),
+    (3.30, 5),
+    (3.45, 10),
+    (3.55, 20),
+    (3.62, 30),
+    (3.68, 40),
+    (3.74, 50),
+    (3.80, 60),
+    (3.87, 70),
+    (3.95, 80),
+    (4.05, 90),
+    (4.20, 100),
+)
+LUT_STEP: float = 0.001  # volts between entries in the lookup table
+
+MAX_ESTIMATE_GAP: float = 300  # seconds, longer gaps restart from the voltage
+REST_CURRENT: float = 50  # mA, below this the battery is considered at rest
+TIME_CONSTANT_LOAD: float = 600  # seconds to converge on the voltage under load
+TIME_CONSTANT_REST: float = 30  # seconds to converge on the voltage at rest
+
+
+@dataclass(frozen=True)
+class BatteryPack:
+    """Describes the battery pack on a HAT."""
+
+    cells_series: int
+    internal_resistance: float  # ohms for the whole pack
+
+
+BATTERY_PACKS: dict[str, BatteryPack] = {  # keyed on the HAT type
+    "a": BatteryPack(cells_series=2, internal_resistance=0.12),
+    "b": BatteryPack(cells_series=2, internal_resistance=0.12),
+    "d": BatteryPack(cells_series=1, internal_resistance=0.06),
+}
+
+
+def _build_lut(cells_series: int) -> tuple[float, array]:
+    """Build a lookup table of state of charge for the pack voltage.
+
+    :param cells_series: the number of cells in series
+    :return: the voltage of the first entry and the table
+    """
+    curve: list[tuple[float, float]] = [
+        (voltage * cells_series, soc) for voltage, soc in OCV_CURVE
+    ]
+    v_min: float = curve[0][0]
+    lut: array = array("f")
+    segment: int = 0
+    for idx in range(int(round((curve[-1][0] - v_min) / LUT_STEP)) + 1):
+        voltage: float = v_min + idx * LUT_STEP
+        while segment < len(curve) - 2 and voltage > curve[segment + 1][0]:
+            segment += 1
+        (v_low, soc_low), (v_high, soc_high) = curve[segment], curve[segment + 1]
+        lut.append(soc_low + (voltage - v_low) * (soc_high - soc_low) / (v_high - v_low))
+
+    return v_min, lut
+
+
+class SocEstimator:
+    """Estimate the state of charge of the battery.
+
+    The terminal voltage is compensated for the drop across the internal
+    resistance and looked up against the open circuit voltage curve. That is
+    fused with coulomb counting using a complementary filter that trusts the
+    voltage quickly when the battery is at rest and slowly when under load.
+    """
+
+    def __init__(self, pack: BatteryPack, capacity_mah: float) -> None:
+        """Initialise.
+
+        :param pack: the battery pack on the HAT
+        :param capacity_mah: the capacity of the pack
+        """
+        self._capacity_mah: float = capacity_mah
+        self._internal_resistance: float = pack.internal_resistance
+        self._last_timestamp: float | None = None
+        self._v_min, self._lut = _build_lut(pack.cells_series)
+        self.soc: float | None = None
+
+    def soc_from_voltage(self, voltage: float) -> float:
+        """Get the state of charge for an open circuit voltage."""
+        idx: int = int((voltage - self._v_min) / LUT_STEP)
+        return float(self._lut[min(max(idx, 0), len(self._lut) - 1)])
+
+    def update(self, timestamp: float, voltage: float, current_ma: float) -> float:
+        """Update the estimate with a sample.
+
+        :param timestamp: monotonic time the sample was taken
+        :param voltage: the pack voltage in V
+        :param current_ma: the current in mA, positive when charging
+        :return: the state of charge in %
+        """
+        soc_voltage: float = self.soc_from_voltage(
+            voltage - current_ma / 1000 * self._internal_resistance
+        )
+        elapsed: float = (
+            timestamp - self._last_timestamp
+            if self._last_timestamp is not None
+            else 0
+        )
+        self._last_timestamp = timestamp
+        if self.soc is None or not 0 < elapsed <= MAX_ESTIMATE_GAP:
+            self.soc = soc_voltage
+            return self.soc
+
+        soc_coulomb: float = (
+            self.soc + current_ma * elapsed / 3600 / self._capacity_mah * 100
+        )
+        time_constant: float = (
+            TIME_CONSTANT_REST
+            if abs(current_ma) < REST_CURRENT
+            else TIME_CONSTANT_LOAD
+        )
+        alpha: float = elapsed / (time_constant + elapsed)
+        self.soc = min(
+            max(soc_coulomb + alpha * (soc_voltage - soc_coulomb), 0), 100
+        )
+        return self.soc
@@ -0,0 +1,125 @@
+"""Timing histograms and counters for the health of the bus."""
+
+# region #-- imports --#
+import bisect
+import threading
+from array import array
+from collections import Counter
+from typing import Any
+
+# endregion
+
+# upper bounds, in ms, of the histogram buckets, the last catches the rest
+HISTOGRAM_BOUNDS: tuple[float, ...] = (
+    0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000,
+)
+
+
+class Histogram:
+    """Fixed size histogram of durations.
+
+    Recording is O(log buckets) with no allocation, so it is cheap enough to
+    do for every transaction. Percentiles are the upper bound of the bucket
+    they fall in.
+    """
+
+    def __init__(self, bounds: tuple[float, ...] = HISTOGRAM_BOUNDS) -> None:
+        """Initialise.
+
+        :param bounds: the upper bound, in ms, of each bucket in order
+        """
+        self._bounds: tuple[float, ...] = bounds
+        self._counts: array = array("L", [0]) * (len(bounds) + 1)
+        self._lock: threading.Lock = threading.Lock()
+        self.count: int = 0
+        self.last: float | None = None
+        self.max: float | None = None
+        self.total: float = 0
+
+    def add(self, value: float) -> None:
+        """Record a duration in ms."""
+        with self._lock:
+            self._counts[bisect.bisect_left(self._bounds, value)] += 1
+            self.count += 1
+            self.last = value
+            self.total += value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    @property
+    def mean(self) -> float | None:
+        """Get the mean duration in ms."""
+        return self.total / self.count if self.count else None
+
+    def percentile(self, percent: float) -> float | None:
+        """Get the duration, in ms, that the given percent are within."""
+        with self._lock:
+            if not self.count:
+                return None
+
+            target: float = self.count * percent / 100
+            seen: int = 0
+            for idx, count in enumerate(self._counts):
+                seen += count
+                if seen >= target:
+                    return self._bounds[idx] if idx < len(self._bounds) else self.max
+
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get the histogram for diagnostics."""
+        with self._lock:
+            counts: list[int] = list(self._counts)
+        return {
+            "buckets": {
+                f"<={bound}": count for bound, count in zip(self._bounds, counts)
+            }
+            | {f">{self._bounds[-1]}": counts[-1]},
+            "count": self.count,
+            "last": self.last,
+            "max": self.max,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+        }
+
+
+class DeviceStats:
+    """Timings and error counts for a device.
+
+    This is updated from the device I/O worker and read from the event loop.
+    """
+
+    def __init__(self) -> None:
+        """Initialise."""
+        self._lock: threading.Lock = threading.Lock()
+        self.counters: Counter[str] = Counter()
+        self.poll: Histogram = Histogram()  # submitting a poll to its result
+        self.queued: Histogram = Histogram()  # waiting for the worker
+        self.registers: dict[str, Histogram] = {}  # each read from the device
+
+    def add_read(self, name: str, duration: float) -> None:
+        """Record how long, in ms, a read of the named register(s) took."""
+        if (histogram := self.registers.get(name)) is None:
+            with self._lock:
+                histogram = self.registers.setdefault(name, Histogram())
+        histogram.add(duration)
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        """Increment the named counter."""
+        with self._lock:
+            self.counters[counter] += amount
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get the stats for diagnostics."""
+        with self._lock:
+            counters: dict[str, int] = dict(self.counters)
+            registers: dict[str, Histogram] = dict(self.registers)
+        return {
+            "counters": counters,
+            "poll_ms": self.poll.as_dict(),
+            "queued_ms": self.queued.as_dict(),
+            "registers_ms": {
+                name: histogram.as_dict() for name, histogram in registers.items()
+            },
+        }
@@ -0,0 +1,18 @@
+"""Fixtures shared by the tests.
+
+The driver in ina219 only needs smbus2 so is imported on its own, from the
+integration's directory, so that it can be tested without Home Assistant.
+"""
+
+# region #-- imports --#
+import pathlib
+import sys
+
+# endregion
+
+REPO_ROOT: pathlib.Path = pathlib.Path(__file__).parents[1]
+COMPONENT_PATH: pathlib.Path = REPO_ROOT / "custom_components" / "rpi_waveshare_ups"
+
+for path in (REPO_ROOT, COMPONENT_PATH):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
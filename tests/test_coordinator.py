@@ -0,0 +1,85 @@
+"""Tests for the polling interval of the coordinator."""
+
+# region #-- imports --#
+import dataclasses
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+# pylint: disable=wrong-import-position
+from custom_components.rpi_waveshare_ups.coordinator import (  # noqa: E402
+    ADAPTIVE_BACKOFF_POLLS,
+    UPSDataUpdateCoordinator,
+)
+from custom_components.rpi_waveshare_ups.reading import Reading  # noqa: E402
+
+# endregion
+
+SLOW: float = 10
+FAST: float = 2
+
+FULL_ON_MAINS: Reading = Reading(
+    seq=1,
+    timestamp=0,
+    raw_bus_voltage=0,
+    raw_current=0,
+    raw_power=None,
+    raw_shunt_voltage=None,
+    current=10,
+    load_voltage=8.3,
+    power=0.1,
+    shunt_voltage=None,
+    battery_percentage=100,
+    is_charging=True,
+    psu_voltage=None,
+    time_to_empty=None,
+    time_to_full=0,
+    charge_in_mah=0,
+    charge_out_mah=0,
+    energy_in_wh=0,
+    energy_out_wh=0,
+    overflow=False,
+    transactions=1,
+)
+
+
+def _coordinator() -> UPSDataUpdateCoordinator:
+    """Create a coordinator, polling slowly, without Home Assistant."""
+    coordinator: UPSDataUpdateCoordinator = UPSDataUpdateCoordinator.__new__(
+        UPSDataUpdateCoordinator
+    )
+    coordinator._backoff_polls = 0
+    coordinator._fast = False
+    coordinator._last_psu_voltage = None
+    coordinator._update_interval_fast = FAST
+    coordinator._update_interval_slow = SLOW
+    coordinator.poll_interval = SLOW
+    return coordinator
+
+
+def test_full_on_mains_polls_slowly() -> None:
+    """Nothing changes whilst the battery is full on mains."""
+    coordinator: UPSDataUpdateCoordinator = _coordinator()
+
+    coordinator._adapt_interval(FULL_ON_MAINS)
+
+    assert coordinator.poll_interval == SLOW
+
+
+def test_charging_but_not_full_polls_fast() -> None:
+    """Polling stays fast until the battery is full, not just on mains."""
+    coordinator: UPSDataUpdateCoordinator = _coordinator()
+    charging: Reading = dataclasses.replace(
+        FULL_ON_MAINS, current=800, battery_percentage=60
+    )
+
+    for _ in range(ADAPTIVE_BACKOFF_POLLS * 2):
+        coordinator._adapt_interval(charging)
+        assert coordinator.poll_interval == FAST
+
+    for _ in range(ADAPTIVE_BACKOFF_POLLS - 1):
+        coordinator._adapt_interval(FULL_ON_MAINS)
+        assert coordinator.poll_interval == FAST
+    coordinator._adapt_interval(FULL_ON_MAINS)
+    assert coordinator.poll_interval == SLOW
@@ -0,0 +1,56 @@
+"""Tests for the deadband overrides."""
+
+# region #-- imports --#
+import pytest
+
+vol = pytest.importorskip("voluptuous")
+
+# pylint: disable=wrong-import-position
+from deadband import DEADBANDS_SCHEMA, Deadband  # noqa: E402
+
+# endregion
+
+
+def test_deadbands_schema_coerces_values() -> None:
+    """Numbers entered as strings or ints are stored as floats."""
+    assert DEADBANDS_SCHEMA(
+        {"load_voltage": {"absolute": "0.02", "relative": 0, "max_silence": 600}}
+    ) == {"load_voltage": {"absolute": 0.02, "relative": 0.0, "max_silence": 600.0}}
+    assert DEADBANDS_SCHEMA({"current": {"max_silence": None}}) == {
+        "current": {"max_silence": None}
+    }
+
+
+@pytest.mark.parametrize(
+    "deadbands",
+    [
+        {"not_a_sensor": {"absolute": 1}},
+        {"current": {"absolute": -1}},
+        {"current": {"relative": "a lot"}},
+        {"current": {"max_silence": 0}},
+        {"current": {"hysteresis": 1}},
+        {"current": 5},
+    ],
+)
+def test_deadbands_schema_rejects(deadbands: dict) -> None:
+    """Unknown sensors and fields, and values out of range, are rejected."""
+    with pytest.raises(vol.Invalid):
+        DEADBANDS_SCHEMA(deadbands)
+
+
+def test_with_overrides_coerces_values() -> None:
+    """Overrides stored as strings are applied as numbers."""
+    deadband: Deadband = Deadband(absolute=1).with_overrides(
+        {"absolute": "0.5", "max_silence": "60"}
+    )
+
+    assert deadband == Deadband(absolute=0.5, max_silence=60)
+    assert deadband.moved(10, 10.6)
+    assert not deadband.moved(10, 10.4)
+
+
+def test_with_overrides_ignores_invalid() -> None:
+    """Invalid overrides leave the defaults in place."""
+    deadband: Deadband = Deadband(absolute=1)
+
+    assert deadband.with_overrides({"absolute": -1}) is deadband
@@ -0,0 +1,51 @@
+"""Tests for the background sampler."""
+
+# region #-- imports --#
+from sampler import Sampler
+
+# endregion
+
+
+class _FakeUPS:
+    """Return queued samples, as UPS.read_sample does."""
+
+    min_charging: float = -100
+
+    def __init__(
+        self, samples: list[tuple[float, tuple[float, float, float]] | None]
+    ) -> None:
+        """Initialise."""
+        self._samples = iter(samples)
+
+    def read_sample(self) -> tuple[float, tuple[float, float, float]]:
+        """Get the next sample, an OSError if it is None."""
+        if (sample := next(self._samples)) is None:
+            raise OSError("bus error")
+        return sample
+
+
+def test_sample_buffers_and_aggregates_raw_values() -> None:
+    """Samples go straight into the buffer and the interval aggregates."""
+    sampler: Sampler = Sampler(
+        _FakeUPS([(1.0, (500, 8.0, 4.0)), None, (2.0, (-300, 7.5, 2.25))]),
+        rate=10,
+        buffer_seconds=1,
+    )
+    changes: list[None] = []
+    sampler.on_power_state_change = lambda: changes.append(None)
+
+    for _ in range(3):
+        sampler.sample()
+
+    timestamps, values = sampler.samples()
+    assert list(timestamps) == [1.0, 2.0]
+    assert list(values["current"]) == [500, -300]
+    assert list(values["power"]) == [4.0, 2.25]
+    assert sampler.errors == 1
+    assert len(changes) == 1  # stopped charging
+
+    stats = sampler.collect()
+    assert stats["load_voltage"].count == 2
+    assert stats["load_voltage"].min == 7.5
+    assert stats["current"].mean == 100
+    assert sampler.collect() is None
@@ -0,0 +1,69 @@
+"""Tests for the sensor entities."""
+
+# region #-- imports --#
+import asyncio
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+# pylint: disable=wrong-import-position
+from homeassistant.components.sensor import SensorStateClass  # noqa: E402
+
+from custom_components.rpi_waveshare_ups import sensor  # noqa: E402
+from custom_components.rpi_waveshare_ups.const import (  # noqa: E402
+    CONF_COORDINATOR,
+    CONF_LONG_TERM_STATISTICS,
+    DOMAIN,
+)
+from custom_components.rpi_waveshare_ups.deadband import ENTITY_KEYS  # noqa: E402
+
+# endregion
+
+
+def _state_classes(options: dict[str, Any]) -> dict[str, SensorStateClass | None]:
+    """Create the sensors, returning the state class of each."""
+    config_entry: MagicMock = MagicMock(entry_id="entry", options=options)
+    hass: MagicMock = MagicMock(
+        data={DOMAIN: {"entry": {CONF_COORDINATOR: MagicMock()}}}
+    )
+    added: list[sensor.UPSSensorEntity] = []
+    asyncio.run(
+        sensor.async_setup_entry(
+            hass, config_entry, lambda entities, **_: added.extend(entities)
+        )
+    )
+    return {
+        entity.entity_description.translation_key: entity.state_class
+        for entity in added
+    }
+
+
+def test_long_term_statistics_keeps_totals_state_class() -> None:
+    """Only the imported measurements lose their state class."""
+    without: dict[str, SensorStateClass | None] = _state_classes({})
+    with_import: dict[str, SensorStateClass | None] = _state_classes(
+        {CONF_LONG_TERM_STATISTICS: True}
+    )
+
+    for key in ("charge_in_mah", "charge_out_mah", "energy_in_wh", "energy_out_wh"):
+        assert with_import[key] == SensorStateClass.TOTAL_INCREASING
+    for key in (
+        "battery_percentage",
+        "current",
+        "load_voltage",
+        "power",
+        "psu_voltage",
+        "shunt_voltage",
+    ):
+        assert without[key] == SensorStateClass.MEASUREMENT
+        assert with_import[key] is None
+    for key in ("bus_transactions", "time_to_empty", "time_to_full"):
+        assert with_import[key] == without[key] == SensorStateClass.MEASUREMENT
+
+
+def test_deadbands_can_be_set_for_every_sensor() -> None:
+    """Every sensor can be given deadband overrides in the options."""
+    assert set(_state_classes({})) <= set(ENTITY_KEYS)
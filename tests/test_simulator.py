@@ -0,0 +1,46 @@
+"""Tests for the simulated INA219."""
+
+# region #-- imports --#
+import pytest
+from ina219.ina219 import CONVERSION_TIMES, HAT_AB, ADCResolution, Mode, Registers
+from ina219.simulator import ManualClock, SimulatedINA219, steady
+
+# endregion
+
+
+def _config(bus_adc: int, shunt_adc: int, mode: Mode) -> int:
+    """Build a CONFIG register value for the HAT with the given ADC settings."""
+    return (
+        HAT_AB.bus_voltage_range.value << 13
+        | HAT_AB.gain.value << 11
+        | bus_adc << 7
+        | shunt_adc << 3
+        | mode.value
+    )
+
+
+@pytest.mark.parametrize(
+    ("code", "resolution"),
+    [
+        (0x00, ADCResolution.ADCRES_9BIT_1S),
+        (0x03, ADCResolution.ADCRES_12BIT_1S),
+        (0x07, ADCResolution.ADCRES_12BIT_1S),  # bit 2 is ignored
+        (0x08, ADCResolution.ADCRES_12BIT_1S),
+        (0x0F, ADCResolution.ADCRES_12BIT_128S),
+    ],
+)
+def test_adc_setting_conversion_time(code: int, resolution: ADCResolution) -> None:
+    """Every ADC setting the chip accepts converts in the datasheet time."""
+    clock: ManualClock = ManualClock()
+    device: SimulatedINA219 = SimulatedINA219(HAT_AB, steady(8.0, -500))
+    device.clock = clock
+    device.write(
+        Registers.CONFIG.value, _config(code, code, Mode.SANDBVOLT_TRIGGERED)
+    )
+
+    clock.advance(2 * CONVERSION_TIMES[resolution] * 0.99)
+    assert not device.read(Registers.BUSVOLTAGE.value) & 0x02  # not ready
+    clock.advance(2 * CONVERSION_TIMES[resolution] * 0.02)
+    bus_voltage: int = device.read(Registers.BUSVOLTAGE.value)
+    assert bus_voltage & 0x02  # conversion ready
+    assert (bus_voltage >> 3) * 0.004 == pytest.approx(8.0, abs=0.004)